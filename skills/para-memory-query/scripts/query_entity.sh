@@ -4,6 +4,10 @@
 set -e
 
 MEMORY_ROOT="${PARA_MEMORY_ROOT:-$HOME/para-memory}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+SCRIPTS="$SCRIPT_DIR/../../para-memory/scripts"
+UPDATE_ENTITY="$SCRIPTS/update_entity.py"
+ACCESS_LOG="$SCRIPTS/access_log.py"
 ENTITY_PATH="$1"
 FILTER="${2:-.}"  # Default to showing all facts
 
@@ -18,12 +22,56 @@ fi
 # Construct full path to items.json
 ITEMS_FILE="$MEMORY_ROOT/knowledge/$ENTITY_PATH/items.json"
 
+# Entities moved into archives/ are found through the redirect table
+# (see para-memory/scripts/archive_entities.py)
+REDIRECTS="$MEMORY_ROOT/knowledge/.redirects.json"
+if [ ! -f "$ITEMS_FILE" ] && [ -f "$REDIRECTS" ]; then
+    MOVED=$(jq -r --arg k "${ENTITY_PATH%/}" '.[$k] // .["areas/" + $k] // empty' "$REDIRECTS")
+    if [ -n "$MOVED" ]; then
+        ENTITY_PATH="$MOVED"
+        ITEMS_FILE="$MEMORY_ROOT/knowledge/$ENTITY_PATH/items.json"
+    fi
+fi
+
 if [ ! -f "$ITEMS_FILE" ]; then
     echo "Error: Entity file not found: $ITEMS_FILE"
     exit 1
 fi
 
-# Query using jq
+# Query using jq, on the entity as update_entity.py reads it: a compact
+# items.json expanded and any pending fact log (items.log.jsonl) replayed
 echo "Querying entity: $ENTITY_PATH"
 echo "---"
-jq "$FILTER" "$ITEMS_FILE"
+DATA=$(python3 "$UPDATE_ENTITY" "$MEMORY_ROOT/knowledge/$ENTITY_PATH" --export)
+RESULT=$(printf '%s\n' "$DATA" | jq "$FILTER")
+printf '%s\n' "$RESULT"
+
+# Sharded entities keep superseded facts out of items.json
+if [ -d "$MEMORY_ROOT/knowledge/$ENTITY_PATH/history" ]; then
+    echo "(superseded facts are in $ENTITY_PATH/history/; see query_facts.sh --entity $ENTITY_PATH --status superseded)" >&2
+fi
+
+# Record the active facts the filter selected as accessed, through
+# access_log.py; weekly_synthesis.py folds the log into
+# lastAccessed/accessCount (PARA_MEMORY_TRACK_ACCESS=0 disables this).
+# Facts are found from the paths the filter reads, so filters returning
+# fields count too; "*" (the whole document) means every active fact.
+# Filters that build new values fall back to the facts in the output.
+if [ "${PARA_MEMORY_TRACK_ACCESS:-1}" != "0" ]; then
+    IDS=$(printf '%s\n' "$DATA" | jq -r '. as $doc | [path('"$FILTER"')]
+        | if any(.[]; length < 2 and (.[0] // "items") == "items") then "*"
+          else [.[] | select(.[0] == "items") as $p
+                | first(range(2; $p | length + 1) as $n | $doc | getpath($p[0:$n])
+                        | objects | select(has("id") and has("fact")))
+                | select(.status == "active") | .id] | unique | .[] end' 2>/dev/null) \
+    || IDS=$(printf '%s\n' "$RESULT" | jq -rs --argjson active "$(printf '%s\n' "$DATA" \
+            | jq -c '[.items[] | select(.status == "active") | .id]')" \
+        '[.. | objects | select(has("id") and has("fact")) | .id | select(IN($active[]))] | unique | .[]' 2>/dev/null) \
+    || IDS=""
+    if [ "$IDS" = "*" ]; then
+        python3 "$ACCESS_LOG" record "${ENTITY_PATH%/}" --base "$MEMORY_ROOT/knowledge" || true
+    elif [ -n "$IDS" ]; then
+        mapfile -t FACT_IDS <<< "$IDS"
+        python3 "$ACCESS_LOG" record "${ENTITY_PATH%/}" "${FACT_IDS[@]}" --base "$MEMORY_ROOT/knowledge" || true
+    fi
+fi
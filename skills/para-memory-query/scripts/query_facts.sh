@@ -0,0 +1,19 @@
+#!/bin/bash
+# Query facts across all entities using the SQLite fact index
+
+set -e
+
+MEMORY_ROOT="${PARA_MEMORY_ROOT:-$HOME/para-memory}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+FACT_INDEX="$SCRIPT_DIR/../../para-memory/scripts/fact_index.py"
+
+if [ $# -eq 0 ]; then
+    echo "Usage: $0 [--entity PREFIX] [--category C] [--status S] [--related ENTITY]"
+    echo "          [--since DATE] [--until DATE] [--text QUERY] [--limit N] [--json]"
+    echo "Example: $0 --category status --status active"
+    echo "Example: $0 --related companies/acme"
+    echo "Example: $0 --entity areas/people --text \"promoted\""
+    exit 1
+fi
+
+python3 "$FACT_INDEX" query "$MEMORY_ROOT/knowledge" "$@"
@@ -1,52 +1,38 @@
 #!/bin/bash
-# Search daily notes by date range or keyword
+# Search daily notes by date range or keyword using the timeline index
 
 set -e
 
 MEMORY_ROOT="${PARA_MEMORY_ROOT:-$HOME/para-memory}"
 DAILY_NOTES_DIR="$MEMORY_ROOT/memory"  # Assuming memory/ is sibling to knowledge/
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+TIMELINE_INDEX="$SCRIPT_DIR/../../para-memory/scripts/timeline_index.py"
 
 MODE="$1"
-shift
+shift || true
 
+# The index (memory/.timeline.db) is created on first use and only
+# re-reads notes that changed since the last query
 case "$MODE" in
     date)
-        # Search by specific date
-        DATE="$1"
-        FILE="$DAILY_NOTES_DIR/$DATE.md"
-        if [ -f "$FILE" ]; then
-            cat "$FILE"
-        else
-            echo "No notes found for date: $DATE"
-            exit 1
-        fi
+        # Notes for one date: the daily note and that day's session files, in full
+        python3 "$TIMELINE_INDEX" date "$1" "$DAILY_NOTES_DIR"
         ;;
     range)
-        # Search by date range
-        START_DATE="$1"
-        END_DATE="$2"
-        echo "Searching notes from $START_DATE to $END_DATE..."
-        for file in "$DAILY_NOTES_DIR"/*.md; do
-            filename=$(basename "$file" .md)
-            if [[ ("$filename" > "$START_DATE" || "$filename" = "$START_DATE") && ("$filename" < "$END_DATE" || "$filename" = "$END_DATE") ]]; then
-                echo "=== $filename ==="
-                cat "$file"
-                echo ""
-            fi
-        done
+        # Notes in a date range, one preview each (--full for whole notes)
+        python3 "$TIMELINE_INDEX" range "$1" "$2" "$DAILY_NOTES_DIR" "${@:3}"
         ;;
     keyword)
-        # Search by keyword across all daily notes
-        KEYWORD="$1"
-        echo "Searching for keyword: $KEYWORD"
-        grep -r "$KEYWORD" "$DAILY_NOTES_DIR" --include="*.md" -n
+        # Matching paragraphs across all notes, newest first, as path:line: snippet
+        python3 "$TIMELINE_INDEX" keyword "$1" "$DAILY_NOTES_DIR" "${@:2}"
         ;;
     *)
         echo "Usage: $0 <mode> [args]"
         echo "Modes:"
-        echo "  date <YYYY-MM-DD>              - Show notes for specific date"
-        echo "  range <start-date> <end-date>  - Show notes in date range"
-        echo "  keyword <term>                 - Search for keyword across all notes"
+        echo "  date <YYYY-MM-DD>                      - Show notes for specific date"
+        echo "  range <start-date> <end-date> [--full] - Preview notes in date range"
+        echo "  keyword <term> [--since D] [--until D] [--limit N]"
+        echo "                                         - Search for keyword across all notes"
         exit 1
         ;;
 esac
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Record fact accesses cheaply and fold them into items.json in bulk.
+
+Query tools append one JSON line per lookup to <knowledge>/.access.log.jsonl:
+  {"entity": "areas/people/jane", "ids": ["jane-001", ...], "at": "2026-02-07"}
+"ids" may be null to mean every active fact of the entity. Only active facts
+are recorded and bumped: superseded ones no longer decay. Reads never touch
+items.json; weekly_synthesis.py (or `fold` below) folds the log into each
+entity's lastAccessed/accessCount once per run, rewriting every touched
+entity a single time.
+
+Set PARA_MEMORY_TRACK_ACCESS=0 to stop recording.
+
+Usage: python access_log.py record <entity> [fact_id ...] [--base PATH]
+       python access_log.py fold [base_path]
+
+If base_path is not provided, uses PARA_MEMORY_ROOT environment variable.
+If environment variable not set, defaults to ~/para-memory/knowledge.
+"""
+
+import os
+import sys
+import json
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import metrics
+from errors import EntityNotFound
+from fact_index import get_base_path, load_redirects, normalize_ref, resolve_ref
+
+
+ACCESS_LOG_NAME = ".access.log.jsonl"
+
+
+def tracking_enabled():
+    """Whether PARA_MEMORY_TRACK_ACCESS allows recording accesses."""
+    return os.environ.get("PARA_MEMORY_TRACK_ACCESS", "1") not in ("", "0")
+
+
+def record_accesses(base_path, accesses, when=None):
+    """Append access events for [(entity, fact_ids_or_None), ...] in one write.
+
+    Nothing is fsynced: losing the last few access events in a crash only
+    makes a fact look slightly colder.
+    """
+    if not tracking_enabled() or not accesses:
+        return
+    at = when or datetime.now().strftime("%Y-%m-%d")
+    lines = "".join(
+        json.dumps({"entity": normalize_ref(entity),
+                    "ids": sorted(set(ids)) if ids is not None else None,
+                    "at": at}, ensure_ascii=False) + "\n"
+        for entity, ids in accesses
+    )
+    with open(Path(base_path) / ACCESS_LOG_NAME, "a", encoding="utf-8") as f:
+        f.write(lines)
+
+
+def record_access(base_path, entity, fact_ids=None, when=None):
+    """Append a single access event (fact_ids=None: all active facts)."""
+    record_accesses(base_path, [(entity, fact_ids)], when)
+
+
+def accessed_facts(facts, entity=None):
+    """[(entity, fact_ids)] for the active facts a read returned, for record_accesses.
+
+    Facts are grouped by their "entity" key unless entity is given.
+    """
+    accessed = {}
+    for fact in facts:
+        if fact.get("status", "active") == "active":
+            accessed.setdefault(entity or fact["entity"], []).append(fact["id"])
+    return list(accessed.items())
+
+
+def aggregate(lines):
+    """Collapse access events into {entity: {fact_id_or_None: [count, latest]}}."""
+    totals = defaultdict(dict)
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # torn final write
+        if not isinstance(event, dict) or not event.get("entity") or not event.get("at"):
+            continue
+        ids = event.get("ids")
+        for fact_id in (ids if isinstance(ids, list) else [None]):
+            entry = totals[normalize_ref(event["entity"])].setdefault(fact_id, [0, ""])
+            entry[0] += 1
+            entry[1] = max(entry[1], event["at"])
+    return totals
+
+
+def merge_accesses(first, second):
+    """Combine two {fact_id_or_None: [count, latest]} maps from aggregate."""
+    merged = {key: list(entry) for key, entry in first.items()}
+    for key, (count, latest) in second.items():
+        entry = merged.setdefault(key, [0, ""])
+        entry[0] += count
+        entry[1] = max(entry[1], latest)
+    return merged
+
+
+def apply_accesses(data, accesses):
+    """Bump accessCount/lastAccessed of active facts on loaded items.json data.
+
+    Returns the number of facts touched.
+    """
+    touched = 0
+    everything = accesses.get(None)
+    for item in data["items"]:
+        if item.get("status", "active") != "active":
+            continue
+        hits = [hit for hit in (accesses.get(item.get("id")), everything) if hit]
+        if not hits:
+            continue
+        item["accessCount"] = (item.get("accessCount") or 0) + sum(count for count, _ in hits)
+        latest = max(at for _, at in hits)
+        if latest > (item.get("lastAccessed") or ""):
+            item["lastAccessed"] = latest
+        touched += 1
+    return touched
+
+
+def fold(base_path):
+    """Fold the access log into items.json. Returns (events, entities updated).
+
+    The log is renamed aside first so concurrent readers keep appending to a
+    fresh file; a leftover from an interrupted fold is picked up next time.
+    """
+    from update_entity import load_items, locked_entity, update_fact_index, write_items
+    from fact_index import fingerprint
+
+    base_path = Path(base_path)
+    log_path = base_path / ACCESS_LOG_NAME
+    folding_path = base_path / (ACCESS_LOG_NAME + ".folding")
+
+    if log_path.exists():
+        if folding_path.exists():
+            with open(folding_path, "a", encoding="utf-8") as dst:
+                dst.write(log_path.read_text(encoding="utf-8"))
+            log_path.unlink()
+        else:
+            os.replace(log_path, folding_path)
+    if not folding_path.exists():
+        return 0, 0
+
+    lines = folding_path.read_text(encoding="utf-8").splitlines()
+    totals = aggregate(lines)
+
+    # Accesses recorded before an entity was archived follow it there
+    redirects = load_redirects(base_path)
+    merged = {}
+    for entity, accesses in totals.items():
+        if redirects and not (base_path / entity / "items.json").exists():
+            entity = resolve_ref(entity, redirects)
+        if entity in merged:
+            merged[entity] = merge_accesses(merged[entity], accesses)
+        else:
+            merged[entity] = accesses
+
+    updated = 0
+    for entity, accesses in sorted(merged.items()):
+        try:
+            with locked_entity(base_path / entity) as entity_path:
+                previous = fingerprint(entity_path)
+                data = load_items(entity_path)
+                if apply_accesses(data, accesses):
+                    write_items(entity_path, data)
+                    update_fact_index(entity_path, data, None, previous)
+                    updated += 1
+        except EntityNotFound:
+            continue  # entity was removed since
+
+    folding_path.unlink()
+    return len(lines), updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record fact accesses and fold them into items.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Append an access event")
+    rec.add_argument("entity", help="Entity path or reference, e.g. people/jane-doe")
+    rec.add_argument("fact_ids", nargs="*", help="Facts accessed (default: all active facts)")
+    rec.add_argument("--base", dest="base_path", help="Knowledge graph root")
+
+    fold_cmd = sub.add_parser("fold", help="Fold the access log into items.json")
+    fold_cmd.add_argument("base_path", nargs="?", help="Knowledge graph root")
+
+    for command in sub.choices.values():
+        metrics.add_arguments(command)
+
+    args = parser.parse_args()
+    metrics.configure(args.metrics, args.profile)
+    base_path = get_base_path(args.base_path)
+    if not base_path.exists():
+        print(f"Error: Path not found: {base_path}")
+        sys.exit(1)
+
+    if args.command == "record":
+        record_access(base_path, args.entity, args.fact_ids or None)
+        return
+
+    with metrics.phase("fold"):
+        events, updated = fold(base_path)
+    metrics.count("accessEvents", events)
+    print(f"✓ Folded {events} access events into {updated} entities")
+
+
+if __name__ == "__main__":
+    metrics.run_main("access_log", main)
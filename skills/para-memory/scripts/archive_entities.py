@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Move cold entities into archives/ so everyday runs only touch the hot set.
+
+An entity is cold when it has active facts and every one of them classifies
+as cold under weekly_synthesis.py's decay settings (recorded accesses are
+folded in first). Archiving moves the entity directory, unchanged, from
+<knowledge>/<key> to <knowledge>/archives/<key> and records the move in the
+redirect table <knowledge>/.redirects.json ({old key: new key}). References
+to a moved entity in relatedEntities (items.json and history shards) are
+rewritten to the new key; anything else that still uses the old reference
+(query arguments, the memory daemon, the access log, writers that were
+waiting on the entity's lock during the move) is resolved through the table.
+
+weekly_synthesis.py and fact_index.py skip archives/ unless asked to
+include it, so archived entities stay readable with query_entity.sh and
+update_entity.py but cost nothing per run. `restore` moves an entity back
+(for example after it becomes relevant again) and redirects its archived
+key to the original one.
+
+Usage: python archive_entities.py archive [base_path] [--dry-run]
+       python archive_entities.py restore <entity> [base_path]
+       python archive_entities.py redirects [base_path]
+
+If base_path is not provided, uses PARA_MEMORY_ROOT environment variable.
+If environment variable not set, defaults to ~/para-memory/knowledge.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+
+import metrics
+from entity_catalog import move_record
+from errors import EntityExists, EntityNotFound, ParaMemoryError
+from fact_index import (
+    INDEX_NAME, REDIRECTS_NAME, _delete_entity, connect, entity_dirs, fingerprint,
+    get_base_path, has_fts, load_redirects, normalize_ref, resolve_ref, short_ref,
+)
+from storage import ARCHIVE_DIR, atomic_write_text, entity_lock, is_archived
+from update_entity import (
+    HISTORY_DIR, LOG_NAME, decode_items, load_items, update_catalog, update_fact_index,
+    write_format, write_items, write_items_file,
+)
+
+
+def is_cold(data, settings=None):
+    """Whether an entity has active facts and all of them are cold."""
+    from weekly_synthesis import classify_fact
+
+    active = [f for f in data["items"] if f.get("status") == "active"]
+    return bool(active) and all(classify_fact(f, settings) == "cold" for f in active)
+
+
+def cold_entities(base_path, settings=None):
+    """Keys of the entities outside archives/ that archive would move."""
+    keys = []
+    for entity_path in entity_dirs(base_path):
+        if is_cold(load_items(entity_path), settings):
+            keys.append(entity_path.relative_to(base_path).as_posix())
+    return keys
+
+
+def save_redirects(base_path, redirects):
+    atomic_write_text(Path(base_path) / REDIRECTS_NAME,
+                      json.dumps(redirects, indent=2, sort_keys=True) + "\n")
+
+
+def add_redirect(redirects, old_key, new_key):
+    """Record old_key -> new_key, re-pointing redirects that led to old_key."""
+    for key, target in list(redirects.items()):
+        if target == old_key:
+            redirects[key] = new_key
+    redirects[old_key] = new_key
+    # new_key is a real entity again (e.g. after a restore), not a redirect
+    redirects.pop(new_key, None)
+
+
+def redirect_facts(facts, redirects):
+    """Point relatedEntities of facts at current keys. Returns facts changed."""
+    changed = 0
+    for fact in facts:
+        refs = fact.get("relatedEntities")
+        if not refs:
+            continue
+        new_refs = []
+        for ref in refs:
+            key = resolve_ref(ref, redirects)
+            new_refs.append(ref if key == normalize_ref(ref) else short_ref(key))
+        if new_refs != refs:
+            fact["relatedEntities"] = new_refs
+            changed += 1
+    return changed
+
+
+def mentions(entity_path, needles):
+    """Cheap pre-check: whether any fact file of an entity contains a needle."""
+    paths = [entity_path / "items.json", entity_path / LOG_NAME]
+    paths += sorted((entity_path / HISTORY_DIR).glob("*.json"))
+    for path in paths:
+        if path.exists():
+            raw = path.read_bytes()
+            if any(needle in raw for needle in needles):
+                return True
+    return False
+
+
+def rewrite_references(entity_path, redirects):
+    """Rewrite an entity's relatedEntities through redirects. Returns facts changed."""
+    with entity_lock(entity_path):
+        previous = fingerprint(entity_path)
+        data = load_items(entity_path)
+        changed = redirect_facts(data["items"], redirects)
+        if changed:
+            write_items(entity_path, data)
+
+        history_path = entity_path / HISTORY_DIR
+        if history_path.is_dir():
+            fmt = write_format(entity_path / "items.json")
+            for shard_path in sorted(history_path.glob("*.json")):
+                shard = decode_items(shard_path.read_text(encoding="utf-8"))
+                shard_changed = redirect_facts(shard.get("items", []), redirects)
+                if shard_changed:
+                    write_items_file(shard_path, shard, fmt)
+                    changed += shard_changed
+
+        if changed:
+            update_fact_index(entity_path, data, None, previous)
+    return changed
+
+
+def rewrite_all_references(base_path, moved, redirects):
+    """Rewrite references to the moved keys across every entity, archives included.
+
+    Returns (entities, facts) rewritten.
+    """
+    needles = {key.rsplit("/", 1)[-1].encode("utf-8") for key in moved}
+    entities = facts = 0
+    for entity_path in entity_dirs(base_path, include_archived=True):
+        if not mentions(entity_path, needles):
+            continue
+        changed = rewrite_references(entity_path, redirects)
+        if changed:
+            entities += 1
+            facts += changed
+    return entities, facts
+
+
+def drop_from_index(base_path, key):
+    """Remove an entity key from the fact index, if one is built."""
+    db_path = Path(base_path) / INDEX_NAME
+    if not db_path.exists():
+        return
+    conn = connect(db_path)
+    try:
+        with conn:
+            _delete_entity(conn, key, has_fts(conn))
+    except sqlite3.Error as e:
+        print(f"Warning: fact index not updated ({e}); run fact_index.py sync", file=sys.stderr)
+    finally:
+        conn.close()
+
+
+def move_entity(base_path, old_key, new_key, redirects):
+    """Move an entity directory to a new key and record the redirect.
+
+    Raises EntityNotFound or EntityExists. redirects is updated and saved
+    before the entity's lock is released.
+    """
+    base_path = Path(base_path)
+    source = base_path / old_key
+    target = base_path / new_key
+    if not (source / "items.json").exists():
+        raise EntityNotFound(f"Entity not found: {old_key}")
+    if target.exists():
+        raise EntityExists(f"Destination already exists: {target}")
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Hold the entity lock so no writer is half-way through a write when
+    # the directory moves; the lock file moves with it, and writers waiting
+    # on it follow the redirect (see update_entity.locked_entity), so it
+    # must be on disk before they wake up. Writers that find the directory
+    # already gone wait on the knowledge directory's lock for it instead
+    with entity_lock(source), entity_lock(base_path):
+        os.rename(source, target)
+        add_redirect(redirects, old_key, new_key)
+        save_redirects(base_path, redirects)
+
+    drop_from_index(base_path, old_key)
+    move_record(base_path, old_key, new_key)
+    data = load_items(target)
+    # Indexed again only if the index covers this side of archives/
+    update_fact_index(target, data)
+    update_catalog(target, data)
+
+
+def archive_cold(base_path, settings=None, dry_run=False):
+    """Archive every cold entity. Returns the list of keys archived (or to be)."""
+    from access_log import fold as fold_access_log
+
+    base_path = Path(base_path)
+    if not dry_run:
+        # Recent accesses can make an entity warm again
+        fold_access_log(base_path)
+    with metrics.phase("classify"):
+        keys = cold_entities(base_path, settings)
+    if dry_run or not keys:
+        return keys
+
+    redirects = load_redirects(base_path)
+    with metrics.phase("move"):
+        for key in keys:
+            move_entity(base_path, key, f"{ARCHIVE_DIR}/{key}", redirects)
+    with metrics.phase("rewrite"):
+        rewrite_all_references(base_path, keys, redirects)
+    metrics.count("entitiesArchived", len(keys))
+    return keys
+
+
+def restore(base_path, ref):
+    """Move an archived entity back to its original key. Returns that key."""
+    base_path = Path(base_path)
+    redirects = load_redirects(base_path)
+    key = resolve_ref(ref, redirects)
+    if not is_archived(key):
+        raise ParaMemoryError(f"Entity is not archived: {key}")
+    original = key[len(ARCHIVE_DIR) + 1:]
+
+    move_entity(base_path, key, original, redirects)
+    rewrite_all_references(base_path, [key], redirects)
+    return original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive cold entities into archives/")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    archive = sub.add_parser("archive", help="Move every cold entity into archives/")
+    archive.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    archive.add_argument("--dry-run", action="store_true",
+                         help="List the entities that would be archived")
+
+    restore_cmd = sub.add_parser("restore", help="Move an archived entity back")
+    restore_cmd.add_argument("entity", help="Archived entity key or its old reference")
+    restore_cmd.add_argument("base_path", nargs="?", help="Knowledge graph root")
+
+    show = sub.add_parser("redirects", help="Print the redirect table")
+    show.add_argument("base_path", nargs="?", help="Knowledge graph root")
+
+    for command in sub.choices.values():
+        metrics.add_arguments(command)
+
+    args = parser.parse_args()
+    metrics.configure(args.metrics, args.profile)
+    base_path = get_base_path(args.base_path)
+    if not base_path.exists():
+        print(f"Error: Path not found: {base_path}")
+        sys.exit(1)
+
+    if args.command == "redirects":
+        for old_key, new_key in sorted(load_redirects(base_path).items()):
+            print(f"{old_key} -> {new_key}")
+        return
+
+    try:
+        if args.command == "restore":
+            key = restore(base_path, args.entity)
+            print(f"✓ Restored {key}")
+            return
+
+        keys = archive_cold(base_path, dry_run=args.dry_run)
+    except ParaMemoryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    for key in keys:
+        print(f"  {'would archive' if args.dry_run else '✓ archived'} {key}")
+    if args.dry_run:
+        print(f"✓ {len(keys)} cold entities")
+    else:
+        print(f"✓ Archived {len(keys)} cold entities")
+
+
+if __name__ == "__main__":
+    metrics.run_main("archive_entities", main)
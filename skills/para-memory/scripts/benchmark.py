@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the memory scripts on synthetic data.
+
+Generators build a realistic PARA tree (entities across projects/areas/
+resources with supersede chains and relatedEntities, daily notes and session
+files) and multi-megabyte Claude Code or Cursor JSONL transcripts. Data is
+derived from --seed only, so runs with the same parameters are comparable.
+
+`run` generates a tree in a temporary directory and times:
+  add_fact, add_fact_append_log, supersede_fact   in-process, per operation
+  synthesis_full, synthesis_incremental           weekly_synthesis.py --skip-qmd
+  transcript_parse_claude, transcript_parse_cursor
+  hook_incremental                                hook run after one new turn
+  timeline_build, timeline_range, timeline_keyword
+
+Results are printed (or written with --output) as one JSON document, with
+the parameters and environment, for comparison across runs with `compare`.
+
+Usage: python benchmark.py run [--entities N] [--facts M] [--days D] [--sessions S]
+                           [--transcript-mb X] [--ops K] [--repeat R]
+                           [--only NAME,...] [--output FILE] [--seed N]
+       python benchmark.py generate <para_root> [--entities N] [--facts M] [--days D]
+                           [--sessions S] [--seed N]
+       python benchmark.py transcript <file> [--size-mb X] [--format claude|cursor] [--seed N]
+       python benchmark.py compare <baseline.json> <current.json>
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import contextlib
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import save_chat_history
+import timeline_index
+from create_entity import create_entity
+from fact_index import normalize_ref
+from update_entity import add_fact, load_items, supersede_fact, write_items
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+CATEGORY_WEIGHTS = {"projects": 0.3, "people": 0.35, "companies": 0.2, "resources": 0.15}
+FACT_CATEGORIES = ["relationship", "milestone", "status", "preference", "context"]
+TOOLS = ["Read", "Edit", "Write", "Bash", "Grep", "Glob"]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "xe", "zu", "dra", "pel",
+             "qua", "ster", "bin", "cor", "fen", "gal", "hux", "jor"]
+
+DEFAULTS = {"entities": 200, "facts": 50, "days": 90, "sessions": 2, "seed": 42,
+            "transcript_mb": 5.0, "ops": 100, "repeat": 5}
+
+
+def make_vocabulary(rng, size=400):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))))
+    return sorted(words)
+
+
+def sentence(rng, vocabulary, length):
+    return " ".join(rng.choice(vocabulary) for _ in range(length)).capitalize() + "."
+
+
+def generate_graph(root, entities=200, facts=50, days=90, sessions=2, seed=42):
+    """Build a synthetic PARA tree under root. Returns the entity short refs."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    root = Path(root)
+    knowledge = root / "knowledge"
+    today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    categories = rng.choices(list(CATEGORY_WEIGHTS), weights=list(CATEGORY_WEIGHTS.values()),
+                             k=entities)
+    specs = [(category, f"{rng.choice(vocabulary)}-{i}") for i, category in enumerate(categories)]
+    refs = [f"{category}/{name}" for category, name in specs]
+
+    for category, name in specs:
+        entity_path, _ = create_entity(knowledge, category, name)
+        data = load_items(entity_path)
+        active = {}  # category -> index of its current fact
+        for n in range(1, facts + 1):
+            when = today - timedelta(days=days * (facts - n) / max(facts, 1))
+            fact_category = rng.choice(FACT_CATEGORIES)
+            last_accessed = when + timedelta(days=rng.uniform(0, (today - when).days))
+            fact = {
+                "id": f"{name}-{n:03d}",
+                "fact": sentence(rng, vocabulary, rng.randint(6, 18)),
+                "category": fact_category,
+                "timestamp": when.strftime("%Y-%m-%d"),
+                "source": when.strftime("%Y-%m-%d"),
+                "status": "active",
+                "supersededBy": None,
+                "relatedEntities": rng.sample(refs, k=min(len(refs), rng.choice([0, 0, 1, 1, 2, 3]))),
+                "lastAccessed": last_accessed.strftime("%Y-%m-%d"),
+                "accessCount": int(rng.expovariate(0.3)),
+            }
+            # About a third of facts replace the previous one in their category
+            if fact_category in active and rng.random() < 0.35:
+                old = data["items"][active[fact_category]]
+                old["status"] = "superseded"
+                old["supersededBy"] = fact["id"]
+            active[fact_category] = len(data["items"])
+            data["items"].append(fact)
+        data["factCounter"] = facts
+        write_items(entity_path, data)
+
+    memory = root / "memory"
+    memory.mkdir(parents=True, exist_ok=True)
+    for d in range(days):
+        day = (today - timedelta(days=days - 1 - d)).strftime("%Y-%m-%d")
+        paragraphs = [f"# {day}"]
+        for _ in range(rng.randint(3, 8)):
+            mentioned = rng.sample(refs, k=min(len(refs), 2))
+            see = f" See {', '.join(mentioned)}." if mentioned else ""
+            paragraphs.append(f"- {sentence(rng, vocabulary, 14)}{see}")
+        (memory / f"{day}.md").write_text("\n\n".join(paragraphs) + "\n", encoding="utf-8")
+        for _ in range(sessions):
+            short_id = f"{rng.getrandbits(32):08x}"
+            turns = [f"# Session: {day}\n**Date:** {day}\n**Session ID:** {short_id}"]
+            for _ in range(rng.randint(10, 40)):
+                turns.append(f"**User**: {sentence(rng, vocabulary, rng.randint(5, 30))}")
+                turns.append("**Assistant**: " + " ".join(
+                    sentence(rng, vocabulary, rng.randint(8, 20)) for _ in range(rng.randint(1, 6))))
+            (memory / f"{day}-{short_id}-session.md").write_text("\n\n".join(turns) + "\n",
+                                                                  encoding="utf-8")
+    return refs
+
+
+def transcript_turn(rng, vocabulary, fmt, session_id, n):
+    """JSONL lines for one user/assistant exchange with tool calls."""
+    user_text = sentence(rng, vocabulary, rng.randint(5, 40))
+    reply = " ".join(sentence(rng, vocabulary, rng.randint(8, 24)) for _ in range(rng.randint(2, 10)))
+    if fmt == "cursor":
+        lines = [{"role": "user", "content": user_text},
+                 {"role": "assistant", "content": [{"type": "text", "text": reply}]}]
+        return [json.dumps(line) for line in lines]
+
+    common = {"sessionId": session_id, "cwd": "/home/user/project", "slug": "bench-session"}
+    lines = [{"type": "user", **common, "message": {"role": "user", "content": user_text}}]
+    # Streaming: the assistant message is re-sent as it grows
+    words = reply.split()
+    for cut in (len(words) // 3, 2 * len(words) // 3, len(words)):
+        lines.append({"type": "assistant", **common, "message": {
+            "role": "assistant", "content": [{"type": "text", "text": " ".join(words[:cut])}]}})
+    for _ in range(rng.randint(0, 4)):
+        tool = rng.choice(TOOLS)
+        lines.append({"type": "assistant", **common, "message": {"role": "assistant", "content": [
+            {"type": "tool_use", "id": f"tool-{n}", "name": tool,
+             "input": {"file_path": f"/home/user/project/src/{rng.choice(vocabulary)}.py"}}]}})
+        # Tool output dominates real transcripts' size
+        output = "\n".join(sentence(rng, vocabulary, 12) for _ in range(rng.randint(5, 120)))
+        lines.append({"type": "user", **common, "message": {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": f"tool-{n}", "content": output}]}})
+    return [json.dumps(line) for line in lines]
+
+
+def generate_transcript(path, size_mb=5.0, fmt="claude", seed=42):
+    """Write a JSONL transcript of at least size_mb megabytes. Returns the turn count."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    session_id = f"{rng.getrandbits(128):032x}"
+    target = int(size_mb * 1024 * 1024)
+    written = turns = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            chunk = "".join(line + "\n" for line in transcript_turn(rng, vocabulary, fmt, session_id, turns))
+            f.write(chunk)
+            written += len(chunk.encode("utf-8"))
+            turns += 1
+    return turns
+
+
+def timed(samples, fn):
+    start = time.perf_counter()
+    fn()
+    samples.append((time.perf_counter() - start) * 1000)
+
+
+def summarize(samples, ops=1):
+    median = statistics.median(samples)
+    return {
+        "runs": len(samples),
+        "ops": ops,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(median, 3),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "per_op_ms": round(median / ops, 4),
+    }
+
+
+def new_fact(rng, vocabulary):
+    return {"fact": sentence(rng, vocabulary, 12), "category": rng.choice(FACT_CATEGORIES),
+            "timestamp": datetime.now().strftime("%Y-%m-%d"), "source": "benchmark"}
+
+
+def run_synthesis(root, full):
+    cmd = [sys.executable, str(SCRIPTS_DIR / "weekly_synthesis.py"), str(root), "--skip-qmd"]
+    if full:
+        cmd.append("--full")
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+
+
+def bench_writes(root, refs, args, rng, vocabulary, results, selected):
+    entity = root / "knowledge" / normalize_ref(refs[0])
+
+    for name, append in (("add_fact", False), ("add_fact_append_log", True)):
+        if name in selected:
+            samples = []
+            for _ in range(args.repeat):
+                facts = [new_fact(rng, vocabulary) for _ in range(args.ops)]
+                timed(samples, lambda: [add_fact(entity, f, append) for f in facts])
+            results[name] = summarize(samples, args.ops)
+
+    if "supersede_fact" in selected:
+        samples = []
+        for _ in range(args.repeat):
+            active = [f["id"] for f in load_items(entity)["items"] if f["status"] == "active"]
+            targets = rng.sample(active, k=min(args.ops, len(active)))
+            facts = [new_fact(rng, vocabulary) for _ in targets]
+            timed(samples, lambda: [supersede_fact(entity, old, f, False)
+                                    for old, f in zip(targets, facts)])
+        results["supersede_fact"] = summarize(samples, len(targets))
+
+
+def bench_synthesis(root, refs, args, rng, vocabulary, results, selected):
+    if "synthesis_full" in selected:
+        samples = []
+        for _ in range(args.repeat):
+            timed(samples, lambda: run_synthesis(root, True))
+        results["synthesis_full"] = summarize(samples)
+
+    if "synthesis_incremental" in selected:
+        run_synthesis(root, False)
+        knowledge = root / "knowledge"
+        entities = sorted(p.parent for p in knowledge.rglob("items.json"))
+        samples = []
+        for _ in range(args.repeat):
+            # About 1% of entities change between runs
+            for entity in rng.sample(entities, k=max(1, len(entities) // 100)):
+                add_fact(entity, new_fact(rng, vocabulary), False)
+            timed(samples, lambda: run_synthesis(root, False))
+        results["synthesis_incremental"] = summarize(samples)
+
+
+def bench_transcripts(root, args, rng, vocabulary, results, selected):
+    for fmt in ("claude", "cursor"):
+        name = f"transcript_parse_{fmt}"
+        if name in selected:
+            path = root / f"transcript-{fmt}.jsonl"
+            generate_transcript(path, args.transcript_mb, fmt, args.seed)
+            samples = []
+            for _ in range(args.repeat):
+                timed(samples, lambda: save_chat_history.parse_transcript(str(path)))
+            results[name] = {**summarize(samples), "bytes": path.stat().st_size}
+
+    if "hook_incremental" in selected:
+        path = root / "transcript-hook.jsonl"
+        generate_transcript(path, args.transcript_mb, "claude", args.seed)
+        samples = []
+        # The hook reports each write on stderr
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+            save_chat_history.run(str(path))  # initial full write, not timed
+            for n in range(args.repeat):
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(line + "\n" for line in transcript_turn(rng, vocabulary, "claude", "bench", n))
+                timed(samples, lambda: save_chat_history.run(str(path)))
+        results["hook_incremental"] = {**summarize(samples), "bytes": path.stat().st_size}
+
+
+def bench_timeline(root, args, rng, vocabulary, results, selected):
+    memory = root / "memory"
+    db_path = memory / timeline_index.INDEX_NAME
+
+    if "timeline_build" in selected:
+        samples = []
+        for _ in range(args.repeat):
+            db_path.unlink(missing_ok=True)
+            timed(samples, lambda: timeline_index.open_index(memory).close())
+        results["timeline_build"] = summarize(samples)
+
+    conn = timeline_index.open_index(memory)
+    try:
+        dates = sorted({row[0] for row in conn.execute("SELECT date FROM notes WHERE date IS NOT NULL")})
+        if "timeline_range" in selected and dates:
+            samples = []
+            for _ in range(args.repeat):
+                starts = [rng.randrange(len(dates)) for _ in range(args.ops)]
+                timed(samples, lambda: [timeline_index.notes_in_range(
+                    conn, dates[s], dates[min(len(dates) - 1, s + 7)]) for s in starts])
+            results["timeline_range"] = summarize(samples, args.ops)
+        if "timeline_keyword" in selected:
+            samples = []
+            for _ in range(args.repeat):
+                terms = [rng.choice(vocabulary) for _ in range(args.ops)]
+                timed(samples, lambda: [timeline_index.search(conn, t) for t in terms])
+            results["timeline_keyword"] = summarize(samples, args.ops)
+    finally:
+        conn.close()
+
+
+BENCHMARKS = [
+    "add_fact", "add_fact_append_log", "supersede_fact",
+    "synthesis_full", "synthesis_incremental",
+    "transcript_parse_claude", "transcript_parse_cursor", "hook_incremental",
+    "timeline_build", "timeline_range", "timeline_keyword",
+]
+
+
+def run(args):
+    """Generate data in a temp dir and run the selected benchmarks. Returns the report."""
+    selected = set(args.only.split(",")) if args.only else set(BENCHMARKS)
+    unknown = selected - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(random.Random(args.seed))
+    results = {}
+    saved_env = {k: os.environ.get(k) for k in ("PARA_MEMORY_ROOT", "PARA_MEMORY_APPEND_LOG")}
+    tmp = Path(tempfile.mkdtemp(prefix="para-bench-"))
+    try:
+        root = tmp / "para"
+        os.environ["PARA_MEMORY_ROOT"] = str(root)
+        os.environ.pop("PARA_MEMORY_APPEND_LOG", None)
+
+        print(f"Generating {args.entities} entities x {args.facts} facts...", file=sys.stderr)
+        start = time.perf_counter()
+        refs = generate_graph(root, args.entities, args.facts, args.days, args.sessions, args.seed)
+        generate_ms = (time.perf_counter() - start) * 1000
+
+        for stage in (bench_writes, bench_synthesis):
+            print(f"Running {stage.__name__[6:]}...", file=sys.stderr)
+            stage(root, refs, args, rng, vocabulary, results, selected)
+        for stage in (bench_transcripts, bench_timeline):
+            print(f"Running {stage.__name__[6:]}...", file=sys.stderr)
+            stage(root, args, rng, vocabulary, results, selected)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: getattr(args, k) for k in DEFAULTS},
+        "generate_ms": round(generate_ms, 1),
+        "results": {name: results[name] for name in BENCHMARKS if name in results},
+    }
+
+
+def compare(baseline, current):
+    """Print per-operation median times and their ratio (current / baseline)."""
+    if baseline.get("params") != current.get("params"):
+        print("Warning: runs used different parameters", file=sys.stderr)
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name:26} {result['per_op_ms']:>10.3f} ms/op   (new)")
+            continue
+        ratio = result["per_op_ms"] / before["per_op_ms"] if before["per_op_ms"] else float("inf")
+        print(f"{name:26} {before['per_op_ms']:>10.3f} -> {result['per_op_ms']:>10.3f} ms/op   x{ratio:.2f}")
+
+
+def add_graph_args(parser):
+    parser.add_argument("--entities", type=int, default=DEFAULTS["entities"], metavar="N")
+    parser.add_argument("--facts", type=int, default=DEFAULTS["facts"], metavar="M",
+                        help="Facts per entity, including superseded ones")
+    parser.add_argument("--days", type=int, default=DEFAULTS["days"], metavar="D",
+                        help="Days of history (facts and daily notes)")
+    parser.add_argument("--sessions", type=int, default=DEFAULTS["sessions"], metavar="S",
+                        help="Session files per day")
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory scripts on synthetic data")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    bench = sub.add_parser("run", help="Generate data and run benchmarks")
+    add_graph_args(bench)
+    bench.add_argument("--transcript-mb", type=float, default=DEFAULTS["transcript_mb"], metavar="X")
+    bench.add_argument("--ops", type=int, default=DEFAULTS["ops"], metavar="K",
+                       help="Operations per timed run for per-operation benchmarks")
+    bench.add_argument("--repeat", type=int, default=DEFAULTS["repeat"], metavar="R")
+    bench.add_argument("--only", metavar="NAME,...", help=f"Subset of: {', '.join(BENCHMARKS)}")
+    bench.add_argument("--output", metavar="FILE", help="Write the JSON report to FILE")
+
+    gen = sub.add_parser("generate", help="Generate a synthetic PARA tree")
+    gen.add_argument("para_root", help="Directory to create knowledge/ and memory/ in")
+    add_graph_args(gen)
+
+    tr = sub.add_parser("transcript", help="Generate a synthetic JSONL transcript")
+    tr.add_argument("file")
+    tr.add_argument("--size-mb", type=float, default=DEFAULTS["transcript_mb"], metavar="X")
+    tr.add_argument("--format", choices=["claude", "cursor"], default="claude")
+    tr.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+
+    cmp = sub.add_parser("compare", help="Compare two JSON reports")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        root = Path(os.path.expanduser(args.para_root))
+        if (root / "knowledge").exists():
+            print(f"Error: {root / 'knowledge'} already exists")
+            sys.exit(1)
+        refs = generate_graph(root, args.entities, args.facts, args.days, args.sessions, args.seed)
+        print(f"✓ Generated {len(refs)} entities and {args.days} days of notes in {root}")
+    elif args.command == "transcript":
+        turns = generate_transcript(args.file, args.size_mb, args.format, args.seed)
+        print(f"✓ Wrote {turns} turns to {args.file}")
+    elif args.command == "compare":
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            with open(args.current) as f:
+                current = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        compare(baseline, current)
+    else:
+        if min(args.entities, args.facts, args.ops, args.repeat) < 1:
+            parser.error("--entities, --facts, --ops and --repeat must be >= 1")
+        try:
+            report = run(args)
+        except (ValueError, subprocess.CalledProcessError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            Path(args.output).write_text(text + "\n")
+            print(f"✓ Wrote {args.output}", file=sys.stderr)
+        else:
+            print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,13 @@ If environment variable not set, defaults to ~/para-memory/knowledge.
 import sys
 import os
 from pathlib import Path
-import json
 from datetime import datetime
 
+import metrics
+from errors import EntityExists, InvalidCategory
+from storage import atomic_write_text, entity_lock
+from update_entity import update_catalog, update_fact_index, write_items_file
+
 
 def generate_entity_id(category, name):
     """Generate a unique entity ID."""
@@ -52,6 +56,7 @@ def create_items_json(entity_id):
         "entityId": entity_id,
         "created": datetime.now().isoformat(),
         "lastModified": datetime.now().isoformat(),
+        "factCounter": 0,
         "items": []
     }
 
@@ -61,7 +66,67 @@ def get_default_base_path():
     para_root = os.environ.get('PARA_MEMORY_ROOT', "~/para-memory")
     return os.path.expanduser(os.path.join(para_root, "knowledge"))
 
+CATEGORY_PATHS = {
+    "projects": "projects",
+    "people": "areas/people",
+    "companies": "areas/companies",
+    "resources": "resources"
+}
+
+
+def create_entity(base_path, category, name):
+    """Create an entity's directory, summary.md and items.json.
+
+    Missing files of an incomplete entity are filled in. Returns
+    (entity_path, repaired) where repaired lists the files that had to be
+    initialized in an existing directory. Raises InvalidCategory, or
+    EntityExists if the entity is already complete.
+    """
+    if category not in CATEGORY_PATHS:
+        raise InvalidCategory(f"Invalid category. Must be one of: {', '.join(CATEGORY_PATHS.keys())}")
+
+    # Create entity directory
+    clean_name = name.lower().replace(" ", "-")
+    entity_path = Path(base_path) / CATEGORY_PATHS[category] / clean_name
+
+    summary_file = entity_path / "summary.md"
+    items_file = entity_path / "items.json"
+
+    # Check if entity exists and is complete
+    repaired = []
+    if entity_path.exists():
+        # Check if directory is incomplete (missing required files)
+        if not summary_file.exists():
+            repaired.append("summary.md")
+        if not items_file.exists():
+            repaired.append("items.json")
+        if not repaired:
+            raise EntityExists(f"Entity already exists and is complete at {entity_path}")
+    else:
+        # Create new directory
+        entity_path.mkdir(parents=True, exist_ok=True)
+
+    # Create missing files under the entity lock so concurrent creators don't race
+    with entity_lock(entity_path):
+        # Create or update summary.md if missing
+        if not summary_file.exists():
+            summary_content = create_summary(name, category)
+            atomic_write_text(summary_file, summary_content)
+
+        # Create or update items.json if missing
+        if not items_file.exists():
+            entity_id = generate_entity_id(category, name)
+            items_data = create_items_json(entity_id)
+            write_items_file(items_file, items_data)
+            update_fact_index(entity_path, items_data)
+            update_catalog(entity_path, items_data)
+
+    return entity_path, repaired
+
+
 def main():
+    metrics.configure(*metrics.pop_arguments(sys.argv))
+
     # Handle 2 or 3 arguments
     if len(sys.argv) != 3 and len(sys.argv) != 4:
         print("Usage: python create_entity.py [base_path] <category> <name>")
@@ -83,61 +148,22 @@ def main():
     
     # Get resolved base path
     base_path = base_path if base_path else get_default_base_path()
-    base_path = Path(base_path)  # Convert to Path object
-
-    # Validate category
-    valid_categories = {
-        "projects": "projects",
-        "people": "areas/people",
-        "companies": "areas/companies",
-        "resources": "resources"
-    }
 
-    if category not in valid_categories:
-        print(f"Error: Invalid category. Must be one of: {', '.join(valid_categories.keys())}")
+    try:
+        entity_path, repaired = create_entity(base_path, category, name)
+    except InvalidCategory as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except EntityExists as e:
+        print(f"Error: {e}")
+        print(f"   Use update_entity.py to modify existing entity")
         sys.exit(1)
 
-    # Create entity directory
-    category_path = valid_categories[category]
-    clean_name = name.lower().replace(" ", "-")
-    entity_path = base_path / category_path / clean_name
-
-    summary_file = entity_path / "summary.md"
-    items_file = entity_path / "items.json"
-    
-    # Check if entity exists and is complete
-    if entity_path.exists():
-        # Check if directory is incomplete (missing required files)
-        missing_files = []
-        if not summary_file.exists():
-            missing_files.append("summary.md")
-        if not items_file.exists():
-            missing_files.append("items.json")
-        
-        if missing_files:
-            # Directory exists but is incomplete - initialize missing files
-            print(f"⚠️  Entity directory exists but is incomplete at {entity_path}")
-            print(f"   Missing files: {', '.join(missing_files)}")
-            print(f"   Initializing missing files...")
-        else:
-            # Directory is complete - refuse to overwrite
-            print(f"Error: Entity already exists and is complete at {entity_path}")
-            print(f"   Use update_entity.py to modify existing entity")
-            sys.exit(1)
-    else:
-        # Create new directory
-        entity_path.mkdir(parents=True, exist_ok=True)
-
-    # Create or update summary.md if missing
-    if not summary_file.exists():
-        summary_content = create_summary(name, category)
-        summary_file.write_text(summary_content)
-
-    # Create or update items.json if missing
-    if not items_file.exists():
-        entity_id = generate_entity_id(category, name)
-        items_data = create_items_json(entity_id)
-        items_file.write_text(json.dumps(items_data, indent=2, ensure_ascii=False))
+    if repaired:
+        # Directory existed but was incomplete - missing files were initialized
+        print(f"⚠️  Entity directory exists but is incomplete at {entity_path}")
+        print(f"   Missing files: {', '.join(repaired)}")
+        print(f"   Initialized missing files")
 
     print(f"✓ Created entity: {name}")
     print(f"  Location: {entity_path}")
@@ -147,4 +173,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    metrics.run_main("create_entity", main)
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Catalog of every entity in the knowledge graph, in one small JSON file.
+
+<knowledge>/.catalog.json holds one record per entity, keyed by entity path:
+  {"entities": {"areas/people/jane": {
+      "path": "areas/people/jane", "category": "people", "archived": false,
+      "entityId": "person-jane", "created": "...", "lastModified": "...",
+      "activeFacts": 12, "supersededFacts": 3, "historyFacts": 0,
+      "tiers": {"hot": 4, "warm": 5, "cold": 3}, "tiersAsOf": "2026-02-07"}}}
+
+Listing or filtering entities is then a single read instead of a walk over
+the tree, and weekly_synthesis.py plans its work from it. weekly_synthesis.py
+creates the catalog on its first run and records tier counts on every run.
+
+Once it exists, create_entity.py and update_entity.py append the changed
+entity's new record to the journal <knowledge>/.catalog.log.jsonl instead of
+rewriting the catalog, so a fact write costs one small append and takes no
+lock beyond the entity's own. Readers (`list`, weekly_synthesis.py, the
+para_memory package) replay the journal over the catalog; weekly_synthesis.py,
+archive_entities.py and `rebuild` fold it in under the knowledge directory's
+lock. Synthesis also re-reads the record of every entity whose facts changed,
+so a lost journal line is repaired by the next run. Entity directories
+removed by hand drop out on the next synthesis run, and ones created by hand
+are found by comparing directory mtimes (see find_new_entities); `rebuild`
+and weekly_synthesis.py --full walk the whole tree instead.
+
+Usage: python entity_catalog.py rebuild [base_path]
+       python entity_catalog.py list [base_path] [--category CATEGORY]
+                                 [--archived | --all] [--json]
+
+If base_path is not provided, uses PARA_MEMORY_ROOT environment variable.
+If environment variable not set, defaults to ~/para-memory/knowledge.
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import metrics
+from fact_index import entity_dirs, get_base_path
+from storage import ARCHIVE_DIR, atomic_write_text, entity_key, entity_lock, is_archived, knowledge_root
+
+
+CATALOG_NAME = ".catalog.json"
+JOURNAL_NAME = ".catalog.log.jsonl"
+FOLDING_NAME = JOURNAL_NAME + ".folding"
+TIERS = ("hot", "warm", "cold")
+
+
+def category_for(key):
+    """PARA category of an entity key: areas/people/jane -> people."""
+    parts = key.split("/")
+    if parts[0] == ARCHIVE_DIR and len(parts) > 1:
+        parts = parts[1:]
+    if parts[0] == "areas" and len(parts) > 2:
+        return parts[1]
+    return parts[0]
+
+
+def entity_record(key, data, history_facts=0):
+    """Catalog fields derived from an entity's items.json data."""
+    items = data.get("items", [])
+    active = sum(1 for f in items if f.get("status") == "active")
+    return {
+        "path": key,
+        "category": category_for(key),
+        "archived": is_archived(key),
+        "entityId": data.get("entityId"),
+        "created": data.get("created"),
+        "lastModified": data.get("lastModified"),
+        "activeFacts": active,
+        "supersededFacts": len(items) - active + history_facts,
+        "historyFacts": history_facts,
+    }
+
+
+def read_catalog(root):
+    """{entity key: record} from .catalog.json alone, or None if it has not been built."""
+    try:
+        catalog = json.loads((Path(root) / CATALOG_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    entities = catalog.get("entities") if isinstance(catalog, dict) else None
+    return entities if isinstance(entities, dict) else None
+
+
+def replay_journal(entities, path):
+    """Apply the records of a catalog journal file to entities, in order."""
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # torn final write
+        if not isinstance(record, dict) or not record.get("path"):
+            continue
+        previous = entities.get(record["path"]) or {}
+        if "historyFacts" not in record:
+            # Written without counting history shards: keep the known count
+            history = previous.get("historyFacts", 0)
+            record = {**record, "historyFacts": history,
+                      "supersededFacts": record.get("supersededFacts", 0) + history}
+        entities[record["path"]] = {**previous, **record}
+
+
+def load_catalog(root):
+    """{entity key: record} with the journal applied, or None if the catalog has not been built."""
+    entities = read_catalog(root)
+    if entities is not None:
+        replay_journal(entities, Path(root) / FOLDING_NAME)
+        replay_journal(entities, Path(root) / JOURNAL_NAME)
+    return entities
+
+
+def save_catalog(root, entities):
+    atomic_write_text(Path(root) / CATALOG_NAME,
+                      json.dumps({"entities": entities}, indent=1, sort_keys=True) + "\n")
+
+
+def edit_catalog(root, update, create=False):
+    """Fold the journal in and run update(entities) under the catalog lock.
+
+    The catalog is saved if update returns True or the journal had records.
+    The journal is renamed aside first so writers keep appending to a fresh
+    one; a leftover from an interrupted fold is picked up next time. Returns
+    False without calling update if there is no catalog and create is not set.
+    """
+    root = Path(root)
+    if not create and not (root / CATALOG_NAME).exists():
+        return False
+    with entity_lock(root):
+        entities = read_catalog(root)
+        if entities is None and not create:
+            return False
+        journal, folding = root / JOURNAL_NAME, root / FOLDING_NAME
+        if journal.exists():
+            if folding.exists():
+                with open(folding, "a", encoding="utf-8") as dst:
+                    dst.write(journal.read_text(encoding="utf-8"))
+                journal.unlink()
+            else:
+                os.replace(journal, folding)
+        folded = folding.exists()
+        if entities is None:
+            entities = {}
+        replay_journal(entities, folding)
+        if update(entities) or folded or not (root / CATALOG_NAME).exists():
+            save_catalog(root, entities)
+        if folded:
+            folding.unlink()
+    return True
+
+
+def catalog_entity(entity_path, data, history_facts=None):
+    """Journal one entity's record from data, if the catalog exists.
+
+    history_facts=None keeps the recorded number of facts in history shards.
+    Nothing is fsynced or locked: the line is a single small append, and a
+    lost one only leaves the record stale until the next synthesis run.
+    """
+    root = knowledge_root(entity_path)
+    if not (root / CATALOG_NAME).exists():
+        return False
+    key = entity_key(entity_path, root)
+    record = entity_record(key, data, history_facts or 0)
+    if history_facts is None:
+        del record["historyFacts"]
+    with open(root / JOURNAL_NAME, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return True
+
+
+def move_record(root, old_key, new_key):
+    """Re-key the record of an entity moved to new_key, if the catalog exists."""
+    def update(entities):
+        record = entities.pop(old_key, None)
+        if record is None:
+            return False
+        entities[new_key] = {**record, "path": new_key, "category": category_for(new_key),
+                             "archived": is_archived(new_key)}
+        return True
+
+    return edit_catalog(root, update)
+
+
+def load_record(root, entity_path):
+    """A full record for an entity on disk (tier counts left out)."""
+    from update_entity import load_history, load_items
+
+    key = Path(entity_path).relative_to(root).as_posix()
+    return entity_record(key, load_items(entity_path), len(load_history(entity_path)))
+
+
+def record_synthesis(root, tiers, refresh=(), walked=None, include_archived=False):
+    """Store a synthesis run's results in the catalog, creating it if needed.
+
+    tiers maps entity paths to (hot, warm, cold) counts. Entities in refresh
+    (and any not yet in the catalog) get their record rebuilt from disk, or
+    dropped if they are gone. walked, the set of entity keys a directory
+    walk found, drops records of entities no longer on disk; archived ones
+    are only dropped if the walk included archives/.
+    """
+    root = Path(root)
+    today = datetime.now().date().isoformat()
+
+    def update(entities):
+        for entity_path in refresh:
+            key = Path(entity_path).relative_to(root).as_posix()
+            if (Path(entity_path) / "items.json").exists():
+                entities[key] = {**entities.get(key, {}), **load_record(root, entity_path)}
+            else:
+                entities.pop(key, None)
+        if walked is not None:
+            for key in list(entities):
+                if key not in walked and (include_archived or not is_archived(key)):
+                    del entities[key]
+        for entity_path, counts in tiers.items():
+            key = Path(entity_path).relative_to(root).as_posix()
+            if key not in entities:
+                entities[key] = load_record(root, entity_path)
+            entities[key]["tiers"] = dict(zip(TIERS, counts))
+            entities[key]["tiersAsOf"] = today
+        return True
+
+    edit_catalog(root, update, create=True)
+
+
+def catalog_paths(root, entities, include_archived=False):
+    """Directories of the catalogued entities that still exist, in path order."""
+    root = Path(root)
+    paths = []
+    for key, record in entities.items():
+        if record.get("archived") and not include_archived:
+            continue
+        entity_path = root / key
+        if (entity_path / "items.json").exists():
+            paths.append(entity_path)
+    return sorted(paths)
+
+
+def find_new_entities(root, entities, dirs, include_archived=False):
+    """Entity directories created by hand since dirs was recorded.
+
+    dirs maps the keys of the directories entities live in (category
+    directories, and directories that are not entities yet) to their mtime.
+    Creating a directory changes its parent's mtime and creating items.json
+    changes the entity directory's, so only directories whose mtime changed
+    are listed and a run that finds nothing costs one stat per directory.
+    Returns (new entity paths, dirs to record for the next call).
+    """
+    root = Path(root)
+    pending = {""} | set(dirs)
+    for key in entities:
+        parts = key.split("/")
+        pending.update("/".join(parts[:i]) for i in range(1, len(parts)))
+    found, state, seen = [], {}, set()
+    while pending:
+        rel = pending.pop()
+        if rel in seen or rel in entities or (is_archived(rel) and not include_archived):
+            continue
+        seen.add(rel)
+        path = root / rel
+        try:
+            # Taken before listing, so an entry added in between is caught next time
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if dirs.get(rel) == mtime:
+            state[rel] = mtime
+            continue
+        if rel and (path / "items.json").exists():
+            found.append(path)
+            continue
+        state[rel] = mtime
+        with os.scandir(path) as children:
+            for child in children:
+                if not child.name.startswith(".") and child.is_dir():
+                    pending.add(f"{rel}/{child.name}" if rel else child.name)
+    return sorted(found), state
+
+
+def rebuild(root):
+    """Rebuild the catalog from the tree, archives included. Returns the entity count."""
+    from update_entity import load_history, load_items
+    from weekly_synthesis import classify_fact
+
+    root = Path(root)
+    today = datetime.now().date().isoformat()
+    records = {}
+    for entity_path in entity_dirs(root, include_archived=True):
+        key = entity_path.relative_to(root).as_posix()
+        data = load_items(entity_path)
+        counts = dict.fromkeys(TIERS, 0)
+        for fact in data["items"]:
+            if fact.get("status") == "active":
+                counts[classify_fact(fact)] += 1
+        records[key] = {**entity_record(key, data, len(load_history(entity_path))),
+                        "tiers": counts, "tiersAsOf": today}
+
+    def update(entities):
+        entities.clear()
+        entities.update(records)
+        return True
+
+    edit_catalog(root, update, create=True)
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog of all entities in the knowledge graph")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_cmd = sub.add_parser("rebuild", help="Rebuild the catalog from the tree")
+    rebuild_cmd.add_argument("base_path", nargs="?", help="Knowledge graph root")
+
+    list_cmd = sub.add_parser("list", help="List catalogued entities")
+    list_cmd.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    list_cmd.add_argument("--category", help="projects, people, companies or resources")
+    scope = list_cmd.add_mutually_exclusive_group()
+    scope.add_argument("--archived", action="store_true", help="Only archived entities")
+    scope.add_argument("--all", action="store_true", help="Include archived entities")
+    list_cmd.add_argument("--json", action="store_true", help="Print one JSON record per line")
+
+    for command in sub.choices.values():
+        metrics.add_arguments(command)
+
+    args = parser.parse_args()
+    metrics.configure(args.metrics, args.profile)
+    base_path = get_base_path(args.base_path)
+    if not base_path.exists():
+        print(f"Error: Path not found: {base_path}")
+        sys.exit(1)
+
+    if args.command == "rebuild":
+        with metrics.phase("rebuild"):
+            count = rebuild(base_path)
+        metrics.count("entities", count)
+        print(f"✓ Catalogued {count} entities")
+        return
+
+    entities = load_catalog(base_path)
+    if entities is None:
+        print(f"Error: Entity catalog not found at {base_path / CATALOG_NAME}")
+        print("   Build it with: python entity_catalog.py rebuild")
+        sys.exit(1)
+
+    for key, record in sorted(entities.items()):
+        if args.category and record.get("category") != args.category:
+            continue
+        if record.get("archived") != args.archived and not args.all:
+            continue
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False))
+            continue
+        tiers = record.get("tiers") or {}
+        print(f"{key}  {record.get('activeFacts', 0)} active, "
+              f"{record.get('supersededFacts', 0)} superseded  "
+              f"[{tiers.get('hot', 0)}/{tiers.get('warm', 0)}/{tiers.get('cold', 0)}]  "
+              f"{record.get('lastModified') or ''}")
+
+
+if __name__ == "__main__":
+    metrics.run_main("entity_catalog", main)
@@ -0,0 +1,32 @@
+"""
+Exceptions raised by the memory scripts' library functions.
+
+CLI entry points catch ParaMemoryError, print "Error: ..." and exit 1; code
+importing the scripts (or the para_memory package) gets the exception.
+Each class also derives from the matching builtin, so callers catching
+ValueError or OSError keep working.
+"""
+
+
+class ParaMemoryError(Exception):
+    """Base class for memory system errors."""
+
+
+class EntityNotFound(ParaMemoryError, FileNotFoundError):
+    """The entity directory or its items.json does not exist."""
+
+
+class EntityExists(ParaMemoryError, FileExistsError):
+    """An entity with that name is already complete on disk."""
+
+
+class InvalidFact(ParaMemoryError, ValueError):
+    """A fact is missing required fields or is otherwise malformed."""
+
+
+class FactNotFound(ParaMemoryError, ValueError):
+    """No current fact has the requested ID."""
+
+
+class InvalidCategory(ParaMemoryError, ValueError):
+    """Unknown PARA entity category."""
@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+SQLite (FTS5) index of every fact in the knowledge graph.
+
+The index lives at <knowledge>/.facts.db and is keyed by entity path, fact id,
+category, status, timestamp and relatedEntities, with full-text search over
+the fact text. Once built, update_entity.py and create_entity.py keep it in
+sync on every write; `sync` catches up with files edited by hand.
+
+The relatedEntities table doubles as a backlink index: `links` answers
+"which entities point at X" and n-hop neighbourhood queries, and
+weekly_synthesis.py uses it to render "Referenced By" sections.
+
+Facts returned by `query` are recorded as accessed (see access_log.py).
+
+Entities under archives/ (see archive_entities.py) are left out unless
+rebuild/sync is given --include-archived; the index remembers the choice.
+--related and `links` follow the redirect table (.redirects.json), so an
+archived entity can still be looked up by its old reference.
+
+Usage: python fact_index.py rebuild [base_path] [--include-archived]
+       python fact_index.py sync [base_path] [--include-archived | --exclude-archived]
+       python fact_index.py query [base_path] [--entity PREFIX] [--category CATEGORY]
+                              [--status STATUS] [--related ENTITY] [--since DATE]
+                              [--until DATE] [--text QUERY] [--limit N] [--json]
+       python fact_index.py links <entity> [base_path] [--direction in|out|both]
+                              [--hops N] [--all]
+
+If base_path is not provided, uses PARA_MEMORY_ROOT environment variable.
+If environment variable not set, defaults to ~/para-memory/knowledge.
+base_path may also be the PARA root; the index always lives in knowledge/.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+
+import metrics
+from storage import ARCHIVE_DIR, entity_key, is_archived, knowledge_root
+
+
+INDEX_NAME = ".facts.db"
+REDIRECTS_NAME = ".redirects.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    fid INTEGER PRIMARY KEY,
+    entity TEXT NOT NULL,
+    id TEXT NOT NULL,
+    fact TEXT NOT NULL,
+    category TEXT,
+    status TEXT,
+    timestamp TEXT,
+    source TEXT,
+    supersededBy TEXT,
+    lastAccessed TEXT,
+    accessCount INTEGER,
+    UNIQUE (entity, id)
+);
+CREATE INDEX IF NOT EXISTS facts_category ON facts (category, status);
+CREATE INDEX IF NOT EXISTS facts_status ON facts (status);
+CREATE INDEX IF NOT EXISTS facts_timestamp ON facts (timestamp);
+CREATE TABLE IF NOT EXISTS related (
+    fid INTEGER NOT NULL,
+    target TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS related_target ON related (target);
+CREATE INDEX IF NOT EXISTS related_fid ON related (fid);
+CREATE TABLE IF NOT EXISTS entities (
+    entity TEXT PRIMARY KEY,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(fact)"
+
+FACT_COLUMNS = [
+    "id", "fact", "category", "status", "timestamp", "source",
+    "supersededBy", "lastAccessed", "accessCount",
+]
+
+# relatedEntities use the short forms from the schema docs ("people/jane");
+# entity paths keep the areas/ prefix ("areas/people/jane")
+AREA_KINDS = ("people/", "companies/")
+
+
+def get_base_path(provided_path=None):
+    """Get base path from argument, environment variable, or default."""
+    if provided_path:
+        return Path(os.path.expanduser(provided_path))
+
+    env_path = os.environ.get('PARA_MEMORY_ROOT')
+    if env_path:
+        return Path(os.path.expanduser(env_path)) / "knowledge"
+
+    # Default path
+    return Path(os.path.expanduser('~/para-memory/knowledge'))
+
+
+def index_root(base_path):
+    """The knowledge/ directory for base_path, which may also be the PARA root above it.
+
+    The index always lives there and is keyed relative to it, as
+    sync_entity_index expects (see storage.knowledge_root).
+    """
+    base_path = Path(base_path)
+    if (base_path / "knowledge").is_dir():
+        return base_path / "knowledge"
+    return base_path
+
+
+def normalize_ref(ref):
+    """Map a relatedEntities reference onto an entity path under knowledge/."""
+    ref = str(ref).strip().strip("/")
+    if ref.startswith(AREA_KINDS):
+        return f"areas/{ref}"
+    return ref
+
+
+def short_ref(entity):
+    """Inverse of normalize_ref: areas/people/jane -> people/jane."""
+    if entity.startswith("areas/") and entity[len("areas/"):].startswith(AREA_KINDS):
+        return entity[len("areas/"):]
+    return entity
+
+
+def load_redirects(base_path):
+    """The redirect table of moved entities: {old entity key: new entity key}."""
+    try:
+        redirects = json.loads((Path(base_path) / REDIRECTS_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return redirects if isinstance(redirects, dict) else {}
+
+
+def resolve_ref(ref, redirects):
+    """normalize_ref, then follow redirects to the entity's current key."""
+    key = normalize_ref(ref)
+    seen = {key}
+    while key in redirects:
+        key = redirects[key]
+        if key in seen:
+            break
+        seen.add(key)
+    return key
+
+
+def fingerprint(entity_path):
+    """Stat-based fingerprint of an entity's fact files, history shards included."""
+    from update_entity import HISTORY_DIR, LOG_NAME
+
+    paths = [Path(entity_path) / name for name in ("items.json", LOG_NAME)]
+    paths += sorted((Path(entity_path) / HISTORY_DIR).glob("*.json"))
+    parts = []
+    for path in paths:
+        if path.exists():
+            st = path.stat()
+            name = path.relative_to(entity_path).as_posix()
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+    return ";".join(parts)
+
+
+def connect(db_path):
+    """Open (creating if needed) the fact index database."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    try:
+        conn.execute(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        pass  # SQLite built without FTS5: --text falls back to LIKE
+    return conn
+
+
+def includes_archived(conn):
+    """Whether the index covers entities under archives/."""
+    row = conn.execute("SELECT value FROM settings WHERE key = 'includeArchived'").fetchone()
+    return bool(row and row[0] == "1")
+
+
+def set_includes_archived(conn, include):
+    conn.execute(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES ('includeArchived', ?)",
+        ("1" if include else "0",),
+    )
+
+
+def has_fts(conn):
+    """Whether the full-text table exists."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'facts_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def _remove_fact(conn, entity, fact_id, fts):
+    row = conn.execute(
+        "SELECT fid FROM facts WHERE entity = ? AND id = ?", (entity, fact_id)
+    ).fetchone()
+    if row:
+        conn.execute("DELETE FROM related WHERE fid = ?", row)
+        if fts:
+            conn.execute("DELETE FROM facts_fts WHERE rowid = ?", row)
+        conn.execute("DELETE FROM facts WHERE fid = ?", row)
+
+
+def _insert_fact(conn, entity, fact, fts):
+    values = [fact.get(column) for column in FACT_COLUMNS]
+    if not values[0] or not isinstance(fact.get("fact"), str):
+        return
+    _remove_fact(conn, entity, values[0], fts)
+    cur = conn.execute(
+        f"INSERT INTO facts (entity, {', '.join(FACT_COLUMNS)}) "
+        f"VALUES (?, {', '.join('?' for _ in FACT_COLUMNS)})",
+        [entity, *values],
+    )
+    fid = cur.lastrowid
+    conn.executemany(
+        "INSERT INTO related (fid, target) VALUES (?, ?)",
+        [(fid, normalize_ref(ref)) for ref in fact.get("relatedEntities") or []],
+    )
+    if fts:
+        conn.execute("INSERT INTO facts_fts (rowid, fact) VALUES (?, ?)", (fid, fact["fact"]))
+
+
+def _delete_entity(conn, entity, fts):
+    fids = "SELECT fid FROM facts WHERE entity = ?"
+    conn.execute(f"DELETE FROM related WHERE fid IN ({fids})", (entity,))
+    if fts:
+        conn.execute(f"DELETE FROM facts_fts WHERE rowid IN ({fids})", (entity,))
+    conn.execute("DELETE FROM facts WHERE entity = ?", (entity,))
+    conn.execute("DELETE FROM entities WHERE entity = ?", (entity,))
+
+
+def replace_entity(conn, entity, data, entity_fingerprint):
+    """Re-index all facts of one entity."""
+    fts = has_fts(conn)
+    _delete_entity(conn, entity, fts)
+    for fact in data.get("items", []):
+        _insert_fact(conn, entity, fact, fts)
+    conn.execute(
+        "INSERT INTO entities (entity, fingerprint) VALUES (?, ?)", (entity, entity_fingerprint)
+    )
+
+
+def apply_events(conn, entity, events, entity_fingerprint):
+    """Apply update_entity.py fact events to an already-indexed entity."""
+    fts = has_fts(conn)
+    for event in events:
+        if event.get("op") == "add":
+            _insert_fact(conn, entity, event.get("fact") or {}, fts)
+        elif event.get("op") == "supersede":
+            conn.execute(
+                "UPDATE facts SET status = 'superseded', supersededBy = ? "
+                "WHERE entity = ? AND id = ?",
+                (event.get("by"), entity, event.get("id")),
+            )
+    conn.execute(
+        "UPDATE entities SET fingerprint = ? WHERE entity = ?", (entity_fingerprint, entity)
+    )
+
+
+def sync_entity_index(entity_path, data, events=None, previous=None):
+    """Bring one entity up to date in the fact index, if the index exists.
+
+    With events, only those changes are applied, provided the index was in
+    sync with the files before the write (previous is their fingerprint at
+    that point). Otherwise all of the entity's facts are re-indexed from data.
+    Call this while holding the entity lock, after the write.
+    """
+    root = knowledge_root(entity_path)
+    db_path = root / INDEX_NAME
+    if not db_path.exists():
+        return False
+
+    entity = entity_key(entity_path, root)
+    conn = connect(db_path)
+    try:
+        if is_archived(entity) and not includes_archived(conn):
+            return False
+        with conn:
+            known = conn.execute(
+                "SELECT fingerprint FROM entities WHERE entity = ?", (entity,)
+            ).fetchone()
+            if events is not None and known and known[0] == previous:
+                apply_events(conn, entity, events, fingerprint(entity_path))
+            else:
+                from update_entity import with_history
+
+                replace_entity(conn, entity, with_history(entity_path, data),
+                               fingerprint(entity_path))
+    finally:
+        conn.close()
+    return True
+
+
+def entity_dirs(base_path, include_archived=False):
+    """Sorted directories holding an items.json under base_path.
+
+    base_path may be a knowledge root or the PARA root above it. Its
+    archives/ directory is not walked at all unless include_archived is set.
+    """
+    base_path = Path(base_path)
+    skip = None
+    if not include_archived:
+        root = base_path / "knowledge" if (base_path / "knowledge").is_dir() else base_path
+        skip = root / ARCHIVE_DIR
+    found = []
+    for dirpath, dirnames, filenames in os.walk(base_path):
+        if skip is not None and ARCHIVE_DIR in dirnames and Path(dirpath) == skip.parent:
+            dirnames.remove(ARCHIVE_DIR)
+        if "items.json" in filenames:
+            found.append(Path(dirpath))
+    return sorted(found)
+
+
+def iter_entities(base_path, include_archived=False):
+    """Yield (entity_key, entity_path) for every entity under base_path."""
+    for entity_path in entity_dirs(base_path, include_archived):
+        yield entity_path.relative_to(base_path).as_posix(), entity_path
+
+
+def rebuild(base_path, include_archived=False):
+    """Build the fact index from scratch. Returns (entities, facts)."""
+    from update_entity import load_items, with_history
+
+    base_path = index_root(base_path)
+    db_path = base_path / INDEX_NAME
+    tmp_path = base_path / (INDEX_NAME + ".tmp")
+    for path in (tmp_path, Path(f"{tmp_path}-wal"), Path(f"{tmp_path}-shm")):
+        if path.exists():
+            path.unlink()
+
+    conn = connect(tmp_path)
+    count = 0
+    try:
+        with conn:
+            set_includes_archived(conn, include_archived)
+            for entity, entity_path in iter_entities(base_path, include_archived):
+                data = with_history(entity_path, load_items(entity_path))
+                replace_entity(conn, entity, data, fingerprint(entity_path))
+                count += 1
+        facts = conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+        conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+
+    # Swap the finished index in so readers never see a half-built one
+    os.replace(tmp_path, db_path)
+    for suffix in ("-wal", "-shm"):
+        stale = Path(f"{db_path}{suffix}")
+        if stale.exists():
+            stale.unlink()
+    return count, facts
+
+
+def sync(base_path, include_archived=None):
+    """Re-index entities whose files changed on disk. Returns (updated, removed).
+
+    include_archived=None keeps the index's current choice.
+    """
+    from update_entity import load_items, with_history
+
+    base_path = index_root(base_path)
+    conn = connect(base_path / INDEX_NAME)
+    updated = removed = 0
+    try:
+        with conn:
+            if include_archived is None:
+                include_archived = includes_archived(conn)
+            set_includes_archived(conn, include_archived)
+            known = dict(conn.execute("SELECT entity, fingerprint FROM entities"))
+            seen = set()
+            for entity, entity_path in iter_entities(base_path, include_archived):
+                seen.add(entity)
+                current = fingerprint(entity_path)
+                if known.get(entity) != current:
+                    data = with_history(entity_path, load_items(entity_path))
+                    replace_entity(conn, entity, data, current)
+                    updated += 1
+            fts = has_fts(conn)
+            for entity in set(known) - seen:
+                _delete_entity(conn, entity, fts)
+                removed += 1
+    finally:
+        conn.close()
+    return updated, removed
+
+
+def query(conn, entity=None, category=None, status=None, related=None,
+          since=None, until=None, text=None, limit=100):
+    """Query indexed facts. Returns a list of fact dicts with an "entity" key."""
+    clauses = []
+    params = []
+    if entity:
+        entity = entity.strip("/")
+        clauses.append("(f.entity = ? OR f.entity LIKE ? ESCAPE '\\')")
+        escaped = entity.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params += [entity, f"{escaped}/%"]
+    if category:
+        clauses.append("f.category = ?")
+        params.append(category)
+    if status:
+        clauses.append("f.status = ?")
+        params.append(status)
+    if related:
+        clauses.append("f.fid IN (SELECT fid FROM related WHERE target = ?)")
+        params.append(normalize_ref(related))
+    if since:
+        clauses.append("f.timestamp >= ?")
+        params.append(since)
+    if until:
+        # Inclusive of the whole day for timestamps with a time part
+        clauses.append("f.timestamp <= ?")
+        params.append(until + "~")
+    if text:
+        if has_fts(conn):
+            clauses.append("f.fid IN (SELECT rowid FROM facts_fts WHERE facts_fts MATCH ?)")
+        else:
+            clauses.append("f.fact LIKE '%' || ? || '%'")
+        params.append(text)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = (
+        f"SELECT f.fid, f.entity, {', '.join('f.' + c for c in FACT_COLUMNS)} FROM facts f "
+        f"{where} ORDER BY f.timestamp DESC, f.entity, f.id"
+    )
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    results = []
+    for row in conn.execute(sql, params):
+        fact = {"entity": row[1], **dict(zip(FACT_COLUMNS, row[2:]))}
+        fact["relatedEntities"] = [
+            r[0] for r in conn.execute("SELECT target FROM related WHERE fid = ?", (row[0],))
+        ]
+        results.append(fact)
+    return results
+
+
+def inbound(conn, entity, include_superseded=False):
+    """Entities with a fact whose relatedEntities include entity."""
+    sql = (
+        "SELECT DISTINCT f.entity FROM related r JOIN facts f ON f.fid = r.fid "
+        "WHERE r.target = ? AND f.entity != ?"
+    )
+    if not include_superseded:
+        sql += " AND f.status = 'active'"
+    entity = normalize_ref(entity)
+    return sorted(row[0] for row in conn.execute(sql, (entity, entity)))
+
+
+def outbound(conn, entity, include_superseded=False):
+    """Entities referenced by entity's facts."""
+    sql = (
+        "SELECT DISTINCT r.target FROM facts f JOIN related r ON r.fid = f.fid "
+        "WHERE f.entity = ? AND r.target != ?"
+    )
+    if not include_superseded:
+        sql += " AND f.status = 'active'"
+    entity = normalize_ref(entity)
+    return sorted(row[0] for row in conn.execute(sql, (entity, entity)))
+
+
+def neighbourhood(conn, entity, hops=1, direction="both", include_superseded=False):
+    """Breadth-first walk over relationship edges.
+
+    Returns {entity: distance} for every entity within hops of entity
+    (excluding entity itself), following inbound and/or outbound links.
+    """
+    start = normalize_ref(entity)
+    distances = {start: 0}
+    frontier = [start]
+    for depth in range(1, hops + 1):
+        next_frontier = []
+        for current in frontier:
+            linked = []
+            if direction in ("in", "both"):
+                linked += inbound(conn, current, include_superseded)
+            if direction in ("out", "both"):
+                linked += outbound(conn, current, include_superseded)
+            for other in linked:
+                if other not in distances:
+                    distances[other] = depth
+                    next_frontier.append(other)
+        frontier = next_frontier
+    del distances[start]
+    return distances
+
+
+_connections = {}
+
+
+def referenced_by(entity_path):
+    """Inbound links for an entity from its knowledge graph's index.
+
+    Returns a sorted list of short references (e.g. people/jane), or None if
+    no fact index has been built. Connections are cached per process.
+    """
+    root = knowledge_root(entity_path)
+    db_path = root / INDEX_NAME
+    if not db_path.exists():
+        return None
+    conn = _connections.get(db_path)
+    if conn is None:
+        conn = _connections[db_path] = connect(db_path)
+    return [short_ref(e) for e in inbound(conn, entity_key(entity_path, root))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite index of all facts in the knowledge graph")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_cmd = sub.add_parser("rebuild", help="Build the index from scratch")
+    rebuild_cmd.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    rebuild_cmd.add_argument("--include-archived", action="store_true",
+                             help="Also index entities under archives/")
+
+    sync_cmd = sub.add_parser("sync", help="Re-index entities changed on disk")
+    sync_cmd.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    archived = sync_cmd.add_mutually_exclusive_group()
+    archived.add_argument("--include-archived", action="store_true", default=None,
+                          help="Start indexing entities under archives/")
+    archived.add_argument("--exclude-archived", dest="include_archived", action="store_false",
+                          help="Stop indexing entities under archives/")
+
+    q = sub.add_parser("query", help="Query indexed facts")
+    q.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    q.add_argument("--entity", help="Entity path or prefix, e.g. areas/people or projects/acme")
+    q.add_argument("--category", help="relationship, milestone, status, preference, context")
+    q.add_argument("--status", help="active or superseded")
+    q.add_argument("--related", help="Facts whose relatedEntities include this entity")
+    q.add_argument("--since", metavar="DATE", help="timestamp >= DATE")
+    q.add_argument("--until", metavar="DATE", help="timestamp <= DATE")
+    q.add_argument("--text", help="Full-text (FTS5) query over fact text")
+    q.add_argument("--limit", type=int, default=100, help="Maximum results (0 = no limit)")
+    q.add_argument("--json", action="store_true", help="Print one JSON object per line")
+
+    links = sub.add_parser("links", help="Inbound/outbound relationship links of an entity")
+    links.add_argument("entity", help="Entity path or reference, e.g. people/jane-doe")
+    links.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    links.add_argument("--direction", choices=("in", "out", "both"), default="in",
+                       help="Follow inbound links (default), outbound links, or both")
+    links.add_argument("--hops", type=int, default=1, help="Neighbourhood radius (default: 1)")
+    links.add_argument("--all", action="store_true", help="Include links from superseded facts")
+
+    for command in sub.choices.values():
+        metrics.add_arguments(command)
+
+    args = parser.parse_args()
+    metrics.configure(args.metrics, args.profile)
+    base_path = get_base_path(args.base_path)
+    if not base_path.exists():
+        print(f"Error: Path not found: {base_path}")
+        sys.exit(1)
+    base_path = index_root(base_path)
+
+    if args.command == "rebuild":
+        with metrics.phase("rebuild"):
+            entities, facts = rebuild(base_path, args.include_archived)
+        metrics.count("entities", entities)
+        metrics.count("facts", facts)
+        print(f"✓ Indexed {facts} facts from {entities} entities")
+        return
+
+    if args.command == "sync":
+        with metrics.phase("sync"):
+            updated, removed = sync(base_path, args.include_archived)
+        metrics.count("entitiesReindexed", updated)
+        print(f"✓ Re-indexed {updated} entities, removed {removed}")
+        return
+
+    db_path = base_path / INDEX_NAME
+    if not db_path.exists():
+        print(f"Error: Fact index not found at {db_path}")
+        print("   Build it with: python fact_index.py rebuild")
+        sys.exit(1)
+
+    conn = connect(db_path)
+    # Old references to archived (or restored) entities still work
+    redirects = load_redirects(base_path)
+
+    if args.command == "links":
+        try:
+            with metrics.phase("links"):
+                found = neighbourhood(conn, resolve_ref(args.entity, redirects),
+                                      max(args.hops, 1), args.direction, args.all)
+        finally:
+            conn.close()
+        for entity, distance in sorted(found.items(), key=lambda item: (item[1], item[0])):
+            print(f"{distance}  {short_ref(entity)}")
+        return
+
+    try:
+        with metrics.phase("query"):
+            results = query(
+                conn, entity=args.entity, category=args.category, status=args.status,
+                related=resolve_ref(args.related, redirects) if args.related else None,
+                since=args.since, until=args.until,
+                text=args.text, limit=args.limit,
+            )
+        metrics.count("results", len(results))
+    except sqlite3.OperationalError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    # Results count as reads for memory decay (folded in by weekly_synthesis.py)
+    from access_log import accessed_facts, record_accesses
+
+    record_accesses(base_path, accessed_facts(results))
+
+    for fact in results:
+        if args.json:
+            print(json.dumps(fact, ensure_ascii=False))
+        else:
+            print(f"{fact['entity']}  {fact['id']}  [{fact['category']}/{fact['status']}]  "
+                  f"{fact['timestamp']}  {fact['fact']}")
+
+
+if __name__ == "__main__":
+    metrics.run_main("fact_index", main)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Install para-memory hooks into ~/.claude/hooks/para-memory/ and register them in settings.json."""
 
+import argparse
 import json
 import shutil
 from pathlib import Path
@@ -8,7 +9,9 @@ from pathlib import Path
 SCRIPTS_DIR = Path(__file__).parent
 HOOKS_DEST = Path.home() / ".claude" / "hooks" / "para-memory"
 SETTINGS_FILE = Path.home() / ".claude" / "settings.json"
-SCRIPTS_TO_COPY = ["save_chat_history.py"]
+# Optional for the hook: timeline_index.py keeps the timeline index current,
+# metrics.py records per-run metrics
+SCRIPTS_TO_COPY = ["save_chat_history.py", "timeline_index.py", "metrics.py"]
 
 
 def copy_scripts():
@@ -30,13 +33,16 @@ def _upsert_hook_entry(hook_list: list, new_entry: dict) -> None:
     hook_list.append(new_entry)
 
 
-def register_hook():
+def register_hook(background=False):
     settings = {}
     if SETTINGS_FILE.exists():
         with open(SETTINGS_FILE) as f:
             settings = json.load(f)
 
     hook_command = f"python {HOOKS_DEST / 'save_chat_history.py'}"
+    if background:
+        # Hook only queues a job; a detached worker writes the session file
+        hook_command += " --enqueue"
     hooks = settings.setdefault("hooks", {})
 
     session_end_entry = {
@@ -59,6 +65,14 @@ def register_hook():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="Queue hook work for a background worker instead of running it inline",
+    )
+    args = parser.parse_args()
+
     copy_scripts()
-    register_hook()
+    register_hook(background=args.background)
     print("Done.")
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Long-running memory daemon: parsed entities cached in memory, served over a
+local Unix socket.
+
+Requests and responses are one JSON object per line; a connection may send
+any number of requests. Responses are {"ok": true, "result": ...} or
+{"ok": false, "error": "..."}.
+
+  {"op": "ping"}
+  {"op": "get", "entity": "areas/people/jane"}          full items.json data
+  {"op": "query", "entity": "people/jane", "status": "active", "category": "status"}
+  {"op": "query", "related": "companies/acme", "text": "hired"}   via fact index
+  {"op": "summary", "entity": "projects/website"}       summary.md text
+  {"op": "add", "entity": "...", "fact": {...}, "appendLog": false}
+  {"op": "supersede", "entity": "...", "oldId": "...", "fact": {...}}
+  {"op": "stats"}
+
+Writes go through update_entity.py's code path (same locking, fact log and
+fact index updates), so the on-disk layout is unchanged and the CLI scripts
+can keep running alongside. Cached entities are checked against their files'
+stat fingerprint on every request, so changes made outside the daemon are
+picked up immediately. Facts returned by "query" are recorded as accessed.
+
+Usage: python memory_daemon.py serve [base_path] [--socket PATH] [--cache-size N]
+       python memory_daemon.py call '<request_json>' [--socket PATH]
+
+The socket defaults to <knowledge>/.memory.sock.
+If base_path is not provided, uses PARA_MEMORY_ROOT environment variable.
+If environment variable not set, defaults to ~/para-memory/knowledge.
+"""
+
+import os
+import sys
+import json
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from access_log import accessed_facts, record_accesses
+from errors import EntityNotFound
+from fact_index import (
+    INDEX_NAME, connect, fingerprint, get_base_path, load_redirects, normalize_ref, query,
+    resolve_ref,
+)
+from update_entity import (
+    HISTORY_DIR, apply_add, apply_supersede, commit_changes, load_items, locked_entity,
+)
+
+
+SOCKET_NAME = ".memory.sock"
+DEFAULT_CACHE_SIZE = 256
+FACT_FILTERS = ("category", "status", "related", "since", "until", "text", "limit")
+
+
+class EntityCache:
+    """LRU of parsed items.json data, validated against the files on each use."""
+
+    def __init__(self, base_path, capacity=DEFAULT_CACHE_SIZE):
+        self.base_path = Path(base_path).resolve()
+        self.capacity = capacity
+        self.entries = OrderedDict()  # key -> (fingerprint, data)
+        self.locks = {}  # key -> (lock, requests holding or waiting for it)
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def resolve(self, entity):
+        """Map an entity reference to (key, path); EntityNotFound if there is none."""
+        key = normalize_ref(entity)
+        path = (self.base_path / key).resolve()
+        if not (path / "items.json").exists():
+            # Archived (or restored) since the caller learned the reference
+            key = resolve_ref(entity, load_redirects(self.base_path))
+            path = (self.base_path / key).resolve()
+        if self.base_path not in path.parents or not (path / "items.json").exists():
+            raise EntityNotFound(f"Entity not found: {entity}")
+        return key, path
+
+    @contextmanager
+    def entity_lock(self, key):
+        """Hold the in-process lock serializing requests for one entity.
+
+        A lock is dropped as soon as no request holds or waits for it, so the
+        table only grows with the number of entities in use at once.
+        """
+        with self.lock:
+            lock, users = self.locks.get(key) or (threading.Lock(), 0)
+            self.locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self.lock:
+                lock, users = self.locks[key]
+                if users == 1:
+                    del self.locks[key]
+                else:
+                    self.locks[key] = (lock, users - 1)
+
+    def load(self, key, path):
+        """Cached data for an entity, re-read if its files changed. Hold entity_lock(key)."""
+        current = fingerprint(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] == current:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        data = load_items(path)
+        self.store(key, current, data)
+        return data
+
+    def store(self, key, entity_fingerprint, data):
+        with self.lock:
+            self.entries[key] = (entity_fingerprint, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def drop(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def mutate(self, key, path, apply, append_log=None):
+        """Apply a change to an entity and write it through to disk.
+
+        apply(data, events) mutates the loaded data and returns the result.
+        """
+        with self.entity_lock(key), locked_entity(path) as current:
+            if current != path:
+                # Archived or restored while waiting for the lock
+                self.drop(key)
+                key, path = current.relative_to(self.base_path).as_posix(), current
+            data = self.load(key, path)
+            events = []
+            try:
+                result = apply(data, events)
+                commit_changes(path, data, events, append_log)
+            except BaseException:
+                # data may be half-modified; the files are the source of truth
+                self.drop(key)
+                raise
+            self.store(key, fingerprint(path), data)
+        return result
+
+
+def require(request, field):
+    value = request.get(field)
+    if value in (None, ""):
+        raise ValueError(f"Missing field: {field}")
+    return value
+
+
+def filter_facts(items, request):
+    """In-memory equivalent of the fact index filters, for a single entity."""
+    related = normalize_ref(request["related"]) if request.get("related") else None
+    text = (request.get("text") or "").lower()
+    results = []
+    for fact in items:
+        if request.get("category") and fact.get("category") != request["category"]:
+            continue
+        if request.get("status") and fact.get("status") != request["status"]:
+            continue
+        if request.get("since") and (fact.get("timestamp") or "") < request["since"]:
+            continue
+        if request.get("until") and (fact.get("timestamp") or "") > request["until"] + "~":
+            continue
+        if related and related not in {normalize_ref(r) for r in fact.get("relatedEntities", [])}:
+            continue
+        if text and text not in str(fact.get("fact", "")).lower():
+            continue
+        results.append(fact)
+    limit = request.get("limit") or 0
+    return results[:limit] if limit else results
+
+
+class MemoryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, cache):
+        self.cache = cache
+        super().__init__(str(socket_path), RequestHandler)
+
+    def dispatch(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+        op = request.get("op")
+        cache = self.cache
+
+        if op == "ping":
+            return "pong"
+
+        if op == "stats":
+            with cache.lock:
+                return {"cached": len(cache.entries), "capacity": cache.capacity,
+                        "hits": cache.hits, "misses": cache.misses, "locks": len(cache.locks)}
+
+        if op == "summary":
+            _, path = cache.resolve(require(request, "entity"))
+            summary_path = path / "summary.md"
+            return summary_path.read_text() if summary_path.exists() else None
+
+        if op == "get":
+            key, path = cache.resolve(require(request, "entity"))
+            with cache.entity_lock(key):
+                # Serialized under the lock so a concurrent write can't interleave
+                return json.loads(json.dumps(cache.load(key, path)))
+
+        if op == "query":
+            if request.get("entity") and not request["entity"].endswith("/"):
+                try:
+                    key, path = cache.resolve(request["entity"])
+                except EntityNotFound:
+                    key = None  # not an entity: treat as a prefix for the index
+                # Superseded facts of a sharded entity live in history/, which
+                # only the index covers
+                if key and (request.get("status") == "active"
+                            or not (path / HISTORY_DIR).is_dir()
+                            or not (cache.base_path / INDEX_NAME).exists()):
+                    with cache.entity_lock(key):
+                        facts = json.loads(json.dumps(
+                            filter_facts(cache.load(key, path)["items"], request)))
+                    for fact in facts:
+                        fact["entity"] = key
+                    record_accesses(cache.base_path, accessed_facts(facts))
+                    return facts
+                request = {**request, "entity": key or request["entity"]}
+            return self.query_index(request)
+
+        if op == "add":
+            key, path = cache.resolve(require(request, "entity"))
+            fact = require(request, "fact")
+            return cache.mutate(key, path, lambda data, events: apply_add(path, data, fact, events),
+                                request.get("appendLog"))
+
+        if op == "supersede":
+            key, path = cache.resolve(require(request, "entity"))
+            old_id, fact = require(request, "oldId"), require(request, "fact")
+            return cache.mutate(
+                key, path,
+                lambda data, events: apply_supersede(path, data, old_id, fact, events),
+                request.get("appendLog"),
+            )
+
+        raise ValueError(f"Unknown op: {op}")
+
+    def query_index(self, request):
+        """Cross-entity query through the SQLite fact index."""
+        db_path = self.cache.base_path / INDEX_NAME
+        if not db_path.exists():
+            raise ValueError("Fact index not built; run fact_index.py rebuild")
+        conn = connect(db_path)
+        try:
+            filters = {name: request.get(name) for name in FACT_FILTERS if request.get(name)}
+            facts = query(conn, entity=request.get("entity"), **filters)
+        finally:
+            conn.close()
+
+        record_accesses(self.cache.base_path, accessed_facts(facts))
+        return facts
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = {"ok": True, "result": self.server.dispatch(json.loads(line))}
+            except Exception as e:
+                # Whatever went wrong, only this request fails: the
+                # connection and the daemon keep serving
+                response = {"ok": False, "error": str(e) or type(e).__name__}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def default_socket(base_path):
+    return Path(base_path) / SOCKET_NAME
+
+
+def claim_socket(socket_path):
+    """Remove a stale socket file; refuse to start if a daemon is answering on it."""
+    if not socket_path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        socket_path.unlink()
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A memory daemon is already listening on {socket_path}")
+
+
+def serve(base_path, socket_path, cache_size=DEFAULT_CACHE_SIZE):
+    claim_socket(socket_path)
+    server = MemoryServer(socket_path, EntityCache(base_path, cache_size))
+    os.chmod(socket_path, 0o600)
+    print(f"✓ Serving {base_path} on {socket_path}")
+    # Exit through the finally below on `kill` as well as Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+
+
+def call(socket_path, request):
+    """Send one request to a running daemon and return its decoded response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(str(socket_path))
+        conn.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        with conn.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the knowledge graph from memory over a Unix socket")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    srv = sub.add_parser("serve", help="Run the daemon in the foreground")
+    srv.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    srv.add_argument("--socket", help=f"Socket path (default: <base_path>/{SOCKET_NAME})")
+    srv.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, metavar="N",
+                     help=f"Entities kept parsed in memory (default: {DEFAULT_CACHE_SIZE})")
+
+    cli = sub.add_parser("call", help="Send one JSON request and print the response")
+    cli.add_argument("request", help="Request JSON, e.g. '{\"op\": \"ping\"}'")
+    cli.add_argument("--socket", help=f"Socket path (default: <knowledge>/{SOCKET_NAME})")
+
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: Unix sockets are not available on this platform")
+        sys.exit(1)
+
+    if args.command == "call":
+        socket_path = Path(args.socket) if args.socket else default_socket(get_base_path())
+        try:
+            response = call(socket_path, json.loads(args.request))
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid request JSON: {e}")
+            sys.exit(1)
+        except OSError as e:
+            print(f"Error: Cannot reach daemon at {socket_path}: {e}")
+            sys.exit(1)
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+        sys.exit(0 if response.get("ok") else 1)
+
+    base_path = get_base_path(args.base_path)
+    if not base_path.exists():
+        print(f"Error: Path not found: {base_path}")
+        sys.exit(1)
+    if args.cache_size < 1:
+        parser.error("--cache-size must be >= 1")
+
+    socket_path = Path(args.socket) if args.socket else default_socket(base_path)
+    try:
+        serve(base_path, socket_path, args.cache_size)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
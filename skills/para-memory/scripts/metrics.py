@@ -0,0 +1,197 @@
+"""
+Per-run metrics shared by the memory scripts.
+
+Off unless a script is run with --metrics or PARA_MEMORY_METRICS is set
+("1" for the default file, or a file path). Each run then appends one JSON
+line to the metrics file (default <PARA_MEMORY_ROOT>/.metrics.jsonl):
+
+  {"ts": ..., "script": "weekly_synthesis", "wallMs": 812.4, "exitCode": 0,
+   "phases": {"discover": 3.1, "synthesize": 640.2, "qmd": 150.0},
+   "counts": {"entities": 412, "bytesRead": 1843221, "bytesWritten": 40210},
+   "subprocesses": [{"cmd": "qmd update", "ms": 120.4, "returncode": 0}]}
+
+Phase times are wall milliseconds summed over every entry into the phase;
+phases may nest (e.g. "load" inside "synthesize").
+--profile FILE (or PARA_MEMORY_PROFILE) also dumps cProfile stats for the
+run; if FILE is a directory, a <script>-<time>-<pid>.prof file is created
+in it. Calls are cheap no-ops while metrics are off.
+
+Standard library only, so install_hooks.py can copy it next to the hook.
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+
+METRICS_ENV = "PARA_MEMORY_METRICS"
+PROFILE_ENV = "PARA_MEMORY_PROFILE"
+METRICS_NAME = ".metrics.jsonl"
+
+_started = time.perf_counter()
+_state = {"enabled": False, "path": None, "profile": None, "profiler": None,
+          "phases": {}, "counts": {}, "subprocesses": []}
+
+
+def enabled():
+    return _state["enabled"]
+
+
+def default_path():
+    root = os.environ.get("PARA_MEMORY_ROOT", "~/para-memory")
+    return Path(os.path.expanduser(root)) / METRICS_NAME
+
+
+def add_arguments(parser):
+    """Add --metrics and --profile FILE to an argparse parser."""
+    parser.add_argument("--metrics", action="store_true",
+                        help=f"Append run metrics as a JSON line to ${METRICS_ENV} "
+                             f"(default: <PARA_MEMORY_ROOT>/{METRICS_NAME})")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="Dump cProfile stats for this run to FILE (or into a directory)")
+
+
+def pop_arguments(argv):
+    """Remove --metrics and --profile FILE from argv (scripts without argparse).
+
+    Returns (metrics, profile) as add_arguments would parse them.
+    """
+    metrics, profile = False, None
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--metrics":
+            metrics = True
+        elif arg.startswith("--profile="):
+            profile = arg.split("=", 1)[1]
+        elif arg == "--profile" and i + 1 < len(argv):
+            profile = argv.pop(i + 1)
+        else:
+            i += 1
+            continue
+        del argv[i]
+    return metrics, profile
+
+
+def configure(metrics=False, profile=None):
+    """Turn on recording from --metrics/--profile values or the environment."""
+    target = os.environ.get(METRICS_ENV, "")
+    if target in ("0", "false"):
+        target = ""
+    if metrics or target:
+        _state["enabled"] = True
+        if target and target not in ("1", "true"):
+            _state["path"] = Path(os.path.expanduser(target))
+
+    profile = profile or os.environ.get(PROFILE_ENV)
+    if profile and _state["profiler"] is None:
+        import cProfile
+
+        _state["profile"] = Path(os.path.expanduser(profile))
+        _state["profiler"] = cProfile.Profile()
+        _state["profiler"].enable()
+
+
+@contextmanager
+def _timed_phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = _state["phases"]
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def phase(name):
+    """Context manager adding the wall time of its block to phase name."""
+    return _timed_phase(name) if _state["enabled"] else nullcontext()
+
+
+def count(name, n=1):
+    """Add n to counter name."""
+    if _state["enabled"]:
+        counts = _state["counts"]
+        counts[name] = counts.get(name, 0) + n
+
+
+def run_subprocess(cmd, **kwargs):
+    """subprocess.run(cmd, **kwargs), recording its duration and return code."""
+    start = time.perf_counter()
+    returncode = None
+    try:
+        result = subprocess.run(cmd, **kwargs)
+        returncode = result.returncode
+        return result
+    finally:
+        if _state["enabled"]:
+            _state["subprocesses"].append({
+                "cmd": " ".join(str(part) for part in cmd[:2]),
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+                "returncode": returncode,
+            })
+
+
+def _dump_profile(script):
+    profiler = _state["profiler"]
+    profiler.disable()
+    path = _state["profile"]
+    if path.is_dir():
+        path = path / f"{script}-{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}.prof"
+    profiler.dump_stats(str(path))
+    return str(path)
+
+
+def finish(script, exit_code=0):
+    """Write the run's metrics line (and profile). Never raises."""
+    try:
+        profile_path = _dump_profile(script) if _state["profiler"] else None
+        if not _state["enabled"]:
+            return
+        record = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "script": script,
+            "pid": os.getpid(),
+            "wallMs": round((time.perf_counter() - _started) * 1000, 3),
+            "exitCode": exit_code,
+            "phases": {name: round(ms, 3) for name, ms in _state["phases"].items()},
+            "counts": _state["counts"],
+            "subprocesses": _state["subprocesses"],
+        }
+        if profile_path:
+            record["profile"] = profile_path
+        path = _state["path"] or default_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One write on an O_APPEND file, so concurrent runs don't interleave
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        finally:
+            os.close(fd)
+    except Exception as e:
+        print(f"Warning: metrics not recorded ({e})", file=sys.stderr)
+
+
+def run_main(script, main):
+    """Run a script's main(), recording metrics for the run if they are on.
+
+    The environment is read up front; main() may still call configure() with
+    its --metrics/--profile arguments.
+    """
+    configure()
+    exit_code = 0
+    try:
+        main()
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        raise
+    except BaseException:
+        exit_code = 1
+        raise
+    finally:
+        if _state["enabled"] or _state["profiler"]:
+            finish(script, exit_code)
@@ -0,0 +1,53 @@
+"""
+Importable API for the PARA memory scripts.
+
+Put skills/para-memory/scripts on sys.path, then:
+
+    from para_memory import MemoryStore
+
+    store = MemoryStore()                      # PARA_MEMORY_ROOT or ~/para-memory
+    jane = store.entity("people/jane-doe")
+    fact_id = jane.add_fact({"fact": "...", "category": "status",
+                             "timestamp": "2026-02-07", "source": "2026-02-07"})
+    jane.regenerate_summary()
+
+Errors are raised as ParaMemoryError subclasses instead of printing and
+exiting. The scripts' command-line entry points wrap the same functions.
+"""
+
+from pathlib import Path
+
+from errors import (
+    EntityExists,
+    EntityNotFound,
+    FactNotFound,
+    InvalidCategory,
+    InvalidFact,
+    ParaMemoryError,
+)
+from save_chat_history import parse_transcript
+from update_entity import add_fact, supersede_fact
+from weekly_synthesis import regenerate_summary as _regenerate_summary
+
+from .store import Entity, MemoryStore
+
+
+def regenerate_summary(entity_path, settings=None):
+    """Re-render an entity's summary.md; returns (hot, warm, cold) counts."""
+    return _regenerate_summary(Path(entity_path), settings)
+
+
+__all__ = [
+    "MemoryStore",
+    "Entity",
+    "add_fact",
+    "supersede_fact",
+    "regenerate_summary",
+    "parse_transcript",
+    "ParaMemoryError",
+    "EntityNotFound",
+    "EntityExists",
+    "FactNotFound",
+    "InvalidFact",
+    "InvalidCategory",
+]
@@ -0,0 +1,170 @@
+"""
+MemoryStore and Entity: in-process access to a PARA knowledge graph.
+
+A MemoryStore keeps parsed entities in an LRU (the same cache memory_daemon.py
+serves from), re-validated against the files on every use, so one store can
+be reused across thousands of calls while CLI scripts or other processes
+write alongside it.
+"""
+
+import os
+from pathlib import Path
+
+from access_log import accessed_facts, record_accesses
+from create_entity import create_entity
+from entity_catalog import catalog_paths, load_catalog
+from errors import FactNotFound, ParaMemoryError
+from fact_index import INDEX_NAME, connect, entity_dirs, query
+from memory_daemon import DEFAULT_CACHE_SIZE, EntityCache, filter_facts
+from update_entity import apply_add, apply_supersede, load_history
+from weekly_synthesis import regenerate_summary
+
+
+def resolve_knowledge_root(root=None):
+    """knowledge/ directory for a PARA root, a knowledge root, or PARA_MEMORY_ROOT."""
+    if root is None:
+        root = os.environ.get("PARA_MEMORY_ROOT", "~/para-memory")
+    root = Path(os.path.expanduser(str(root)))
+    if (root / "knowledge").is_dir():
+        return root / "knowledge"
+    return root
+
+
+class Entity:
+    """Handle on one entity. Data is read through the store's cache."""
+
+    def __init__(self, store, key, path):
+        self.store = store
+        self.key = key
+        self.path = path
+
+    def __repr__(self):
+        return f"Entity({self.key!r})"
+
+    @property
+    def data(self):
+        """Current items.json data (fact log replayed). Treat as read-only."""
+        cache = self.store.cache
+        with cache.entity_lock(self.key):
+            return cache.load(self.key, self.path)
+
+    def facts(self, **filters):
+        """Current facts, filtered like fact_index.py query (category, status, ...).
+
+        The active ones returned are recorded as accessed (see access_log.py).
+        """
+        facts = filter_facts(self.data["items"], filters)
+        record_accesses(self.store.base_path, accessed_facts(facts, self.key))
+        return facts
+
+    def fact(self, fact_id):
+        """A current fact by ID, recorded as accessed if active; raises FactNotFound."""
+        for item in self.data["items"]:
+            if item.get("id") == fact_id:
+                record_accesses(self.store.base_path, accessed_facts([item], self.key))
+                return item
+        raise FactNotFound(f"Fact {fact_id} not found among current facts")
+
+    def history(self):
+        """Superseded facts moved to history shards (update_entity.py --shard)."""
+        return load_history(self.path)
+
+    def add_fact(self, fact, append_log=None):
+        """Add a fact; returns its ID. Raises InvalidFact."""
+        fact = dict(fact)
+        return self.store.cache.mutate(
+            self.key, self.path,
+            lambda data, events: apply_add(self.path, data, fact, events),
+            append_log,
+        )
+
+    def supersede_fact(self, old_fact_id, fact, append_log=None):
+        """Supersede a fact with a new one; returns the new ID. Raises FactNotFound/InvalidFact."""
+        fact = dict(fact)
+        return self.store.cache.mutate(
+            self.key, self.path,
+            lambda data, events: apply_supersede(self.path, data, old_fact_id, fact, events),
+            append_log,
+        )
+
+    @property
+    def summary(self):
+        """summary.md text, or None if it does not exist."""
+        summary_path = self.path / "summary.md"
+        return summary_path.read_text() if summary_path.exists() else None
+
+    def regenerate_summary(self, settings=None):
+        """Re-render summary.md with memory decay; returns (hot, warm, cold) counts."""
+        return regenerate_summary(self.path, settings)
+
+
+class MemoryStore:
+    """A knowledge graph on disk, with parsed entities cached in memory.
+
+    root may be the PARA root (holding knowledge/), the knowledge directory
+    itself, or None for PARA_MEMORY_ROOT (default ~/para-memory).
+    """
+
+    def __init__(self, root=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.base_path = resolve_knowledge_root(root)
+        if not self.base_path.is_dir():
+            raise ParaMemoryError(f"Knowledge graph not found: {self.base_path}")
+        self.cache = EntityCache(self.base_path, cache_size)
+
+    def __repr__(self):
+        return f"MemoryStore({str(self.base_path)!r})"
+
+    def entity(self, ref):
+        """Entity for a path or reference such as people/jane-doe; raises EntityNotFound."""
+        key, path = self.cache.resolve(ref)
+        return Entity(self, key, path)
+
+    def __contains__(self, ref):
+        try:
+            self.cache.resolve(ref)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def entities(self, include_archived=False):
+        """Every entity in the graph, in path order (archives/ only if asked).
+
+        Listed from the entity catalog when there is one.
+        """
+        catalog = load_catalog(self.base_path)
+        if catalog is not None:
+            paths = catalog_paths(self.base_path, catalog, include_archived)
+        else:
+            paths = entity_dirs(self.base_path, include_archived)
+        for path in paths:
+            yield Entity(self, path.relative_to(self.base_path).as_posix(), path.resolve())
+
+    def create_entity(self, category, name):
+        """Create an entity (see create_entity.py); raises InvalidCategory/EntityExists."""
+        entity_path, _ = create_entity(self.base_path, category, name)
+        return self.entity(entity_path.relative_to(self.base_path).as_posix())
+
+    def add_fact(self, ref, fact, append_log=None):
+        return self.entity(ref).add_fact(fact, append_log)
+
+    def supersede_fact(self, ref, old_fact_id, fact, append_log=None):
+        return self.entity(ref).supersede_fact(old_fact_id, fact, append_log)
+
+    def regenerate_summary(self, ref, settings=None):
+        return self.entity(ref).regenerate_summary(settings)
+
+    def query(self, **filters):
+        """Cross-entity fact query through the SQLite fact index (see fact_index.query).
+
+        The active facts returned are recorded as accessed.
+        """
+        db_path = self.base_path / INDEX_NAME
+        if not db_path.exists():
+            raise ParaMemoryError("Fact index not built; run fact_index.py rebuild")
+        conn = connect(db_path)
+        try:
+            facts = query(conn, **filters)
+        finally:
+            conn.close()
+        record_accesses(self.base_path, accessed_facts(facts))
+        return facts
@@ -6,17 +6,48 @@ Inspired by:
   https://github.com/affaan-m/everything-claude-code/blob/main/scripts/hooks/session-end.js
 
 Hook input (stdin): JSON with {"transcript_path": "..."}
+With --enqueue the hook only queues a job under memory/.queue/ and returns;
+a detached worker (also runnable as --drain) does the parsing and writing.
+Transcripts are parsed as a stream and checkpointed per session (byte offset +
+parser state under memory/.checkpoints/), so each run only reads new lines
+and appends the turns they contain to the session file. Runs on the same
+transcript are serialized by a lock next to its checkpoint, and a session
+file edited by hand is only ever appended to.
+If timeline_index.py sits next to this script and its index exists, each
+session file written is re-indexed for search_timeline.sh. With metrics.py
+alongside, --metrics or PARA_MEMORY_METRICS records per-run timings.
 Output: ${PARA_MEMORY_ROOT:-~/para-memory}/memory/sessions/YYYY-MM-DD-<shortId>-session.md
 """
 
+import hashlib
 import json
 import os
 import re
 import shutil
+import sqlite3
+import subprocess
 import sys
+import time
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: no background queue, hooks run inline
+    fcntl = None
+
+# Optional: install_hooks.py copies these next to this hook
+try:
+    import metrics
+except ImportError:
+    metrics = None
+
+try:
+    from timeline_index import update_note as update_timeline
+except ImportError:
+    update_timeline = None
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -27,6 +58,27 @@ def get_sessions_dir() -> Path:
     return Path(root).expanduser() / "memory"
 
 
+def phase(name: str):
+    """metrics.phase when metrics.py is available, else a no-op."""
+    return metrics.phase(name) if metrics else nullcontext()
+
+
+def count(name: str, n: int = 1) -> None:
+    if metrics:
+        metrics.count(name, n)
+
+
+def index_session_file(session_file) -> None:
+    """Re-index a written session file in the timeline index; never fail the hook."""
+    if update_timeline is None:
+        return
+    try:
+        with phase("timelineIndex"):
+            update_timeline(session_file)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[SessionEnd] Timeline index not updated ({e})", file=sys.stderr)
+
+
 def get_short_id(session_id: str) -> str:
     return session_id[:8] if session_id else "unknown"
 
@@ -49,34 +101,40 @@ def extract_text(content) -> str:
     return ""
 
 
-def parse_transcript(
-    transcript_path: str, fallback_meta: dict | None = None
-) -> tuple[list[dict], dict]:
+def new_parse_state() -> dict:
+    """Empty parser state; JSON-serializable so it can be checkpointed."""
+    return {
+        "messages": [],
+        "meta": {"session_id": "", "slug": "", "cwd": ""},
+        "tools_used": [],
+        "files_modified": [],
+        "parse_errors": 0,
+    }
+
+
+def parse_lines(state: dict, lines) -> dict:
     """
-    Parse a JSONL transcript from either Claude Code or Cursor.
+    Feed JSONL transcript lines into parser state (mutated and returned).
 
     Claude Code entries use {"type": "user"|"assistant", "sessionId": ..., "cwd": ...}.
     Cursor entries use {"role": "user"|"assistant"} with no session metadata inline.
-
-    Returns:
-        messages: [{"role": "user"|"assistant", "text": str}, ...]
-        meta:     {"session_id": str, "slug": str, "cwd": str,
-                   "tools_used": list[str], "files_modified": list[str]}
     """
-    messages: list[dict] = []
-    meta = {"session_id": "", "slug": "", "cwd": "", "tools_used": [], "files_modified": []}
-    tools_used: set[str] = set()
-    files_modified: set[str] = set()
-    parse_errors = 0
+    messages = state["messages"]
+    meta = state["meta"]
+    tools_used: set[str] = set(state["tools_used"])
+    files_modified: set[str] = set(state["files_modified"])
 
-    for line in Path(transcript_path).read_text(encoding="utf-8").splitlines():
+    for line in lines:
         line = line.strip()
         if not line:
             continue
         try:
             entry = json.loads(line)
         except json.JSONDecodeError:
-            parse_errors += 1
+            state["parse_errors"] += 1
+            continue
+        if not isinstance(entry, dict):
+            state["parse_errors"] += 1
             continue
 
         # Claude Code inline metadata
@@ -131,8 +189,30 @@ def parse_transcript(
             if file_path and tool_name in ("Edit", "Write"):
                 files_modified.add(file_path)
 
-    if parse_errors:
-        print(f"[SessionEnd] Skipped {parse_errors} unparseable lines", file=sys.stderr)
+    state["tools_used"] = sorted(tools_used)
+    state["files_modified"] = sorted(files_modified)
+    return state
+
+
+def read_new_lines(transcript_path: str, checkpoint: dict):
+    """
+    Stream complete lines after checkpoint["offset"], advancing the offset.
+
+    A trailing line without a newline is still being written and is left
+    for the next run.
+    """
+    with open(transcript_path, "rb") as f:
+        f.seek(checkpoint["offset"])
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            checkpoint["offset"] += len(raw)
+            yield raw.decode("utf-8", errors="replace")
+
+
+def finish_parse(state: dict, fallback_meta: dict | None = None) -> tuple[list[dict], dict]:
+    """Turn parser state into (messages, meta) as returned by parse_transcript."""
+    meta = dict(state["meta"])
 
     # Fill missing metadata from hook input (Cursor doesn't embed these in transcript)
     if fallback_meta:
@@ -140,88 +220,463 @@ def parse_transcript(
             if not meta[key] and fallback_meta.get(key):
                 meta[key] = fallback_meta[key]
 
-    meta["tools_used"] = sorted(tools_used)
-    meta["files_modified"] = sorted(files_modified)
-    return messages, meta
+    meta["tools_used"] = list(state["tools_used"])
+    meta["files_modified"] = list(state["files_modified"])
+    return state["messages"], meta
+
+
+def parse_transcript(
+    transcript_path: str, fallback_meta: dict | None = None
+) -> tuple[list[dict], dict]:
+    """
+    Parse a JSONL transcript from either Claude Code or Cursor.
+
+    Returns:
+        messages: [{"role": "user"|"assistant", "text": str}, ...]
+        meta:     {"session_id": str, "slug": str, "cwd": str,
+                   "tools_used": list[str], "files_modified": list[str]}
+    """
+    state = new_parse_state()
+    with open(transcript_path, encoding="utf-8", errors="replace") as f:
+        parse_lines(state, f)
+
+    if state["parse_errors"]:
+        print(f"[SessionEnd] Skipped {state['parse_errors']} unparseable lines", file=sys.stderr)
+
+    return finish_parse(state, fallback_meta)
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints: resume parsing where the previous hook run stopped
+# ---------------------------------------------------------------------------
+
+CHECKPOINT_MAX_AGE_DAYS = 30
+
+
+def get_checkpoint_path(transcript_path: str) -> Path:
+    key = hashlib.sha1(str(Path(transcript_path).resolve()).encode()).hexdigest()[:16]
+    return get_sessions_dir() / ".checkpoints" / f"{key}.json"
+
+
+def fresh_checkpoint(transcript_path: str) -> dict:
+    return {"inode": os.stat(transcript_path).st_ino, "offset": 0, "state": new_parse_state()}
+
+
+def load_checkpoint(transcript_path: str) -> dict:
+    """
+    Load the checkpoint for a transcript, or a fresh one.
+
+    A checkpoint is discarded if the transcript was replaced or truncated.
+    """
+    st = os.stat(transcript_path)
+    fresh = fresh_checkpoint(transcript_path)
+    try:
+        checkpoint = json.loads(get_checkpoint_path(transcript_path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return fresh
+    if checkpoint.get("inode") != st.st_ino or checkpoint.get("offset", 0) > st.st_size:
+        return fresh
+    return checkpoint
+
+
+@contextmanager
+def checkpoint_lock(transcript_path: str):
+    """
+    Hold an exclusive lock on a transcript's checkpoint.
+
+    Overlapping Stop/SessionEnd runs on the same transcript would otherwise
+    both resume from the same checkpoint and append the same turns twice.
+    """
+    if not fcntl:
+        yield
+        return
+    path = get_checkpoint_path(transcript_path).with_suffix(".lock")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def save_checkpoint(transcript_path: str, checkpoint: dict) -> None:
+    """Write the checkpoint atomically; prune checkpoints of long-gone sessions."""
+    path = get_checkpoint_path(transcript_path)
+    if not path.parent.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(checkpoint, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+    cutoff = time.time() - CHECKPOINT_MAX_AGE_DAYS * 86400
+    for old in [*path.parent.glob("*.json"), *path.parent.glob("*.lock")]:
+        try:
+            if old.stat().st_mtime < cutoff:
+                old.unlink()
+        except OSError:
+            pass
+
+
+def parse_checkpointed(
+    transcript_path: str, checkpoint: dict, fallback_meta: dict | None = None
+) -> tuple[list[dict], dict]:
+    """
+    Like parse_transcript, but only reads lines appended since the checkpoint.
+
+    The checkpoint is advanced in place; call save_checkpoint() with it once the
+    results have been persisted. Messages already written to the session file
+    have been dropped from the checkpoint, except the last one.
+    """
+    state = checkpoint["state"]
+    errors_before = state["parse_errors"]
+    offset_before = checkpoint["offset"]
+
+    with phase("parse"):
+        parse_lines(state, read_new_lines(transcript_path, checkpoint))
+    count("bytesRead", checkpoint["offset"] - offset_before)
+
+    if state["parse_errors"] > errors_before:
+        print(
+            f"[SessionEnd] Skipped {state['parse_errors'] - errors_before} unparseable lines",
+            file=sys.stderr,
+        )
+
+    return finish_parse(state, fallback_meta)
 
 
 # ---------------------------------------------------------------------------
 # Formatting
 # ---------------------------------------------------------------------------
 
+LAST_UPDATED_PREFIX = "**Last Updated:** "
+
+
+def format_message(msg: dict) -> str:
+    label = "**User**" if msg["role"] == "user" else "**Assistant**"
+    return f"{label}: {msg['text']}\n"
+
+
 def build_conversation(messages: list[dict]) -> str:
-    lines = []
-    for msg in messages:
-        label = "**User**" if msg["role"] == "user" else "**Assistant**"
-        lines.append(f"{label}: {msg['text']}")
-        lines.append("")
-    return "\n".join(lines)
+    return "\n".join(format_message(m) for m in messages)
+
+
+def build_header(record: dict, updated: str) -> str:
+    tools_line = ", ".join(record["tools"]) if record["tools"] else "—"
+    files_lines = "\n".join(f"- {f}" for f in record["files"]) if record["files"] else "—"
+    return (
+        f"# Session: {record['slug']}\n"
+        f"**Date:** {record['date']}\n"
+        f"**Project:** {record['project']}\n"
+        f"**Started:** {record['started']}\n"
+        f"{LAST_UPDATED_PREFIX}{updated}\n\n"
+        f"**Tools:** {tools_line}\n\n"
+        f"**Files Modified:**\n{files_lines}\n\n"
+        f"---\n\n"
+    )
 
 
 # ---------------------------------------------------------------------------
 # Session file management  (mirrors the JS reference)
+#
+# The checkpoint's "session" record remembers where the session file ends, where
+# its last message starts and a hash of that message's text. Each run appends
+# only the messages parsed since, rewriting the last one first if it grew
+# (assistant replies stream in), so the parser only has to keep that one message.
+# If the file was edited since (its size changed), the edits are kept: new
+# messages are appended after them and the header is no longer touched.
 # ---------------------------------------------------------------------------
 
-def run(transcript_path: str, fallback_meta: dict | None = None) -> None:
-    p = Path(transcript_path)
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def session_intact(record: dict) -> bool:
+    """True if the session file is exactly as the last run left it."""
+    try:
+        return os.path.getsize(record["file"]) == record["size"]
+    except OSError:
+        return False
+
+
+def adopt_edits(record: dict) -> None:
+    """
+    Re-anchor the record on a session file edited since the last run.
 
-    # .txt files: copy content directly
-    if p.suffix.lower() == ".txt":
+    Offsets into the file can no longer be trusted, so the header is left
+    alone from now on and the next messages go after the current end.
+    """
+    record["size"] = os.path.getsize(record["file"])
+    record["tailOffset"] = None
+    record["headerEdited"] = True
+    print(
+        f"[SessionEnd] {record['file']} was edited; appending new turns after the edits",
+        file=sys.stderr,
+    )
+
+
+def write_session(record: dict, messages: list[dict], current_time: str) -> None:
+    """Create or fully rewrite the session file, filling in the record's offsets."""
+    header = build_header(record, current_time).encode("utf-8")
+    blocks = [format_message(m).encode("utf-8") for m in messages]
+    body = b"\n".join(blocks)
+
+    Path(record["file"]).write_bytes(header + body)
+    count("bytesWritten", len(header) + len(body))
+
+    record["headerLen"] = len(header)
+    record["updatedOffset"] = header.index(LAST_UPDATED_PREFIX.encode("utf-8")) + len(
+        LAST_UPDATED_PREFIX.encode("utf-8")
+    )
+    record["tailOffset"] = len(header) + len(body) - len(blocks[-1])
+    record["tailHash"] = text_hash(messages[-1]["text"])
+    record["size"] = len(header) + len(body)
+
+
+def append_session(record: dict, messages: list[dict], meta: dict, current_time: str) -> None:
+    """
+    Bring an intact session file up to date with messages parsed since last run.
+
+    messages[0] is the message written last time. The Last Updated line is
+    patched in place; only when the tools/files metadata changed is the header
+    regenerated, which means copying the conversation behind it once. After
+    adopt_edits, the header stays as it is and a grown last message is
+    appended again rather than rewritten.
+    """
+    if text_hash(messages[0]["text"]) != record["tailHash"]:
+        if record["tailOffset"] is not None:
+            start, to_write, chunk = record["tailOffset"], messages, b""
+        else:
+            start, to_write, chunk = record["size"], messages, b"\n"
+    else:
+        start, to_write = record["size"], messages[1:]
+        chunk = b"\n" if to_write else b""
+    blocks = [format_message(m).encode("utf-8") for m in to_write]
+    chunk += b"\n".join(blocks)
+    tail_offset = start + len(chunk) - len(blocks[-1]) if blocks else record["tailOffset"]
+
+    with open(record["file"], "r+b") as f:
+        if record.get("headerEdited"):
+            f.seek(start)
+            f.write(chunk)
+            written_from = start
+        elif meta["tools_used"] != record["tools"] or meta["files_modified"] != record["files"]:
+            record["tools"] = list(meta["tools_used"])
+            record["files"] = list(meta["files_modified"])
+            header = build_header(record, current_time).encode("utf-8")
+            f.seek(record["headerLen"])
+            kept = f.read(start - record["headerLen"])
+            f.seek(0)
+            f.write(header + kept + chunk)
+            written_from = 0
+            tail_offset += len(header) - record["headerLen"]
+            record["headerLen"] = len(header)
+            record["updatedOffset"] = header.index(LAST_UPDATED_PREFIX.encode("utf-8")) + len(
+                LAST_UPDATED_PREFIX.encode("utf-8")
+            )
+        else:
+            f.seek(record["updatedOffset"])
+            f.write(current_time.encode("utf-8"))
+            f.seek(start)
+            f.write(chunk)
+            written_from = start
+        count("bytesWritten", f.tell() - written_from)
+        f.truncate()
+        record["size"] = f.tell()
+
+    record["tailOffset"] = tail_offset
+    record["tailHash"] = text_hash(messages[-1]["text"])
+
+
+def run_txt(transcript_path: str) -> None:
+    """Mirror a plain-text transcript, appending only bytes added since last run."""
+    p = Path(transcript_path)
+    checkpoint = load_checkpoint(transcript_path)
+    record = checkpoint.get("session")
+
+    # Edits to the session file are kept; new text is appended after them
+    if record and Path(record["file"]).exists():
+        with open(p, "rb") as src, open(record["file"], "ab") as dst:
+            src.seek(checkpoint["offset"])
+            shutil.copyfileobj(src, dst)
+            checkpoint["offset"] = src.tell()
+            record["size"] = dst.tell()
+        print(f"[SessionEnd] Appended txt to session file: {record['file']}", file=sys.stderr)
+    else:
         sessions_dir = get_sessions_dir()
         today = datetime.now().strftime("%Y-%m-%d")
-        short_id = p.stem[:8]
-        session_file = sessions_dir / f"{today}-{short_id}-session.md"
+        session_file = sessions_dir / f"{today}-{p.stem[:8]}-session.md"
         sessions_dir.mkdir(parents=True, exist_ok=True)
         shutil.copy2(p, session_file)
+        checkpoint["offset"] = os.path.getsize(p)
+        record = {"file": str(session_file), "size": os.path.getsize(session_file)}
         print(f"[SessionEnd] Copied txt to session file: {session_file}", file=sys.stderr)
-        return
 
-    # Default: parse as JSONL (supports both Claude Code and Cursor formats)
-    messages, meta = parse_transcript(transcript_path, fallback_meta)
+    checkpoint["session"] = record
+    save_checkpoint(transcript_path, checkpoint)
+    index_session_file(record["file"])
 
-    # Skip trivial sessions (fewer than 2 meaningful exchanges)
-    if sum(1 for m in messages if len(m["text"]) > 20) < 2:
-        return
 
-    sessions_dir = get_sessions_dir()
-    today = datetime.now().strftime("%Y-%m-%d")
+def run(transcript_path: str, fallback_meta: dict | None = None) -> None:
+    with checkpoint_lock(transcript_path):
+        # .txt files: copy content directly
+        if Path(transcript_path).suffix.lower() == ".txt":
+            run_txt(transcript_path)
+        else:
+            run_jsonl(transcript_path, fallback_meta)
+
+
+def run_jsonl(transcript_path: str, fallback_meta: dict | None = None) -> None:
+    # Parse as JSONL (supports both Claude Code and Cursor formats), resuming
+    # from where the previous hook run stopped. If the session file was
+    # removed since, start over so it can be rewritten in full; if it was
+    # edited, keep the edits and append after them.
+    checkpoint = load_checkpoint(transcript_path)
+    record = checkpoint.get("session")
+    if record and not Path(record["file"]).exists():
+        checkpoint = fresh_checkpoint(transcript_path)
+        record = None
+    elif record and not session_intact(record):
+        adopt_edits(record)
+    messages, meta = parse_checkpointed(transcript_path, checkpoint, fallback_meta)
     current_time = datetime.now().strftime("%H:%M")
-    short_id = get_short_id(meta["session_id"])
-    session_file = sessions_dir / f"{today}-{short_id}-session.md"
-    project = os.path.basename(meta["cwd"]) if meta["cwd"] else "unknown"
-    slug = meta["slug"] or short_id
-
-    sessions_dir.mkdir(parents=True, exist_ok=True)
-
-    if session_file.exists():
-        content = session_file.read_text(encoding="utf-8")
-        content = re.sub(
-            r"\*\*Last Updated:\*\*.*",
-            f"**Last Updated:** {current_time}",
-            content,
-        )
-        session_file.write_text(content, encoding="utf-8")
-        print(f"[SessionEnd] Updated session file: {session_file}", file=sys.stderr)
+
+    count("messages", len(messages))
+    if record:
+        if messages:
+            with phase("write"):
+                append_session(record, messages, meta, current_time)
+            index_session_file(record["file"])
+            print(f"[SessionEnd] Updated session file: {record['file']}", file=sys.stderr)
     else:
-        tools_line = ", ".join(meta["tools_used"]) if meta["tools_used"] else "—"
-        files_lines = (
-            "\n".join(f"- {f}" for f in meta["files_modified"])
-            if meta["files_modified"]
-            else "—"
-        )
-        content = (
-            f"# Session: {slug}\n"
-            f"**Date:** {today}\n"
-            f"**Project:** {project}\n"
-            f"**Started:** {current_time}\n"
-            f"**Last Updated:** {current_time}\n\n"
-            f"**Tools:** {tools_line}\n\n"
-            f"**Files Modified:**\n{files_lines}\n\n"
-            f"---\n\n"
-            f"{build_conversation(messages)}"
-        )
-        session_file.write_text(content, encoding="utf-8")
-        print(f"[SessionEnd] Created session file: {session_file}", file=sys.stderr)
+        # Skip trivial sessions (fewer than 2 meaningful exchanges)
+        if sum(1 for m in messages if len(m["text"]) > 20) < 2:
+            save_checkpoint(transcript_path, checkpoint)
+            return
+
+        sessions_dir = get_sessions_dir()
+        today = datetime.now().strftime("%Y-%m-%d")
+        short_id = get_short_id(meta["session_id"])
+        session_file = sessions_dir / f"{today}-{short_id}-session.md"
+        sessions_dir.mkdir(parents=True, exist_ok=True)
+
+        started = current_time
+        existed = session_file.exists()
+        if existed:
+            found = re.search(r"\*\*Started:\*\* (.*)", session_file.read_text(encoding="utf-8"))
+            if found:
+                started = found.group(1)
+
+        record = {
+            "file": str(session_file),
+            "date": today,
+            "project": os.path.basename(meta["cwd"]) if meta["cwd"] else "unknown",
+            "slug": meta["slug"] or short_id,
+            "started": started,
+            "tools": list(meta["tools_used"]),
+            "files": list(meta["files_modified"]),
+        }
+        with phase("write"):
+            write_session(record, messages, current_time)
+        index_session_file(record["file"])
+        verb = "Rewrote" if existed else "Created"
+        print(f"[SessionEnd] {verb} session file: {session_file}", file=sys.stderr)
+
+    # Everything but the last message is on disk now; stop carrying it around
+    checkpoint["state"]["messages"] = checkpoint["state"]["messages"][-1:]
+    checkpoint["session"] = record
+    save_checkpoint(transcript_path, checkpoint)
+
+
+# ---------------------------------------------------------------------------
+# Background queue: the hook drops a job file and returns; a detached worker
+# drains memory/.queue/, running each transcript once however many replies
+# queued it in the meantime.
+# ---------------------------------------------------------------------------
+
+def get_queue_dir() -> Path:
+    return get_sessions_dir() / ".queue"
+
+
+def enqueue_job(transcript_path: str, fallback_meta: dict) -> Path:
+    """Write a job record atomically; the .json name only appears once complete."""
+    queue_dir = get_queue_dir()
+    queue_dir.mkdir(parents=True, exist_ok=True)
+    job = {
+        "transcript_path": str(Path(transcript_path).resolve()),
+        "offset": os.path.getsize(transcript_path),
+        "session_id": fallback_meta.get("session_id", ""),
+        "fallback_meta": fallback_meta,
+    }
+    name = f"{time.time_ns()}-{os.getpid()}"
+    tmp = queue_dir / f"{name}.tmp"
+    tmp.write_text(json.dumps(job, ensure_ascii=False), encoding="utf-8")
+    path = queue_dir / f"{name}.json"
+    os.replace(tmp, path)
+    return path
+
+
+def spawn_worker() -> None:
+    """Start a detached drain process that outlives the hook."""
+    log = open(get_queue_dir() / "worker.log", "ab")
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--drain"],
+        stdin=subprocess.DEVNULL,
+        stdout=log,
+        stderr=log,
+        start_new_session=True,
+    )
+    log.close()
+
+
+def take_jobs(queue_dir: Path) -> tuple[dict, list[Path]]:
+    """Read queued jobs, keeping the newest per transcript."""
+    jobs: dict[str, dict] = {}
+    files = sorted(queue_dir.glob("*.json"))
+    for path in files:
+        try:
+            job = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(job, dict) and job.get("transcript_path"):
+            jobs[job["transcript_path"]] = job
+    return jobs, files
+
+
+def drain_queue() -> int:
+    """
+    Process queued jobs until the queue is empty; returns the number of runs.
+
+    Only one worker drains at a time. A worker that finds the lock taken exits
+    at once, and the lock holder re-checks the queue after releasing it, so a
+    job queued in between is never stranded.
+    """
+    queue_dir = get_queue_dir()
+    queue_dir.mkdir(parents=True, exist_ok=True)
+    runs = 0
+    while True:
+        with open(queue_dir / "drain.lock", "a") as lock:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return runs
+            while True:
+                jobs, files = take_jobs(queue_dir)
+                if not files:
+                    break
+                for job in jobs.values():
+                    if not Path(job["transcript_path"]).exists():
+                        continue
+                    try:
+                        run(job["transcript_path"], job.get("fallback_meta"))
+                        runs += 1
+                    except Exception as e:  # one bad transcript must not wedge the queue
+                        print(f"[SessionEnd] Failed {job['transcript_path']}: {e}", file=sys.stderr)
+                for path in files:
+                    path.unlink(missing_ok=True)
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        if not any(queue_dir.glob("*.json")):
+            return runs
 
 
 # ---------------------------------------------------------------------------
@@ -229,6 +684,14 @@ def run(transcript_path: str, fallback_meta: dict | None = None) -> None:
 # ---------------------------------------------------------------------------
 
 def main() -> None:
+    if metrics:
+        metrics.configure(*metrics.pop_arguments(sys.argv))
+    args = sys.argv[1:]
+    if "--drain" in args:
+        if fcntl:
+            drain_queue()
+        sys.exit(0)
+
     try:
         hook_input = json.load(sys.stdin)
     except (json.JSONDecodeError, EOFError, ValueError):
@@ -250,8 +713,18 @@ def main() -> None:
         "cwd": workspace_roots[0] if workspace_roots else "",
     }
 
+    if "--enqueue" in args and fcntl:
+        enqueue_job(transcript_path, fallback_meta)
+        spawn_worker()
+        return
+
     run(transcript_path, fallback_meta)
 
 
 if __name__ == "__main__":
-    main()
+    if metrics:
+        # Label worker and queueing runs apart from inline hook runs
+        mode = next((a for a in sys.argv[1:] if a in ("--drain", "--enqueue")), "")
+        metrics.run_main(f"save_chat_history{mode and ' ' + mode}", main)
+    else:
+        main()
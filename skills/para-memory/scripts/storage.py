@@ -0,0 +1,136 @@
+"""
+Crash-safe file writes and per-entity locking shared by the memory scripts.
+
+Writes go to a temp file in the same directory, are fsynced, then renamed over
+the target, so readers see either the old or the new file, never a truncated one.
+Read-modify-write cycles on an entity hold an advisory lock on <entity>/.lock,
+so concurrent writers to the same entity are serialized instead of losing updates.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking, writes are still atomic
+    fcntl = None
+
+
+LOCK_NAME = ".lock"
+
+
+def _fsync_dir(dir_path):
+    """Flush a directory entry so a completed rename survives a crash."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(dir_path, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, data):
+    """Replace path with data via temp file + fsync + rename."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates 0600; keep the permissions a plain write would have
+        if path.exists():
+            os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        metrics.count("bytesWritten", len(data))
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+
+
+def atomic_write_text(path, text, encoding="utf-8"):
+    """Replace path with text via temp file + fsync + rename."""
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+def append_durable(path, data):
+    """Append bytes to path and fsync, starting a fresh line after a torn write."""
+    with open(path, "a+b") as f:
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    metrics.count("bytesWritten", len(data))
+
+
+@contextmanager
+def entity_lock(entity_path):
+    """Hold an exclusive advisory lock on an entity directory.
+
+    Not re-entrant: do not nest locks on the same entity within one process.
+    """
+    lock_path = Path(entity_path) / LOCK_NAME
+    with open(lock_path, "a") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+PARA_DIRS = ("projects", "areas", "resources", "archives")
+# Archived entities keep their original path below archives/, e.g.
+# archives/areas/people/jane-doe (see archive_entities.py)
+ARCHIVE_DIR = "archives"
+
+
+def knowledge_root(entity_path):
+    """Return the knowledge/ directory an entity lives under.
+
+    This is the parent of the nearest ancestor named after a PARA category
+    (projects/, areas/, resources/, archives/), skipping over nested category
+    directories such as archives/projects/.
+    """
+    entity_path = Path(entity_path).resolve()
+    for parent in entity_path.parents:
+        if parent.name in PARA_DIRS:
+            while parent.parent.name in PARA_DIRS:
+                parent = parent.parent
+            return parent.parent
+    return entity_path.parent.parent
+
+
+def is_archived(key):
+    """Whether an entity key (see entity_key) lies under archives/."""
+    return key.split("/", 1)[0] == ARCHIVE_DIR
+
+
+def entity_key(entity_path, root=None):
+    """Return an entity's path relative to the knowledge root, e.g. areas/people/jane-doe."""
+    entity_path = Path(entity_path).resolve()
+    root = Path(root).resolve() if root else knowledge_root(entity_path)
+    return entity_path.relative_to(root).as_posix()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+SQLite index of the daily-notes timeline in memory/.
+
+Every note (YYYY-MM-DD.md daily notes and YYYY-MM-DD-<id>-session.md session
+files) is keyed by date and session in <memory>/.timeline.db, and split into
+paragraphs for an FTS5 keyword index, so range and keyword searches are
+index lookups that return previews and snippets instead of whole files
+(`date` still prints the day's notes in full).
+
+The index is kept current incrementally: the SessionEnd hook re-indexes each
+session file it writes once the index exists, weekly_synthesis.py --watch
+re-indexes notes as they change, and `sync` re-indexes only notes whose size
+or mtime changed (or that appeared or disappeared). Queries skip the sync
+unless a cheap check finds something new: a directory under memory/ whose
+entries changed (a note was created, renamed or deleted), or a note dated
+today or yesterday that was edited in place. Run `sync` after editing older
+notes by other means.
+
+This script only needs the standard library and metrics.py, so
+install_hooks.py can copy it next to save_chat_history.py.
+
+Usage: python timeline_index.py rebuild [memory_dir]
+       python timeline_index.py sync [memory_dir]
+       python timeline_index.py date <YYYY-MM-DD> [memory_dir]
+       python timeline_index.py range <start> <end> [memory_dir] [--full]
+       python timeline_index.py keyword <term> [memory_dir] [--since DATE]
+                                [--until DATE] [--limit N]
+
+If memory_dir is not provided, uses PARA_MEMORY_ROOT environment variable.
+If environment variable not set, defaults to ~/para-memory/memory.
+"""
+
+import os
+import re
+import hashlib
+import sys
+import sqlite3
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+
+import metrics
+
+
+INDEX_NAME = ".timeline.db"
+PREVIEW_CHARS = 200
+DEFAULT_LIMIT = 50
+
+NOTE_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:-(.+?))?(?:-session)?$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    path TEXT PRIMARY KEY,
+    date TEXT,
+    session TEXT,
+    size INTEGER,
+    mtime INTEGER,
+    preview TEXT
+);
+CREATE INDEX IF NOT EXISTS notes_date ON notes (date, path);
+CREATE TABLE IF NOT EXISTS chunks (
+    cid INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    line INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_path ON chunks (path);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime INTEGER,
+    names TEXT
+);
+"""
+
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text)"
+
+
+def get_memory_dir(provided_path=None):
+    """Get the memory/ directory from argument, environment variable, or default."""
+    if provided_path:
+        return Path(os.path.expanduser(provided_path))
+
+    env_path = os.environ.get('PARA_MEMORY_ROOT')
+    if env_path:
+        return Path(os.path.expanduser(env_path)) / "memory"
+
+    return Path(os.path.expanduser('~/para-memory/memory'))
+
+
+def connect(db_path):
+    """Open (creating if needed) the timeline index database."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    try:
+        conn.execute(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        pass  # SQLite built without FTS5: keyword search falls back to LIKE
+    return conn
+
+
+def has_fts(conn):
+    """Whether the full-text table exists."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def note_key(name):
+    """(date, session) for a note file name; (None, None) if it is undated."""
+    match = NOTE_NAME.match(Path(name).stem)
+    if not match:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+def split_paragraphs(text):
+    """Yield (line_no, paragraph) for each blank-line separated block."""
+    start, block = None, []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if line.strip():
+            if start is None:
+                start = line_no
+            block.append(line)
+        elif block:
+            yield start, "\n".join(block)
+            start, block = None, []
+    if block:
+        yield start, "\n".join(block)
+
+
+def preview(paragraphs):
+    """Short description of a note: its first paragraphs, whitespace-collapsed."""
+    text = ""
+    for _, paragraph in paragraphs:
+        text = f"{text} {' '.join(paragraph.split())}".strip()
+        if len(text) >= PREVIEW_CHARS:
+            return text[:PREVIEW_CHARS - 1] + "…"
+    return text
+
+
+def iter_notes(memory_dir):
+    """Yield (relative path, absolute path) for every note, skipping dot dirs."""
+    for path in sorted(memory_dir.rglob("*.md")):
+        rel = path.relative_to(memory_dir)
+        if not any(part.startswith(".") for part in rel.parts):
+            yield rel.as_posix(), path
+
+
+def dir_state(path):
+    """(mtime_ns, hash of the entry names, subdirectories) of a directory, dot entries left out.
+
+    The mtime is taken before listing, so an entry added in between shows up
+    as a changed mtime next time.
+    """
+    mtime = path.stat().st_mtime_ns
+    names, subdirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            names.append(entry.name)
+            if entry.is_dir():
+                subdirs.append(Path(entry.path))
+    names_hash = hashlib.sha1("\0".join(sorted(names)).encode("utf-8")).hexdigest()
+    return mtime, names_hash, subdirs
+
+
+def note_dirs(memory_dir):
+    """{relative path: (mtime_ns, names hash)} of memory_dir and its subdirectories."""
+    dirs, pending = {}, [memory_dir]
+    while pending:
+        path = pending.pop()
+        mtime, names_hash, subdirs = dir_state(path)
+        dirs[path.relative_to(memory_dir).as_posix()] = (mtime, names_hash)
+        pending.extend(subdirs)
+    return dirs
+
+
+def _delete_note(conn, rel, fts):
+    if fts:
+        conn.execute(
+            "DELETE FROM chunks_fts WHERE rowid IN (SELECT cid FROM chunks WHERE path = ?)", (rel,)
+        )
+    conn.execute("DELETE FROM chunks WHERE path = ?", (rel,))
+    conn.execute("DELETE FROM notes WHERE path = ?", (rel,))
+
+
+def _index_note(conn, rel, path, fts):
+    st = path.stat()
+    raw = path.read_bytes()
+    metrics.count("bytesRead", len(raw))
+    text = raw.decode("utf-8", errors="replace")
+    paragraphs = list(split_paragraphs(text))
+    date, session = note_key(path.name)
+
+    _delete_note(conn, rel, fts)
+    conn.execute(
+        "INSERT INTO notes (path, date, session, size, mtime, preview) VALUES (?, ?, ?, ?, ?, ?)",
+        (rel, date, session, st.st_size, st.st_mtime_ns, preview(paragraphs)),
+    )
+    for line_no, paragraph in paragraphs:
+        cur = conn.execute(
+            "INSERT INTO chunks (path, line, text) VALUES (?, ?, ?)", (rel, line_no, paragraph)
+        )
+        if fts:
+            conn.execute(
+                "INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)", (cur.lastrowid, paragraph)
+            )
+
+
+def sync(conn, memory_dir, full=False):
+    """Re-index notes whose size/mtime changed; drop removed ones. Returns (indexed, removed)."""
+    fts = has_fts(conn)
+    known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT path, size, mtime FROM notes")}
+    indexed = 0
+    with metrics.phase("sync"), conn:
+        # Taken before the walk, so a note created during it is caught next time
+        conn.execute("DELETE FROM dirs")
+        conn.executemany("INSERT INTO dirs (path, mtime, names) VALUES (?, ?, ?)",
+                         [(rel, *state) for rel, state in note_dirs(memory_dir).items()])
+        for rel, path in iter_notes(memory_dir):
+            st = path.stat()
+            previous = known.pop(rel, None)
+            if full or previous != (st.st_size, st.st_mtime_ns):
+                _index_note(conn, rel, path, fts)
+                indexed += 1
+        for rel in known:
+            _delete_note(conn, rel, fts)
+    metrics.count("notesIndexed", indexed)
+    return indexed, len(known)
+
+
+def update_note(note_path, memory_dir=None):
+    """Re-index one note just written (or drop a deleted one), if the timeline index exists.
+
+    Called by the SessionEnd hook; errors are left to the caller.
+    """
+    note_path = Path(note_path).resolve()
+    memory_dir = get_memory_dir(memory_dir).resolve()
+    db_path = memory_dir / INDEX_NAME
+    if not db_path.exists() or memory_dir not in note_path.parents:
+        return False
+    conn = connect(db_path)
+    rel = note_path.relative_to(memory_dir).as_posix()
+    try:
+        with conn:
+            if note_path.exists():
+                _index_note(conn, rel, note_path, has_fts(conn))
+            else:
+                _delete_note(conn, rel, has_fts(conn))
+    finally:
+        conn.close()
+    return True
+
+
+def notes_in_range(conn, start, end):
+    """Dated notes with start <= date <= end, in date order."""
+    return conn.execute(
+        "SELECT path, date, session, preview FROM notes "
+        "WHERE date >= ? AND date <= ? ORDER BY date, session IS NOT NULL, path",
+        (start, end),
+    ).fetchall()
+
+
+def search(conn, term, since=None, until=None, limit=DEFAULT_LIMIT):
+    """Paragraphs matching term, newest first, as (path, date, line, snippet)."""
+    clauses, params = [], []
+    if since:
+        clauses.append("n.date >= ?")
+        params.append(since)
+    if until:
+        clauses.append("n.date <= ?")
+        params.append(until)
+    where = "".join(f" AND {clause}" for clause in clauses)
+    limit_sql = " LIMIT ?" if limit else ""
+    tail = [limit] if limit else []
+
+    if has_fts(conn):
+        sql = (
+            "SELECT c.path, n.date, c.line, "
+            "snippet(chunks_fts, 0, '**', '**', '…', 16) "
+            "FROM chunks_fts JOIN chunks c ON c.cid = chunks_fts.rowid "
+            "JOIN notes n ON n.path = c.path "
+            f"WHERE chunks_fts MATCH ?{where} "
+            f"ORDER BY n.date DESC, c.path, c.line{limit_sql}"
+        )
+        try:
+            return conn.execute(sql, [term, *params, *tail]).fetchall()
+        except sqlite3.OperationalError:
+            # Not valid FTS5 syntax (e.g. "foo-bar"): search it as a phrase
+            phrase = '"' + term.replace('"', '""') + '"'
+            return conn.execute(sql, [phrase, *params, *tail]).fetchall()
+
+    rows = conn.execute(
+        "SELECT c.path, n.date, c.line, c.text FROM chunks c JOIN notes n ON n.path = c.path "
+        f"WHERE c.text LIKE '%' || ? || '%'{where} "
+        f"ORDER BY n.date DESC, c.path, c.line{limit_sql}",
+        [term, *params, *tail],
+    ).fetchall()
+    return [(path, date, line, " ".join(text.split())[:PREVIEW_CHARS]) for path, date, line, text in rows]
+
+
+def needs_sync(conn, memory_dir):
+    """Whether the notes may have changed since the last sync, without a full walk.
+
+    Notes created, renamed or deleted change the mtime of their directory
+    (as do the index's own WAL files, hence the names check behind it);
+    in-place edits do not, so only notes dated today or yesterday (the ones
+    still being written) are checked for those.
+    """
+    dirs = conn.execute("SELECT path, mtime, names FROM dirs").fetchall()
+    if not dirs:
+        return True
+    for rel, mtime, names_hash in dirs:
+        try:
+            if (memory_dir / rel).stat().st_mtime_ns == mtime:
+                continue
+            if dir_state(memory_dir / rel)[1] != names_hash:
+                return True
+        except FileNotFoundError:
+            return True
+    recent = (date.today() - timedelta(days=1)).isoformat()
+    for rel, size, mtime in conn.execute(
+        "SELECT path, size, mtime FROM notes WHERE date >= ?", (recent,)
+    ):
+        try:
+            st = (memory_dir / rel).stat()
+        except FileNotFoundError:
+            return True
+        if (st.st_size, st.st_mtime_ns) != (size, mtime):
+            return True
+    return False
+
+
+def open_index(memory_dir):
+    """Connect to the index, creating it or catching up with the notes if needed."""
+    conn = connect(memory_dir / INDEX_NAME)
+    if needs_sync(conn, memory_dir):
+        sync(conn, memory_dir)
+    return conn
+
+
+def print_notes(memory_dir, rows, full):
+    for path, date, session, note_preview in rows:
+        print(f"=== {path} ===")
+        if full:
+            print((memory_dir / path).read_text(encoding="utf-8", errors="replace"))
+        else:
+            print(note_preview)
+            print("")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed search over the daily-notes timeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("rebuild", "sync"):
+        cmd = sub.add_parser(name, help=f"{name.capitalize()} the timeline index")
+        cmd.add_argument("memory_dir", nargs="?", help="memory/ directory")
+
+    date_cmd = sub.add_parser("date", help="Notes for one date")
+    date_cmd.add_argument("date", help="YYYY-MM-DD")
+    date_cmd.add_argument("memory_dir", nargs="?", help="memory/ directory")
+
+    range_cmd = sub.add_parser("range", help="Notes in a date range (inclusive)")
+    range_cmd.add_argument("start", help="YYYY-MM-DD")
+    range_cmd.add_argument("end", help="YYYY-MM-DD")
+    range_cmd.add_argument("memory_dir", nargs="?", help="memory/ directory")
+    range_cmd.add_argument("--full", action="store_true", help="Print whole notes, not previews")
+
+    kw = sub.add_parser("keyword", help="Full-text search, newest notes first")
+    kw.add_argument("term", help="Keyword or FTS5 query")
+    kw.add_argument("memory_dir", nargs="?", help="memory/ directory")
+    kw.add_argument("--since", metavar="DATE", help="Only notes dated >= DATE")
+    kw.add_argument("--until", metavar="DATE", help="Only notes dated <= DATE")
+    kw.add_argument("--limit", type=int, default=DEFAULT_LIMIT,
+                    help=f"Maximum matches (default: {DEFAULT_LIMIT}, 0 = no limit)")
+
+    for command in sub.choices.values():
+        metrics.add_arguments(command)
+
+    args = parser.parse_args()
+    metrics.configure(args.metrics, args.profile)
+    memory_dir = get_memory_dir(args.memory_dir)
+
+    if not memory_dir.exists():
+        print(f"Error: Path not found: {memory_dir}")
+        sys.exit(1)
+
+    if args.command in ("rebuild", "sync"):
+        conn = connect(memory_dir / INDEX_NAME)
+        try:
+            indexed, removed = sync(conn, memory_dir, full=args.command == "rebuild")
+        finally:
+            conn.close()
+        print(f"✓ Indexed {indexed} notes, removed {removed} ({memory_dir / INDEX_NAME})")
+        return
+
+    conn = open_index(memory_dir)
+    try:
+        with metrics.phase("query"):
+            if args.command == "date":
+                rows = notes_in_range(conn, args.date, args.date)
+                if not rows:
+                    print(f"No notes found for date: {args.date}")
+                    sys.exit(1)
+                print_notes(memory_dir, rows, full=True)
+            elif args.command == "range":
+                print(f"Searching notes from {args.start} to {args.end}...")
+                print_notes(memory_dir, notes_in_range(conn, args.start, args.end), args.full)
+            else:
+                print(f"Searching for keyword: {args.term}")
+                for path, date, line, snippet in search(conn, args.term, args.since, args.until, args.limit):
+                    print(f"{path}:{line}: {' '.join(snippet.split())}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    metrics.run_main("timeline_index", main)
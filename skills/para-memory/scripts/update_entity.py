@@ -3,48 +3,486 @@
 Add or update facts in an entity's items.json.
 
 Usage: python update_entity.py <entity_path> --add <fact_json>
+       python update_entity.py <entity_path> --shard
+       python update_entity.py <entity_path> --format compact|pretty
+       python update_entity.py <entity_path> --export [file]
        python update_entity.py <entity_path> --supersede <old_fact_id> <new_fact_json>
+       python update_entity.py [entity_path] --batch [ops.jsonl]
+
+Batch mode reads one JSON operation per line (from a file, or stdin when the
+file is omitted or "-"):
+  {"entity": "<entity_path>", "op": "add", "fact": {...}}
+  {"entity": "<entity_path>", "op": "supersede", "oldId": "<fact_id>", "fact": {...}}
+Operations are grouped by entity and each entity is loaded and written once.
+"entity" may be omitted when entity_path is given on the command line.
+One JSON result line is printed per operation, in input order.
+
+With --append-log (or PARA_MEMORY_APPEND_LOG=1), changes are appended to the
+entity's items.log.jsonl instead of rewriting items.json. Readers replay the
+log on load; --compact (or weekly_synthesis.py) folds it back into items.json.
+
+--shard moves superseded facts into history/<year>.json so items.json only
+holds active facts; weekly_synthesis.py keeps sharded entities that way.
+The fact index still covers the full history.
+
+items.json (and history shards) can be stored pretty-printed (the default)
+or compact: minified, with fields that still hold add_fact's defaults left
+out. Readers accept both. PARA_MEMORY_FORMAT=compact|pretty picks the format
+for every write; otherwise an entity keeps the format it already has.
+--format rewrites one entity; --export prints the full pretty form.
 """
 
+import os
 import sys
 import json
 from pathlib import Path
 from datetime import datetime
+import sqlite3
 import argparse
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+import metrics
+from entity_catalog import catalog_entity
+from fact_index import fingerprint, load_redirects, resolve_ref, sync_entity_index
+from errors import EntityNotFound, FactNotFound, InvalidFact, ParaMemoryError
+from storage import append_durable, atomic_write_text, entity_key, entity_lock, knowledge_root
+
+
+REQUIRED_FIELDS = ["fact", "category", "timestamp", "source"]
+LOG_NAME = "items.log.jsonl"
+HISTORY_DIR = "history"
+FORMATS = ("pretty", "compact")
+# Field key listing which of a fact's defaulted fields were absent before compaction
+ABSENT_KEY = "-"
+# Moves followed by locked_entity before giving up
+MAX_MOVES = 8
+
+
+def fact_defaults(fact, last_accessed=None):
+    """The values add_fact fills in for a fact, in the order it adds them.
+
+    add_fact sets lastAccessed to the day the fact was added; a compact file
+    records the most common such day as last_accessed. Files written before
+    it did fall back to the fact's timestamp date.
+    """
+    return {
+        "status": "active",
+        "supersededBy": None,
+        "relatedEntities": [],
+        "lastAccessed": last_accessed or str(fact.get("timestamp") or "")[:10],
+        "accessCount": 0,
+    }
+
+
+def compact_fact(fact, last_accessed=None):
+    """A fact with default-valued fields dropped (see expand_fact).
+
+    expand_fact appends dropped fields in add_fact's order, so only a
+    trailing run of default-valued fields in that order is dropped; any
+    other field is kept in place and the key order survives a round trip.
+    """
+    defaults = fact_defaults(fact, last_accessed)
+    order = list(defaults)
+    keys = list(fact)
+    cut = len(keys)
+    while cut:
+        key = keys[cut - 1]
+        if key not in defaults or fact[key] != defaults[key]:
+            break
+        if cut < len(keys) and order.index(key) > order.index(keys[cut]):
+            break
+        cut -= 1
+    compact = {key: fact[key] for key in keys[:cut]}
+    absent = [k for k in defaults if k not in fact]
+    if absent:
+        compact[ABSENT_KEY] = absent
+    return compact
+
+
+def expand_fact(fact, last_accessed=None):
+    """Inverse of compact_fact: restore the dropped fields."""
+    if ABSENT_KEY in fact:
+        fact = dict(fact)
+        absent = fact.pop(ABSENT_KEY)
+    else:
+        absent = ()
+    for key, value in fact_defaults(fact, last_accessed).items():
+        if key not in fact and key not in absent:
+            fact[key] = list(value) if isinstance(value, list) else value
+    return fact
+
+
+def decode_items(text):
+    """Parse items.json or history shard text in either format."""
+    data = json.loads(text)
+    if data.get("format") == "compact":
+        del data["format"]
+        last_accessed = (data.pop("defaults", None) or {}).get("lastAccessed")
+        data["items"] = [expand_fact(f, last_accessed) for f in data.get("items", [])]
+    return data
+
+
+def encode_items(data, fmt="pretty"):
+    """Serialize items.json or history shard data in the given format."""
+    if fmt == "compact":
+        # Facts added the same day share their lastAccessed until first read
+        days = Counter(f.get("lastAccessed") for f in data["items"] if f.get("lastAccessed"))
+        last_accessed = days.most_common(1)[0][0] if days else None
+        compact = {
+            "format": "compact",
+            **({"defaults": {"lastAccessed": last_accessed}} if last_accessed else {}),
+            **data,
+            "items": [compact_fact(f, last_accessed) for f in data["items"]],
+        }
+        return json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def file_format(path):
+    """Format of an existing items file, from its first bytes; None if missing."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(20)
+    except FileNotFoundError:
+        return None
+    return "compact" if head.startswith(b'{"format":"compact"') else "pretty"
+
+
+def write_format(path):
+    """Format to write path in: PARA_MEMORY_FORMAT, else the file's current one."""
+    fmt = os.environ.get("PARA_MEMORY_FORMAT", "")
+    if fmt in FORMATS:
+        return fmt
+    return file_format(path) or "pretty"
+
+
+def write_items_file(path, data, fmt=None):
+    """Atomically write an items.json or history shard file."""
+    atomic_write_text(path, encode_items(data, fmt or write_format(path)))
+
+
+def follow_move(entity_path):
+    """Current path of an entity archived or restored since entity_path was resolved.
+
+    Raises EntityNotFound if the redirect table does not lead to an entity.
+    """
+    root = knowledge_root(entity_path)
+    key = entity_key(entity_path, root)
+    # archive_entities.py holds this lock from the move until its redirect
+    # is saved
+    with entity_lock(root):
+        redirects = load_redirects(root)
+    target = resolve_ref(key, redirects)
+    if target == key or not (root / target / "items.json").exists():
+        raise EntityNotFound(f"items.json not found at {Path(entity_path) / 'items.json'}")
+    return root / target
+
+
+@contextmanager
+def locked_entity(entity_path):
+    """Hold an entity's lock, following the entity if it moved; yields its current path.
+
+    archive_entities.py moves entity directories while holding their lock, so
+    a writer waiting on that lock wakes up in a directory that is gone.
+    Raises EntityNotFound if the entity does not exist.
+    """
+    entity_path = Path(entity_path)
+    for _ in range(MAX_MOVES):
+        lock = ExitStack()
+        try:
+            lock.enter_context(entity_lock(entity_path))
+        except FileNotFoundError:
+            pass  # moved before its lock file could be opened
+        else:
+            if (entity_path / "items.json").exists():
+                with lock:
+                    yield entity_path
+                return
+            lock.close()
+        entity_path = follow_move(entity_path)
+    raise EntityNotFound(f"Entity kept moving: {entity_path}")
+
+
+def use_append_log():
+    """Whether PARA_MEMORY_APPEND_LOG asks for log-structured writes."""
+    return os.environ.get("PARA_MEMORY_APPEND_LOG", "") not in ("", "0")
+
+
+def load_items(entity_path):
+    """Load items.json for an entity, replaying any pending fact log."""
+    with metrics.phase("load"):
+        items_path = Path(entity_path) / "items.json"
+        raw = items_path.read_bytes()
+        metrics.count("bytesRead", len(raw))
+        data = decode_items(raw.decode("utf-8"))
+
+        log_path = Path(entity_path) / LOG_NAME
+        if log_path.exists():
+            raw = log_path.read_bytes()
+            metrics.count("bytesRead", len(raw))
+            replay_log(data, raw.decode("utf-8").splitlines())
+    metrics.count("entitiesLoaded")
+    metrics.count("factsLoaded", len(data["items"]))
+    return data
+
+
+def replay_log(data, lines):
+    """Apply fact-log events to items.json data in order.
+
+    Replay is idempotent: adds whose ID is already present are skipped, so a
+    log that survived a compaction is harmless. Unparseable lines (e.g. a
+    torn final write) are ignored. Add events carry the entity's fact counter,
+    so files without one are not re-scanned on every load.
+    """
+    by_id = {item.get("id"): item for item in data["items"]}
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(event, dict):
+            continue
+
+        if event.get("op") == "add":
+            fact = event.get("fact")
+            if not isinstance(fact, dict) or fact.get("id") in by_id:
+                continue
+            data["items"].append(fact)
+            by_id[fact.get("id")] = fact
+            counter = event.get("counter")
+            if isinstance(counter, int):
+                data["factCounter"] = max(data.get("factCounter", 0), counter)
+            else:
+                # Logs written before events carried the counter
+                num = fact_number(fact.get("id", ""))
+                if num is not None and num > ensure_fact_counter(data):
+                    data["factCounter"] = num
+        elif event.get("op") == "supersede":
+            item = by_id.get(event.get("id"))
+            if item is not None:
+                item["status"] = "superseded"
+                item["supersededBy"] = event.get("by")
+        else:
+            continue
+
+        if event.get("at"):
+            data["lastModified"] = event["at"]
+
+
+def write_items(entity_path, data, fmt=None):
+    """Write a full items.json snapshot, folding away any fact log."""
+    write_items_file(Path(entity_path) / "items.json", data, fmt)
+
+    # data was materialized from the log, so it is now redundant
+    log_path = Path(entity_path) / LOG_NAME
+    if log_path.exists():
+        log_path.unlink()
+
+
+def save_items(entity_path, data):
+    """Write items.json for an entity."""
+    data["lastModified"] = datetime.now().isoformat()
+    write_items(entity_path, data)
+
+
+def append_log(entity_path, events):
+    """Append fact events to the entity's log without touching items.json."""
+    at = datetime.now().isoformat()
+    lines = "".join(
+        json.dumps({**event, "at": at}, ensure_ascii=False) + "\n" for event in events
+    )
+    append_durable(Path(entity_path) / LOG_NAME, lines.encode("utf-8"))
+
+
+def commit_changes(entity_path, data, events, append=None):
+    """Persist mutations either as log events or as a full snapshot."""
+    if append is None:
+        append = use_append_log()
+    previous = fingerprint(entity_path)
+    with metrics.phase("write"):
+        if append:
+            append_log(entity_path, events)
+        else:
+            save_items(entity_path, data)
+    update_fact_index(entity_path, data, events, previous)
+    update_catalog(entity_path, data)
+
+
+def update_catalog(entity_path, data, history_facts=None):
+    """Keep the entity catalog (if built) in sync; never fail the write."""
+    try:
+        with metrics.phase("catalog"):
+            catalog_entity(entity_path, data, history_facts)
+    except OSError as e:
+        print(f"Warning: entity catalog not updated ({e}); run entity_catalog.py rebuild",
+              file=sys.stderr)
+
+
+def update_fact_index(entity_path, data, events=None, previous=None):
+    """Keep the SQLite fact index (if built) in sync; never fail the write."""
+    try:
+        with metrics.phase("factIndex"):
+            sync_entity_index(entity_path, data, events, previous)
+    except sqlite3.Error as e:
+        print(f"Warning: fact index not updated ({e}); run fact_index.py sync", file=sys.stderr)
+
+
+def compact_entity(entity_path):
+    """Fold an entity's fact log into items.json. Returns True if there was one."""
+    if not (Path(entity_path) / LOG_NAME).exists():
+        return False
+    with locked_entity(entity_path) as entity_path:
+        if not (entity_path / LOG_NAME).exists():
+            return False  # folded while we waited for the lock
+        previous = fingerprint(entity_path)
+        data = load_items(entity_path)
+        write_items(entity_path, data)
+        update_fact_index(entity_path, data, [], previous)
+    return True
+
+
+def history_shard_name(fact):
+    """History shard a superseded fact belongs in, by the year of its timestamp."""
+    year = str(fact.get("timestamp") or "")[:4]
+    return f"{year}.json" if len(year) == 4 and year.isdigit() else "undated.json"
+
+
+def load_history(entity_path):
+    """Superseded facts migrated out of items.json, oldest shard first."""
+    history_path = Path(entity_path) / HISTORY_DIR
+    items = []
+    if history_path.is_dir():
+        for shard in sorted(history_path.glob("*.json")):
+            raw = shard.read_bytes()
+            metrics.count("bytesRead", len(raw))
+            items.extend(decode_items(raw.decode("utf-8")).get("items", []))
+    return items
+
+
+def with_history(entity_path, data):
+    """items.json data with the entity's history shards merged in front."""
+    history = load_history(entity_path)
+    return {**data, "items": history + data["items"]} if history else data
+
+
+def shard_entity(entity_path):
+    """Move superseded facts out of items.json into history/<year>.json.
+
+    items.json then holds only active facts, so everyday reads and writes no
+    longer parse the entity's whole history. Shards are written before
+    items.json and de-duplicated by ID, so an interrupted run is simply
+    repeated. Returns the number of facts moved. Raises EntityNotFound if the
+    entity does not exist.
+    """
+    with locked_entity(entity_path) as entity_path:
+        history_path = entity_path / HISTORY_DIR
+        previous = fingerprint(entity_path)
+        data = load_items(entity_path)
+        moved = [f for f in data["items"] if f.get("status") == "superseded"]
+        if not moved:
+            return 0
+        # Derive the counter while every ID is still in items.json, so IDs
+        # moved to history/ are never handed out again
+        ensure_fact_counter(data)
+        history_path.mkdir(exist_ok=True)
+
+        by_shard = {}
+        for fact in moved:
+            by_shard.setdefault(history_shard_name(fact), []).append(fact)
+        for name, facts in sorted(by_shard.items()):
+            shard_path = history_path / name
+            if shard_path.exists():
+                shard = decode_items(shard_path.read_text(encoding="utf-8"))
+            else:
+                shard = {"entityId": data.get("entityId"), "items": []}
+            known = {f.get("id") for f in shard["items"]}
+            shard["items"].extend(f for f in facts if f.get("id") not in known)
+            write_items_file(shard_path, shard, write_format(Path(entity_path) / "items.json"))
+
+        data["items"] = [f for f in data["items"] if f.get("status") != "superseded"]
+        write_items(entity_path, data)
+        # Same facts, new files: only the index fingerprint needs updating
+        update_fact_index(entity_path, data, [], previous)
+        update_catalog(entity_path, data, len(load_history(entity_path)))
+    return len(moved)
+
+
+def convert_entity(entity_path, fmt):
+    """Rewrite an entity's items.json and history shards in the given format."""
+    with locked_entity(entity_path) as entity_path:
+        previous = fingerprint(entity_path)
+        data = load_items(entity_path)
+        write_items(entity_path, data, fmt)
+        history_path = Path(entity_path) / HISTORY_DIR
+        if history_path.is_dir():
+            for shard_path in sorted(history_path.glob("*.json")):
+                shard = decode_items(shard_path.read_text(encoding="utf-8"))
+                write_items_file(shard_path, shard, fmt)
+        update_fact_index(entity_path, data, [], previous)
+
+
+def export_items(entity_path):
+    """Full pretty-printed items.json text for an entity, in either stored format."""
+    return encode_items(load_items(entity_path), "pretty") + "\n"
+
+
+def fact_number(fact_id):
+    """Return the numeric suffix of a fact ID, or None if it has none."""
+    try:
+        return int(str(fact_id).split("-")[-1])
+    except (ValueError, IndexError):
+        return None
+
+
+def ensure_fact_counter(data):
+    """Return the entity's fact ID counter, deriving it once for older files.
+
+    items.json files written before the counter existed are migrated by
+    scanning their IDs a single time; the result is persisted on next save.
+    """
+    if "factCounter" not in data:
+        max_id = 0
+        for item in data["items"]:
+            num = fact_number(item.get("id", ""))
+            if num is not None:
+                max_id = max(max_id, num)
+        data["factCounter"] = max_id
+    return data["factCounter"]
 
 
-def generate_fact_id(entity_path):
-    """Generate unique fact ID."""
-    items_path = Path(entity_path) / "items.json"
-    data = json.loads(items_path.read_text())
-
-    # Find highest existing ID number
-    max_id = 0
-    for item in data["items"]:
-        if "id" in item:
-            try:
-                num = int(item["id"].split("-")[-1])
-                max_id = max(max_id, num)
-            except (ValueError, IndexError):
-                pass
+def generate_fact_id(entity_path, data):
+    """Allocate the next unique fact ID from the entity's counter."""
+    counter = ensure_fact_counter(data) + 1
+    data["factCounter"] = counter
 
     entity_name = Path(entity_path).name
-    return f"{entity_name}-{max_id + 1:03d}"
-
+    return f"{entity_name}-{counter:03d}"
 
-def add_fact(entity_path, fact_data):
-    """Add a new fact to items.json."""
-    items_path = Path(entity_path) / "items.json"
 
-    if not items_path.exists():
-        print(f"Error: items.json not found at {items_path}")
-        sys.exit(1)
+def apply_add(entity_path, data, fact_data, events=None):
+    """Append a fact to already-loaded items.json data. Returns the new fact ID.
 
-    data = json.loads(items_path.read_text())
+    Raises InvalidFact (leaving data untouched) if required fields are missing
+    or a caller-supplied ID is already taken. If events is a list, the
+    corresponding fact-log event is appended to it.
+    """
+    # Validate required fields
+    missing = [f for f in REQUIRED_FIELDS if f not in fact_data]
+    if missing:
+        raise InvalidFact(f"Missing required fields: {', '.join(missing)}")
+    # Log replay skips adds of known IDs, so a duplicate would only survive
+    # in snapshot mode; reject it in both
+    if "id" in fact_data and any(item.get("id") == fact_data["id"] for item in data["items"]):
+        raise InvalidFact(f"Duplicate fact ID: {fact_data['id']}")
 
-    # Generate ID if not provided
+    # Generate ID if not provided; keep the counter ahead of caller-supplied IDs
     if "id" not in fact_data:
-        fact_data["id"] = generate_fact_id(entity_path)
+        fact_data["id"] = generate_fact_id(entity_path, data)
+    else:
+        num = fact_number(fact_data["id"])
+        if num is not None and num > ensure_fact_counter(data):
+            data["factCounter"] = num
 
     # Set defaults
     fact_data.setdefault("status", "active")
@@ -53,34 +491,19 @@ def add_fact(entity_path, fact_data):
     fact_data.setdefault("lastAccessed", datetime.now().strftime("%Y-%m-%d"))
     fact_data.setdefault("accessCount", 0)
 
-    # Validate required fields
-    required = ["fact", "category", "timestamp", "source"]
-    missing = [f for f in required if f not in fact_data]
-    if missing:
-        print(f"Error: Missing required fields: {', '.join(missing)}")
-        sys.exit(1)
-
-    # Add fact
     data["items"].append(fact_data)
-    data["lastModified"] = datetime.now().isoformat()
-
-    # Save
-    items_path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-    print(f"✓ Added fact: {fact_data['id']}")
+    metrics.count("factsAdded")
+    if events is not None:
+        events.append({"op": "add", "fact": dict(fact_data), "counter": data["factCounter"]})
     return fact_data["id"]
 
 
-def supersede_fact(entity_path, old_fact_id, new_fact_data):
-    """Mark a fact as superseded and add a new one."""
-    items_path = Path(entity_path) / "items.json"
-
-    if not items_path.exists():
-        print(f"Error: items.json not found at {items_path}")
-        sys.exit(1)
+def apply_supersede(entity_path, data, old_fact_id, new_fact_data, events=None):
+    """Supersede a fact in already-loaded items.json data. Returns the new fact ID.
 
-    data = json.loads(items_path.read_text())
-
-    # Find old fact
+    Raises FactNotFound or InvalidFact (leaving data untouched) if the old
+    fact does not exist or the new fact is invalid.
+    """
     old_fact = None
     for item in data["items"]:
         if item.get("id") == old_fact_id:
@@ -88,48 +511,216 @@ def supersede_fact(entity_path, old_fact_id, new_fact_data):
             break
 
     if not old_fact:
-        print(f"Error: Fact {old_fact_id} not found")
-        sys.exit(1)
-
-    # Add new fact
-    new_id = add_fact(entity_path, new_fact_data)
-
-    # Reload data after adding new fact
-    data = json.loads(items_path.read_text())
-
-    # Update old fact
-    for item in data["items"]:
-        if item.get("id") == old_fact_id:
-            item["status"] = "superseded"
-            item["supersededBy"] = new_id
-            break
+        raise FactNotFound(f"Fact {old_fact_id} not found among current facts")
+
+    new_id = apply_add(entity_path, data, new_fact_data, events)
+    old_fact["status"] = "superseded"
+    old_fact["supersededBy"] = new_id
+    metrics.count("factsSuperseded")
+    if events is not None:
+        events.append({"op": "supersede", "id": old_fact_id, "by": new_id})
+    return new_id
+
+
+def add_fact(entity_path, fact_data, append_log=None):
+    """Add a new fact to items.json. Returns the new fact ID.
+
+    Raises EntityNotFound or InvalidFact.
+    """
+    with locked_entity(entity_path) as entity_path:
+        data = load_items(entity_path)
+        events = []
+        fact_id = apply_add(entity_path, data, fact_data, events)
+        commit_changes(entity_path, data, events, append_log)
+    return fact_id
+
+
+def supersede_fact(entity_path, old_fact_id, new_fact_data, append_log=None):
+    """Mark a fact as superseded and add a new one. Returns the new fact ID.
+
+    Raises EntityNotFound, FactNotFound or InvalidFact.
+    """
+    with locked_entity(entity_path) as entity_path:
+        data = load_items(entity_path)
+        events = []
+        new_id = apply_supersede(entity_path, data, old_fact_id, new_fact_data, events)
+        commit_changes(entity_path, data, events, append_log)
+    return new_id
+
+
+def read_batch(stream, default_entity=None):
+    """Parse a JSONL stream of operations.
+
+    Returns a list of (line_no, entity_path, op) tuples, where entity_path is
+    None and op is an error string for lines that could not be used.
+    """
+    ops = []
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            op = json.loads(line)
+        except json.JSONDecodeError as e:
+            ops.append((line_no, None, f"Invalid JSON: {e}"))
+            continue
+        if not isinstance(op, dict):
+            ops.append((line_no, None, "Operation must be a JSON object"))
+            continue
+        entity = op.get("entity") or default_entity
+        if not entity:
+            ops.append((line_no, None, "Missing entity"))
+            continue
+        ops.append((line_no, str(entity), op))
+    return ops
+
+
+def apply_entity_ops(entity_path, entity, entity_ops, results, append_log=None):
+    """Apply one entity's batch operations under its lock, filling in results."""
+    data = load_items(entity_path)
+    events = []
+    for line_no, op in entity_ops:
+        result = {"line": line_no, "entity": entity, "op": op.get("op")}
+        fact = op.get("fact")
+        try:
+            if not isinstance(fact, dict):
+                raise ValueError("Missing fact object")
+            if op.get("op") == "add":
+                result["id"] = apply_add(entity_path, data, fact, events)
+            elif op.get("op") == "supersede":
+                if not op.get("oldId"):
+                    raise ValueError("Missing oldId")
+                result["id"] = apply_supersede(entity_path, data, op["oldId"], fact, events)
+                result["superseded"] = op["oldId"]
+            else:
+                raise ValueError(f"Unknown op: {op.get('op')!r}")
+            result["ok"] = True
+        except ValueError as e:
+            result["ok"] = False
+            result["error"] = str(e)
+        results[line_no] = result
+
+    if events:
+        commit_changes(entity_path, data, events, append_log)
+
+
+def apply_batch(ops, append_log=None):
+    """Apply parsed batch operations with one load and one write per entity.
+
+    Returns one result dict per operation, in input order.
+    """
+    results = {}
+    groups = {}
+    for line_no, entity, op in ops:
+        if entity is None:
+            results[line_no] = {"line": line_no, "ok": False, "error": op}
+        else:
+            groups.setdefault(entity, []).append((line_no, op))
+
+    for entity, entity_ops in groups.items():
+        try:
+            with locked_entity(entity) as entity_path:
+                apply_entity_ops(entity_path, entity, entity_ops, results, append_log)
+        except EntityNotFound as e:
+            for line_no, op in entity_ops:
+                results[line_no] = {
+                    "line": line_no, "entity": entity, "op": op.get("op"),
+                    "ok": False, "error": str(e),
+                }
+
+    return [results[line_no] for line_no, _, _ in ops]
+
+
+def run_batch(source, default_entity=None, append_log=None):
+    """Run batch mode from a file path or stdin ("-"). Returns the exit code."""
+    if source == "-":
+        ops = read_batch(sys.stdin, default_entity)
+    else:
+        try:
+            with open(source, encoding="utf-8") as f:
+                ops = read_batch(f, default_entity)
+        except OSError as e:
+            print(f"Error: Cannot read batch file {source}: {e.strerror or e}")
+            return 1
 
-    data["lastModified"] = datetime.now().isoformat()
-    items_path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    results = apply_batch(ops, append_log)
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
 
-    print(f"✓ Superseded fact: {old_fact_id} → {new_id}")
+    failed = sum(1 for r in results if not r["ok"])
+    print(f"✓ Applied {len(results) - failed}/{len(results)} operations", file=sys.stderr)
+    return 1 if failed else 0
 
 
 def main():
     parser = argparse.ArgumentParser(description="Add or update facts in entity")
-    parser.add_argument("entity_path", help="Path to entity directory")
+    parser.add_argument("entity_path", nargs="?", help="Path to entity directory")
     parser.add_argument("--add", help="Add new fact (JSON string)")
     parser.add_argument("--supersede", nargs=2, metavar=("OLD_ID", "NEW_FACT"),
                         help="Supersede old fact with new one")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="Apply JSONL add/supersede operations from FILE (default: stdin)")
+    parser.add_argument("--append-log", action="store_true", default=None,
+                        help="Append changes to items.log.jsonl instead of rewriting items.json")
+    parser.add_argument("--compact", action="store_true",
+                        help="Fold items.log.jsonl back into items.json")
+    parser.add_argument("--shard", action="store_true",
+                        help="Move superseded facts into history/<year>.json shards")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="Rewrite items.json and history shards in this format")
+    parser.add_argument("--export", nargs="?", const="-", metavar="FILE",
+                        help="Write items.json in full pretty form to FILE (default: stdout)")
+    metrics.add_arguments(parser)
 
     args = parser.parse_args()
+    metrics.configure(args.metrics, args.profile)
 
-    if args.add:
-        fact_data = json.loads(args.add)
-        add_fact(args.entity_path, fact_data)
-    elif args.supersede:
-        old_id, new_fact_json = args.supersede
-        new_fact_data = json.loads(new_fact_json)
-        supersede_fact(args.entity_path, old_id, new_fact_data)
-    else:
+    if args.batch:
+        sys.exit(run_batch(args.batch, args.entity_path, args.append_log))
+
+    if not args.entity_path:
         parser.print_help()
         sys.exit(1)
 
+    if not (Path(args.entity_path) / "items.json").exists() and (args.format or args.export or args.compact):
+        print(f"Error: items.json not found at {Path(args.entity_path) / 'items.json'}")
+        sys.exit(1)
+
+    try:
+        if args.export:
+            text = export_items(args.entity_path)
+            if args.export == "-":
+                sys.stdout.write(text)
+            else:
+                atomic_write_text(args.export, text)
+                print(f"✓ Exported {args.entity_path} to {args.export}")
+        elif args.format:
+            convert_entity(args.entity_path, args.format)
+            print(f"✓ Rewrote {args.entity_path} in {args.format} format")
+        elif args.shard:
+            moved = shard_entity(args.entity_path)
+            print(f"✓ Moved {moved} superseded facts to {Path(args.entity_path) / HISTORY_DIR}")
+        elif args.compact:
+            if compact_entity(args.entity_path):
+                print(f"✓ Compacted fact log: {args.entity_path}")
+            else:
+                print(f"✓ No fact log to compact: {args.entity_path}")
+        elif args.add:
+            fact_data = json.loads(args.add)
+            fact_id = add_fact(args.entity_path, fact_data, args.append_log)
+            print(f"✓ Added fact: {fact_id}")
+        elif args.supersede:
+            old_id, new_fact_json = args.supersede
+            new_fact_data = json.loads(new_fact_json)
+            new_id = supersede_fact(args.entity_path, old_id, new_fact_data, args.append_log)
+            print(f"✓ Added fact: {new_id}")
+            print(f"✓ Superseded fact: {old_id} → {new_id}")
+        else:
+            parser.print_help()
+            sys.exit(1)
+    except ParaMemoryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    metrics.run_main("update_entity", main)
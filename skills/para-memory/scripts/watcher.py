@@ -0,0 +1,211 @@
+"""
+File change notification for weekly_synthesis.py --watch.
+
+On Linux, directories are watched with inotify (through ctypes, so no
+extra packages are needed); elsewhere, or when inotify is unavailable or out
+of watches, the trees are re-scanned every poll interval and compared by
+size and mtime. Both report the paths of files that were written, created,
+moved or deleted. Hidden files and directories (lock files, temp files of
+atomic writes, the indexes) are ignored.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+
+POLL_INTERVAL = 2.0
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def hidden(name):
+    return name.startswith(".")
+
+
+def walk(root, exclude=()):
+    """Yield (dirpath, filenames) under root, skipping hidden and excluded dirs."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames
+                       if not hidden(d) and Path(dirpath, d) not in exclude]
+        yield Path(dirpath), [f for f in filenames if not hidden(f)]
+
+
+class PollingWatcher:
+    """Detects changes by comparing stat snapshots of the watched trees."""
+
+    def __init__(self, roots, exclude=(), interval=POLL_INTERVAL):
+        self.roots = [Path(root) for root in roots]
+        self.exclude = {Path(path) for path in exclude}
+        self.interval = interval
+        self.overflowed = False
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, filenames in walk(root, self.exclude):
+                for name in filenames:
+                    path = dirpath / name
+                    try:
+                        st = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout=None):
+        """Changed paths, waiting up to timeout seconds (None = forever) for one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self.scan()
+            changed = {path for path in current.keys() | self.snapshot.keys()
+                       if current.get(path) != self.snapshot.get(path)}
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watches on every directory of the watched trees."""
+
+    def __init__(self, roots, exclude=()):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.exclude = {Path(path) for path in exclude}
+        self.overflowed = False
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.paths = {}  # watch descriptor -> directory
+        try:
+            for root in roots:
+                self.add_tree(Path(root))
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return  # removed before we got to it
+            raise OSError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+        self.paths[wd] = path
+
+    def add_tree(self, root):
+        """Watch root and its subdirectories; returns the files already in them."""
+        found = set()
+        for dirpath, filenames in walk(root, self.exclude):
+            self.add_watch(dirpath)
+            found.update(dirpath / name for name in filenames)
+        return found
+
+    def read(self, timeout=None):
+        """Changed paths, waiting up to timeout seconds (None = forever) for one."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            name = os.fsdecode(name.rstrip(b"\0"))
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            if directory is None or not name or hidden(name):
+                continue
+            path = directory / name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and path not in self.exclude:
+                    # Files may already be in a new directory by the time
+                    # it is watched (e.g. a freshly created entity)
+                    changed |= self.add_tree(path)
+                elif mask & IN_MOVED_FROM:
+                    # Files moved away with the directory (e.g. archived);
+                    # its watches now point elsewhere, or are re-added by
+                    # the matching IN_MOVED_TO
+                    prefix = f"{path}{os.sep}"
+                    for other, watched in list(self.paths.items()):
+                        if watched == path or str(watched).startswith(prefix):
+                            changed.add(watched / "items.json")
+                            self.libc.inotify_rm_watch(self.fd, other)
+                            del self.paths[other]
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def open_watcher(roots, exclude=(), poll=False, interval=POLL_INTERVAL):
+    """An InotifyWatcher if possible (and poll is not set), else a PollingWatcher."""
+    roots = [root for root in roots if Path(root).is_dir()]
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots, exclude)
+        except (OSError, AttributeError) as e:
+            print(f"  ⚠ inotify unavailable ({e}); polling every {interval:g}s")
+    return PollingWatcher(roots, exclude, interval)
+
+
+def changes(watcher, debounce, timeout=None, max_wait=None):
+    """Wait for a burst of changes and return all of its paths.
+
+    Blocks up to timeout seconds for a first change, then keeps collecting
+    until debounce seconds pass without another (or max_wait seconds in
+    total, so a steady stream of writes can't postpone processing forever).
+    Returns an empty set on timeout.
+    """
+    changed = watcher.read(timeout)
+    if not changed and not watcher.overflowed:
+        return changed
+    started = time.monotonic()
+    while max_wait is None or time.monotonic() - started < max_wait:
+        more = watcher.read(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
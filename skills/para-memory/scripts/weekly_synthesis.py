@@ -6,55 +6,213 @@ Sorts facts into tiers:
 - Hot (accessed last 7 days)
 - Warm (accessed 8-30 days ago)
 - Cold (not accessed 30+ days) - omitted from summary
+Frequently accessed facts stay in a tier proportionally longer.
 
-After regenerating summaries, updates QMD search index and embeddings.
+Recorded fact accesses (.access.log.jsonl, see access_log.py) are folded into
+lastAccessed/accessCount and pending append-only fact logs (items.log.jsonl)
+are compacted into items.json first, and superseded facts of sharded entities
+are moved to their history/ shards. After regenerating summaries, updates
+QMD search index and embeddings.
 
-Usage: python weekly_synthesis.py [base_path] [--skip-qmd]
+Entities are found through the entity catalog (knowledge/.catalog.json, see
+entity_catalog.py) rather than a directory walk; entity directories created
+by hand are found by re-listing only the directories whose mtime changed
+since the last run. The first run, and every --full run, walks the tree
+instead and brings the catalog up to date; each run folds the catalog
+journal in, re-reads the records of entities whose facts changed and
+records the entities' tier counts.
+
+Runs are incremental: .synthesis-manifest.json in base_path records each
+entity's items.json fingerprint and the next date one of its facts crosses a
+tier boundary. Entities with unchanged facts, unchanged backlinks (when the
+fact index exists, see fact_index.py) and no pending tier change are
+skipped, and summaries whose content is unchanged are never rewritten.
+The manifest also tracks which files of the QMD collections (knowledge/,
+memory/ notes, MEMORY.md) changed since the last successful QMD index run;
+indexing is skipped when nothing did. The list is built without walking the
+tree: from what synthesis wrote, the catalog, the timeline index (which the
+SessionEnd hook keeps current) and MEMORY.md's mtime. Other knowledge/ files
+edited by hand are only noticed by --full and --watch.
+Pass --full to ignore the manifest. --jobs N spreads entities over N worker
+processes (0 = one per CPU); output is identical to a serial run.
+
+Facts are ranked by a continuous recency x frequency decay score (see
+DECAY_SETTINGS); --curve/--half-life tune it and --hot-limit/--warm-limit cap
+how many facts of each tier a summary lists. --max-bytes/--max-tokens cap the
+size of every summary.md: hot facts, warm facts, related entities and backlinks
+are filled in that order and whatever does not fit is replaced by a count
+pointing at items.json or the fact index.
+
+Entities under archives/ are not synthesized unless --include-archived is
+given. --archive first moves entities whose active facts are all cold into
+archives/ (see archive_entities.py).
+
+--watch keeps running after the pass: knowledge/ and memory/ are watched
+(inotify, or polling with --poll or where inotify is unavailable) and, once a
+burst of writes has settled for --debounce seconds, only the entities whose
+fact files changed (plus the entities they link to or no longer link to) are
+re-indexed and re-synthesized, and changed notes are re-indexed in the
+timeline. Changed files are queued for QMD. Once a day, the watcher runs an
+incremental pass over every entity so facts still move between tiers as they
+age, folds recorded accesses and, unless --skip-qmd is given, updates QMD.
+
+Usage: python weekly_synthesis.py [base_path] [--skip-qmd] [--full] [--jobs N]
+                                  [--curve C] [--half-life DAYS]
+                                  [--hot-limit K] [--warm-limit K]
+                                  [--max-bytes N | --max-tokens N]
+                                  [--archive] [--include-archived]
+                                  [--watch [--debounce SECONDS] [--poll]]
 If base_path is not provided, uses PARA_MEMORY_ROOT environment variable.
 If environment variable not set, defaults to ~/para-memory/knowledge.
 """
 
+import os
 import sys
+import json
+import math
+import hashlib
+import argparse
 import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from access_log import fold as fold_access_log
+from entity_catalog import catalog_paths, find_new_entities, load_catalog, record_synthesis
+from fact_index import entity_dirs, referenced_by
+from storage import ARCHIVE_DIR, atomic_write_text, entity_lock
+import metrics
+from update_entity import HISTORY_DIR, LOG_NAME, compact_entity, load_items, shard_entity
+
 
+MANIFEST_NAME = ".synthesis-manifest.json"
 
-def days_since_access(last_accessed):
+# Decay scoring. Each active fact gets a continuous score
+#   curve(days since lastAccessed) * (1 + frequencyWeight * ln(1 + accessCount))
+# and tiers are cut at the scores of a never-accessed fact hotDays/warmDays
+# old, so an unused fact goes warm after a week and cold after a month while
+# frequently used facts stay warm proportionally longer. Only the top
+# hotLimit/warmLimit facts of each tier are listed in summary.md (0 = all).
+# Settings are recorded in the manifest, so changing them invalidates every
+# entity.
+HOT_DAYS = 7
+WARM_DAYS = 30
+HALF_LIFE_DAYS = 14
+FREQUENCY_WEIGHT = 0.2
+HOT_LIMIT = 15
+WARM_LIMIT = 10
+# Optional cap on summary.md size in bytes (0 = none); facts, related entities
+# and backlinks are kept in that priority order and the rest are pointed to
+SUMMARY_BUDGET = 0
+# Rough bytes per token for --max-tokens
+BYTES_PER_TOKEN = 4
+
+# Recency curves, each 1.0 at day 0 and 0.5 at the half-life
+DECAY_CURVES = {
+    "exponential": lambda days, half_life: 0.5 ** (days / half_life),
+    "hyperbolic": lambda days, half_life: 1.0 / (1.0 + days / half_life),
+}
+# Curves under which facts never overtake each other as time passes; with
+# the others, summaries must be re-rendered daily to keep their order right
+ORDER_STABLE_CURVES = {"exponential"}
+
+DECAY_SETTINGS = {
+    "curve": "exponential",
+    "halfLifeDays": HALF_LIFE_DAYS,
+    "frequencyWeight": FREQUENCY_WEIGHT,
+    "hotDays": HOT_DAYS,
+    "warmDays": WARM_DAYS,
+    "hotLimit": HOT_LIMIT,
+    "warmLimit": WARM_LIMIT,
+    "summaryBudget": SUMMARY_BUDGET,
+}
+
+
+def days_since_access(last_accessed, today=None):
     """Calculate days since last access."""
     if not last_accessed:
         return 999  # Very old
 
     try:
-        last_date = datetime.strptime(last_accessed, "%Y-%m-%d")
-        return (datetime.now() - last_date).days
+        last_date = datetime.strptime(last_accessed, "%Y-%m-%d").date()
+        return ((today or datetime.now().date()) - last_date).days
     except (ValueError, TypeError):
         return 999
 
 
-def classify_fact(fact):
-    """Classify fact as hot, warm, or cold."""
-    days = days_since_access(fact.get("lastAccessed"))
-    access_count = fact.get("accessCount", 0)
+def decay_score(days, access_count, settings=None):
+    """Score of a fact last accessed `days` ago with access_count accesses."""
+    settings = settings or DECAY_SETTINGS
+    curve = DECAY_CURVES[settings["curve"]]
+    frequency = 1.0 + settings["frequencyWeight"] * math.log1p(max(access_count or 0, 0))
+    return curve(max(days, 0), settings["halfLifeDays"]) * frequency
+
+
+def score_facts(facts, settings=None, today=None):
+    """Decay scores for a list of facts, all aged against the same day."""
+    today = today or datetime.now().date()
+    return [
+        decay_score(days_since_access(f.get("lastAccessed"), today), f.get("accessCount", 0), settings)
+        for f in facts
+    ]
+
+
+def tier_thresholds(settings=None):
+    """(hot, warm) minimum scores: those of unused facts hotDays/warmDays old."""
+    settings = settings or DECAY_SETTINGS
+    return (decay_score(settings["hotDays"], 0, settings),
+            decay_score(settings["warmDays"], 0, settings))
 
-    # Frequency resistance: high access count extends warmth
-    if access_count > 10:
-        days = max(0, days - 5)  # Bonus 5 days
 
-    if days <= 7:
+def tier_for_score(score, thresholds):
+    hot, warm = thresholds
+    if score >= hot:
         return "hot"
-    elif days <= 30:
+    elif score >= warm:
         return "warm"
     else:
         return "cold"
 
 
+def classify_fact(fact, settings=None):
+    """Classify fact as hot, warm, or cold."""
+    score = score_facts([fact], settings)[0]
+    return tier_for_score(score, tier_thresholds(settings))
+
+
+def next_tier_change(fact, settings=None, today=None):
+    """Return the date on which classify_fact's answer for fact next changes.
+
+    Returns None if the fact is already cold (or has no usable lastAccessed)
+    and so will never change tier without being modified.
+    """
+    if not fact.get("lastAccessed"):
+        return None
+    today = today or datetime.now().date()
+    days = days_since_access(fact["lastAccessed"], today)
+    count = fact.get("accessCount", 0)
+    thresholds = tier_thresholds(settings)
+    tier = tier_for_score(decay_score(days, count, settings), thresholds)
+    if tier == "cold":
+        return None
+
+    # Scores only fall with age: find the first day below this tier's floor
+    floor = thresholds[0] if tier == "hot" else thresholds[1]
+    low, high = 0, 1
+    while decay_score(days + high, count, settings) >= floor:
+        low, high = high, high * 2
+    while high - low > 1:
+        mid = (low + high) // 2
+        if decay_score(days + mid, count, settings) >= floor:
+            low = mid
+        else:
+            high = mid
+    return today + timedelta(days=high)
+
+
 def get_base_path(provided_path=None):
     """Get base path from argument, environment variable, or default."""
-    import os
-    from pathlib import Path
-    
     if provided_path:
         return Path(os.path.expanduser(provided_path))
     
@@ -66,34 +224,50 @@ def get_base_path(provided_path=None):
     return Path(os.path.expanduser('~/para-memory/knowledge'))
 
 
-def regenerate_summary(entity_path):
-    """Regenerate summary.md from items.json with memory decay."""
+def regenerate_summary(entity_path, settings=None):
+    """Regenerate summary.md from items.json with memory decay.
+
+    summary.md is only rewritten if its content actually changes.
+    """
     items_path = entity_path / "items.json"
-    summary_path = entity_path / "summary.md"
 
     if not items_path.exists():
         return 0, 0, 0
 
-    data = json.loads(items_path.read_text())
-    active_facts = [f for f in data["items"] if f.get("status") == "active"]
+    data = load_items(entity_path)
+    hot, warm, cold, _, _ = write_summary(entity_path, data, referenced_by(entity_path), settings)
+    return hot, warm, cold
 
-    # Classify facts
-    hot_facts = []
-    warm_facts = []
-    cold_facts = []
 
-    for fact in active_facts:
-        tier = classify_fact(fact)
-        if tier == "hot":
-            hot_facts.append(fact)
-        elif tier == "warm":
-            warm_facts.append(fact)
-        else:
-            cold_facts.append(fact)
+def render_summary(entity_path, data, backlinks=None, settings=None):
+    """Render summary.md content for loaded items.json data.
+
+    backlinks (entities whose facts reference this one, from the fact index)
+    are listed under "Referenced By".
+
+    Returns (content, hot_count, warm_count, cold_count, next_change), where
+    next_change is the earliest date the rendered output can change by
+    itself (a fact changing tier), or None.
+    """
+    settings = settings or DECAY_SETTINGS
+    summary_path = entity_path / "summary.md"
+    active_facts = [f for f in data["items"] if f.get("status") == "active"]
+    today = datetime.now().date()
+
+    # Score all facts in one pass, then classify
+    with metrics.phase("classify"):
+        scores = score_facts(active_facts, settings, today)
+        thresholds = tier_thresholds(settings)
+        tiers = {"hot": [], "warm": [], "cold": []}
+        for fact, score in zip(active_facts, scores):
+            tiers[tier_for_score(score, thresholds)].append((score, fact))
 
-    # Sort by access count within tiers
-    hot_facts.sort(key=lambda f: f.get("accessCount", 0), reverse=True)
-    warm_facts.sort(key=lambda f: f.get("accessCount", 0), reverse=True)
+        # Highest score first within tiers; ties by ID keep the output stable
+        for tier in tiers.values():
+            tier.sort(key=lambda pair: (-pair[0], str(pair[1].get("id", ""))))
+    hot_facts = [fact for _, fact in tiers["hot"]]
+    warm_facts = [fact for _, fact in tiers["warm"]]
+    cold_facts = [fact for _, fact in tiers["cold"]]
 
     # Read existing summary to preserve overview
     overview = ""
@@ -104,49 +278,340 @@ def regenerate_summary(entity_path):
             if len(parts) > 0:
                 overview = parts[0].strip()
 
+    # Related entities, most referenced first (priority under a size budget)
+    mentions = Counter()
+    for fact in active_facts:
+        mentions.update(set(fact.get("relatedEntities", [])))
+    related = sorted(mentions, key=lambda entity: (-mentions[entity], entity))
+
+    # Sections in priority order: (heading, candidate lines, total, empty text, pointer)
+    sections = [
+        ("Hot Facts", fact_lines(hot_facts, settings["hotLimit"]), len(hot_facts),
+         "*No recently accessed facts*\n", "{n} more hot facts in items.json"),
+        ("Warm Facts", fact_lines(warm_facts, settings["warmLimit"]), len(warm_facts),
+         "*No warm facts*\n", "{n} more warm facts in items.json"),
+        ("Related Entities", [f"- {entity}\n" for entity in related], len(related),
+         None, "{n} more in items.json (relatedEntities)"),
+        ("Referenced By", [f"- {entity}\n" for entity in backlinks or []], len(backlinks or []),
+         None, "{n} more; see fact_index.py links"),
+    ]
+
     # Generate new summary
     entity_name = entity_path.name.replace("-", " ").title()
-    summary_content = overview if overview else f"# {entity_name}\n\n## Overview\n\n"
+    head = overview if overview else f"# {entity_name}\n\n## Overview\n\n"
+    # Note cold facts exist but don't list them
+    archived = (f"\n## Archived Facts\n\n*{len(cold_facts)} cold facts available in items.json*\n"
+                if cold_facts else "")
+
+    def assemble(counts, pointers=True):
+        rendered = {}
+        for (heading, lines, total, empty, pointer), count in zip(sections, counts):
+            if not total:
+                rendered[heading] = f"\n## {heading}\n\n{empty}" if empty else ""
+                continue
+            shown = lines[:count]
+            if heading in ("Related Entities", "Referenced By"):
+                shown = sorted(shown)  # listed alphabetically, whatever made the cut
+            body = "".join(shown)
+            if pointers and count < total:
+                body += ("\n" if count else "") + f"*{pointer.format(n=total - count)}*\n"
+            rendered[heading] = f"\n## {heading}\n\n{body}"
+        return (head + rendered["Hot Facts"] + rendered["Warm Facts"] + archived
+                + rendered["Related Entities"] + rendered["Referenced By"])
+
+    fixed = utf8_len(assemble([0] * len(sections), pointers=False))
+    counts = fill_budget(
+        [(lines, total, "\n*" + pointer.format(n=total) + "*\n")
+         for _, lines, total, _, pointer in sections],
+        fixed, settings["summaryBudget"],
+    )
+    summary_content = assemble(counts)
+
+    with metrics.phase("nextTierChange"):
+        changes = [c for c in (next_tier_change(f, settings, today) for f in active_facts) if c]
+    if settings["curve"] not in ORDER_STABLE_CURVES and len(hot_facts) + len(warm_facts) > 1:
+        changes.append(today + timedelta(days=1))
+    next_change = min(changes) if changes else None
+    return summary_content, len(hot_facts), len(warm_facts), len(cold_facts), next_change
+
+
+def fact_lines(facts, limit):
+    """Summary bullets for the top `limit` facts (0 = all)."""
+    shown = facts[:limit] if limit else facts
+    return [f"- {fact['fact']} ({fact.get('timestamp', 'unknown')})\n" for fact in shown]
+
+
+def utf8_len(text):
+    return len(text.encode("utf-8"))
+
+
+def fill_budget(sections, fixed, budget):
+    """Decide how many candidate lines of each section fit in budget bytes.
+
+    sections are (lines, total, widest_pointer) in priority order; a section
+    showing fewer than `total` items ends with a pointer to the rest, whose
+    room is kept aside until the section turns out to fit whole. fixed is
+    the size of everything else. Returns a line count per section; with no
+    budget (0), every candidate line is kept.
+    """
+    if not budget:
+        return [len(lines) for lines, _, _ in sections]
+
+    reserved = [utf8_len(pointer) if total else 0 for _, total, pointer in sections]
+    remaining = budget - fixed - sum(reserved)
+    counts = []
+    for (lines, total, _), reserve in zip(sections, reserved):
+        count = 0
+        for line in lines:
+            # A section's last item may use the room kept for its pointer
+            complete = count + 1 == total
+            if utf8_len(line) > remaining + (reserve if complete else 0):
+                break
+            remaining -= utf8_len(line)
+            count += 1
+        if count == total:
+            remaining += reserve
+        counts.append(count)
+    return counts
 
-    summary_content += "\n## Hot Facts\n\n"
-    if hot_facts:
-        for fact in hot_facts:
-            summary_content += f"- {fact['fact']} ({fact.get('timestamp', 'unknown')})\n"
-    else:
-        summary_content += "*No recently accessed facts*\n"
 
-    summary_content += "\n## Warm Facts\n\n"
-    if warm_facts:
-        for fact in warm_facts:
-            summary_content += f"- {fact['fact']} ({fact.get('timestamp', 'unknown')})\n"
+def write_summary(entity_path, data, backlinks=None, settings=None):
+    """Render and write summary.md, skipping the write if nothing changed.
+
+    Returns (hot_count, warm_count, cold_count, next_change, written).
+    """
+    summary_path = entity_path / "summary.md"
+    with metrics.phase("render"):
+        content, hot, warm, cold, next_change = render_summary(entity_path, data, backlinks, settings)
+
+    with metrics.phase("writeSummary"), entity_lock(entity_path):
+        if summary_path.exists() and summary_path.read_text() == content:
+            return hot, warm, cold, next_change, False
+        atomic_write_text(summary_path, content)
+    return hot, warm, cold, next_change, True
+
+
+def input_fingerprint(entity_path):
+    """Cheap stat-based fingerprint of an entity's fact files."""
+    fingerprint = []
+    for name in ("items.json", LOG_NAME):
+        path = entity_path / name
+        if path.exists():
+            st = path.stat()
+            fingerprint.append([name, st.st_size, st.st_mtime_ns])
+    return fingerprint
+
+
+def input_hash(entity_path):
+    """Content hash of an entity's fact files."""
+    digest = hashlib.sha256()
+    for name in ("items.json", LOG_NAME):
+        path = entity_path / name
+        if path.exists():
+            digest.update(name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def synthesize_entity(entity_path, record=None, settings=None):
+    """Regenerate one entity's summary unless its manifest record is still valid.
+
+    Returns (new_record, status) where status is "skipped" (inputs and
+    backlinks unchanged, no tier boundary crossed), "unchanged" (re-rendered, identical output)
+    or "written".
+    """
+    record = record or {}
+    fingerprint = input_fingerprint(entity_path)
+    today = datetime.now().date().isoformat()
+    backlinks = referenced_by(entity_path)
+
+    if record.get("fingerprint") == fingerprint:
+        content_hash = record.get("hash")
     else:
-        summary_content += "*No warm facts*\n"
+        content_hash = input_hash(entity_path)
 
-    # Note cold facts exist but don't list them
-    if cold_facts:
-        summary_content += f"\n## Archived Facts\n\n*{len(cold_facts)} cold facts available in items.json*\n"
+    next_change = record.get("nextTierChange")
+    if (
+        record.get("hash") == content_hash
+        and record.get("referencedBy") == backlinks
+        and (next_change is None or today < next_change)
+        and (entity_path / "summary.md").exists()
+    ):
+        return {**record, "fingerprint": fingerprint}, "skipped"
 
-    # Related entities
-    all_related = set()
-    for fact in active_facts:
-        all_related.update(fact.get("relatedEntities", []))
+    hot, warm, cold, next_change, written = write_summary(
+        entity_path, load_items(entity_path), backlinks, settings
+    )
+    new_record = {
+        "fingerprint": fingerprint,
+        "hash": content_hash,
+        "nextTierChange": next_change.isoformat() if next_change else None,
+        "referencedBy": backlinks,
+        "hot": hot,
+        "warm": warm,
+        "cold": cold,
+    }
+    return new_record, "written" if written else "unchanged"
+
+
+def load_manifest(base_path, settings=None):
+    """Load the synthesis manifest.
+
+    Entity records are discarded if the decay settings changed; the QMD
+    bookkeeping is kept either way.
+    """
+    manifest_path = base_path / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
 
-    if all_related:
-        summary_content += "\n## Related Entities\n\n"
-        for entity in sorted(all_related):
-            summary_content += f"- {entity}\n"
+    entities = manifest.get("entities", {})
+    if manifest.get("decay") != (settings or DECAY_SETTINGS):
+        entities = {}
+    qmd = manifest.get("qmd") or {}
+    return {
+        "entities": entities,
+        "qmd": {"lastIndexed": qmd.get("lastIndexed"), "pending": qmd.get("pending", [])},
+        "dirs": manifest.get("dirs") or {},
+    }
 
-    summary_path.write_text(summary_content)
-    return len(hot_facts), len(warm_facts), len(cold_facts)
 
+def save_manifest(base_path, entities, qmd, settings=None, dirs=None):
+    """Persist the synthesis manifest.
 
-def update_qmd_index():
-    """Update QMD search index and embeddings."""
-    print("\nUpdating QMD search index...")
+    dirs holds the directory mtimes find_new_entities compares against.
+    """
+    manifest = {
+        "decay": settings or DECAY_SETTINGS,
+        "lastRun": datetime.now().isoformat(),
+        "entities": entities,
+        "qmd": qmd,
+        "dirs": dirs or {},
+    }
+    atomic_write_text(base_path / MANIFEST_NAME, json.dumps(manifest, sort_keys=True))
+
+
+def para_root(base_path):
+    """The directory holding knowledge/ and memory/ for a synthesis base path."""
+    if (base_path / "knowledge").is_dir():
+        return base_path
+    return base_path.parent
+
+
+def knowledge_dir(base_path):
+    """The knowledge/ directory for a synthesis base path."""
+    if (base_path / "knowledge").is_dir():
+        return base_path / "knowledge"
+    return base_path
+
+
+def index_collections(base_path):
+    """(directory, suffixes) of the QMD collections set up in SKILL.md."""
+    return ((knowledge_dir(base_path), (".md", ".json")),
+            (para_root(base_path) / "memory", (".md",)))
+
+
+def in_index(path, base_path):
+    """Whether path belongs to a QMD collection; hidden files (indexes, locks) do not."""
+    path = Path(path)
+    if path.name.startswith("."):
+        return False
+    if path == para_root(base_path) / "MEMORY.md":
+        return True
+    for directory, suffixes in index_collections(base_path):
+        if directory in path.parents and path.suffix in suffixes:
+            return not any(part.startswith(".") for part in path.relative_to(directory).parts)
+    return False
+
+
+def modified_files(directory, suffixes, since):
+    """Files under directory with one of suffixes modified after since, by walking it."""
+    changed = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if name.startswith(".") or not name.endswith(suffixes):
+                continue
+            path = Path(dirpath) / name
+            try:
+                if path.stat().st_mtime > since:
+                    changed.append(path)
+            except FileNotFoundError:
+                continue
+    return changed
+
+
+def changed_index_files(base_path, since):
+    """Every file of the QMD collections modified after the since timestamp.
+
+    Walks and stats all of knowledge/ and memory/, so it only runs for
+    --full and after the watcher lost events; see changed_notes otherwise.
+    """
+    if since is None:
+        return []
+    changed = []
+    for directory, suffixes in index_collections(base_path):
+        changed.extend(modified_files(directory, suffixes, since))
+    tacit = para_root(base_path) / "MEMORY.md"
+    if tacit.exists() and tacit.stat().st_mtime > since:
+        changed.append(tacit)
+    return changed
+
+
+def changed_notes(base_path, since):
+    """memory/ notes and MEMORY.md modified after the since timestamp.
+
+    Notes come from the timeline index: the SessionEnd hook indexes session
+    files as it writes them, and opening the index catches up with notes
+    added, removed or edited today or yesterday (see timeline_index.py), so
+    no walk is needed. memory/ is only walked if the index was never built.
+    """
+    from timeline_index import INDEX_NAME as TIMELINE_NAME, open_index
+
+    if since is None:
+        return []
+    root = para_root(base_path)
+    memory_dir = root / "memory"
+    changed = []
+    if (memory_dir / TIMELINE_NAME).exists():
+        conn = open_index(memory_dir)
+        try:
+            rows = conn.execute("SELECT path FROM notes WHERE mtime > ?",
+                                (int(since * 1_000_000_000),)).fetchall()
+        finally:
+            conn.close()
+        changed.extend(memory_dir / path for path, in rows)
+    elif memory_dir.is_dir():
+        changed.extend(modified_files(memory_dir, (".md",), since))
+    tacit = root / "MEMORY.md"
+    if tacit.exists() and tacit.stat().st_mtime > since:
+        changed.append(tacit)
+    return changed
+
+
+def update_qmd_index(changed_files=None):
+    """Update QMD search index and embeddings.
+
+    If changed_files is given and empty, nothing is run. `qmd update` takes
+    no file list (it always rescans its collections), so changed_files only
+    decides whether to run; QMD re-indexes by content hash and only embeds
+    new or changed documents, so the cost of a run still follows the number
+    of changed files. Returns True only if both steps succeeded.
+    """
+    if changed_files is not None and not changed_files:
+        print("\n✓ QMD index up to date (no changed files)")
+        return True
+
+    if changed_files is None:
+        print("\nUpdating QMD search index...")
+    else:
+        print(f"\nUpdating QMD search index ({len(changed_files)} changed files)...")
+    ok = True
 
     try:
         # Update index
-        result = subprocess.run(
+        result = metrics.run_subprocess(
             ["qmd", "update"],
             capture_output=True,
             text=True,
@@ -157,6 +622,7 @@ def update_qmd_index():
             print("  ✓ QMD index updated")
         else:
             print(f"  ⚠ QMD update warning: {result.stderr}")
+            ok = False
     except FileNotFoundError:
         print("  ⚠ QMD not found - skipping index update")
         print("    Install QMD: bun install -g github:tobi/qmd")
@@ -171,7 +637,7 @@ def update_qmd_index():
     # Update embeddings
     print("Rebuilding vector embeddings...")
     try:
-        result = subprocess.run(
+        result = metrics.run_subprocess(
             ["qmd", "embed"],
             capture_output=True,
             text=True,
@@ -182,6 +648,7 @@ def update_qmd_index():
             print("  ✓ Vector embeddings rebuilt")
         else:
             print(f"  ⚠ QMD embedding warning: {result.stderr}")
+            ok = False
     except subprocess.TimeoutExpired:
         print("  ⚠ QMD embedding rebuild timed out")
         return False
@@ -189,53 +656,391 @@ def update_qmd_index():
         print(f"  ⚠ QMD embedding error: {e}")
         return False
 
-    return True
+    return ok
+
+
+def synthesize_all(entity_paths, records, jobs=1, settings=None):
+    """Run synthesize_entity over entities, optionally in a process pool.
+
+    Results come back in entity_paths order regardless of jobs.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(entity_paths) <= 1:
+        return [synthesize_entity(p, r, settings) for p, r in zip(entity_paths, records)]
+
+    chunksize = max(1, len(entity_paths) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(synthesize_entity, entity_paths, records,
+                             [settings] * len(entity_paths), chunksize=chunksize))
+
+
+def entity_for_change(path, knowledge):
+    """The entity directory a changed fact file belongs to, or None."""
+    if path.name in ("items.json", LOG_NAME):
+        entity_path = path.parent
+    elif path.parent.name == HISTORY_DIR and path.suffix == ".json":
+        entity_path = path.parent.parent
+    else:
+        return None
+    return entity_path if knowledge in entity_path.parents else None
+
+
+def reindex_entities(knowledge, entity_paths):
+    """Bring changed entities up to date in the fact index, if it exists.
+
+    Returns the entities they linked to before or link to now, whose
+    "Referenced By" sections may have changed with them.
+    """
+    from fact_index import INDEX_NAME, _delete_entity, connect, has_fts, outbound, sync_entity_index
+
+    db_path = knowledge / INDEX_NAME
+    if not db_path.exists():
+        return set()
+    linked = set()
+    conn = connect(db_path)
+    try:
+        for entity_path in entity_paths:
+            key = entity_path.relative_to(knowledge).as_posix()
+            linked.update(outbound(conn, key))
+            if (entity_path / "items.json").exists():
+                with entity_lock(entity_path):
+                    sync_entity_index(entity_path, load_items(entity_path))
+            else:
+                with conn:
+                    _delete_entity(conn, key, has_fts(conn))
+            linked.update(outbound(conn, key))
+    finally:
+        conn.close()
+    return {knowledge / target for target in linked if (knowledge / target / "items.json").exists()}
+
+
+def refresh_entities(base_path, entity_paths, manifest, settings):
+    """Re-synthesize entities, updating manifest records and QMD pending files in place.
+
+    Returns {entity_path: (hot, warm, cold)} for the entities that still exist.
+    """
+    entities = manifest["entities"]
+    pending = manifest["qmd"]["pending"]
+    index_root = para_root(base_path)
+    tiers = {}
+    for entity_path in entity_paths:
+        key = entity_path.relative_to(base_path).as_posix()
+        if not (entity_path / "items.json").exists():
+            entities.pop(key, None)  # deleted or archived
+            continue
+        previous = entities.get(key) or {}
+        record, status = synthesize_entity(entity_path, previous, settings)
+        entities[key] = record
+        tiers[entity_path] = hot, warm, cold = record["hot"], record["warm"], record["cold"]
+        if record["hash"] != previous.get("hash"):
+            pending.add((entity_path / "items.json").relative_to(index_root).as_posix())
+        if status == "written":
+            pending.add((entity_path / "summary.md").relative_to(index_root).as_posix())
+            print(f"  ✓ {entity_path.name}: {hot} hot, {warm} warm, {cold} cold")
+            metrics.count("entitiesRewritten")
+    return tiers
+
+
+def watch(base_path, settings, args):
+    """Keep summaries and indexes current as files change, until interrupted."""
+    from timeline_index import update_note
+    from watcher import changes, open_watcher
+
+    knowledge = knowledge_dir(base_path).resolve()
+    base_path = base_path.resolve()
+    memory_dir = para_root(base_path) / "memory"
+    exclude = [] if args.include_archived else [knowledge / ARCHIVE_DIR]
+    watcher = open_watcher([knowledge, memory_dir], exclude, poll=args.poll)
+
+    manifest = load_manifest(base_path, settings)
+    manifest["qmd"]["pending"] = set(manifest["qmd"]["pending"])
+    today = datetime.now().date()
+    print(f"\nWatching {knowledge} and {memory_dir} (Ctrl-C to stop)...")
+    try:
+        while True:
+            now = datetime.now()
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            changed = changes(watcher, args.debounce, (midnight - now).total_seconds() + 1,
+                              max_wait=args.debounce * 10)
+
+            daily = datetime.now().date() != today or watcher.overflowed
+            lost_events = watcher.overflowed
+            if daily:
+                # Tiers move with the date, and an overflowed event queue
+                # means changes were lost: check every entity (cheap for
+                # the unchanged ones)
+                today = datetime.now().date()
+                watcher.overflowed = False
+                with metrics.phase("accessFold"):
+                    fold_access_log(knowledge)
+                entity_paths = [p.resolve() for p in entity_dirs(base_path, args.include_archived)]
+                with metrics.phase("factIndex"):
+                    reindex_entities(knowledge, entity_paths)
+                refresh, walked = entity_paths, {p.relative_to(knowledge).as_posix()
+                                                 for p in entity_paths}
+            else:
+                refresh = {entity_for_change(path, knowledge) for path in changed} - {None}
+                with metrics.phase("factIndex"):
+                    entity_paths = sorted(refresh | reindex_entities(knowledge, refresh))
+                walked = None
+
+            with metrics.phase("synthesize"):
+                tiers = refresh_entities(base_path, entity_paths, manifest, settings)
+            if entity_paths:
+                with metrics.phase("catalog"):
+                    record_synthesis(knowledge, tiers, refresh, walked, args.include_archived)
+
+            notes = sorted(path for path in changed
+                           if path.suffix == ".md" and memory_dir in path.parents)
+            with metrics.phase("timelineIndex"):
+                for note in notes:
+                    update_note(note, memory_dir)
+            if notes:
+                print(f"  ✓ Re-indexed {len(notes)} notes")
+
+            # Every changed collection file, hand edits included, is queued
+            # as it is seen; only lost events call for a walk
+            pending = manifest["qmd"]["pending"]
+            index_root = para_root(base_path)
+            pending.update(path.relative_to(index_root).as_posix()
+                           for path in changed if in_index(path, base_path))
+
+            if daily and not args.skip_qmd:
+                index_started = datetime.now().timestamp()
+                last_indexed = manifest["qmd"]["lastIndexed"]
+                with metrics.phase("scan"):
+                    found = (changed_index_files(base_path, last_indexed) if lost_events
+                             else changed_notes(base_path, last_indexed))
+                for path in found:
+                    pending.add(path.relative_to(index_root).as_posix())
+                with metrics.phase("qmd"):
+                    if update_qmd_index(sorted(pending) if last_indexed is not None else None):
+                        manifest["qmd"] = {"lastIndexed": index_started, "pending": set()}
+
+            metrics.count("watchBatches")
+            save_manifest(base_path, manifest["entities"],
+                          {**manifest["qmd"], "pending": sorted(manifest["qmd"]["pending"])},
+                          settings, manifest["dirs"])
+    except KeyboardInterrupt:
+        print("\n✓ Stopped watching")
+    finally:
+        watcher.close()
 
 
 def main():
-    skip_qmd = "--skip-qmd" in sys.argv
-    args = [arg for arg in sys.argv[1:] if arg != "--skip-qmd"]
-
-    # Handle 0 or 1 arguments
-    if len(args) > 1:
-        print("Usage: python weekly_synthesis.py [base_path] [--skip-qmd]")
-        print("If base_path is not provided, uses PARA_MEMORY_ROOT environment variable.")
-        print("If environment variable not set, defaults to ~/para-memory/knowledge.")
-        sys.exit(1)
-    
-    base_path_arg = args[0] if len(args) == 1 else None
-    base_path = get_base_path(base_path_arg)
+    parser = argparse.ArgumentParser(
+        description="Apply memory decay and regenerate entity summaries",
+        epilog="If base_path is not provided, uses PARA_MEMORY_ROOT environment variable. "
+               "If environment variable not set, defaults to ~/para-memory/knowledge.",
+    )
+    parser.add_argument("base_path", nargs="?", help="Knowledge graph root")
+    parser.add_argument("--skip-qmd", action="store_true", help="Don't update the QMD index")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the synthesis manifest and re-render every entity")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="Worker processes for synthesis (0 = one per CPU, default: 1)")
+    parser.add_argument("--curve", choices=sorted(DECAY_CURVES), default=DECAY_SETTINGS["curve"],
+                        help="Recency decay curve (default: exponential)")
+    parser.add_argument("--half-life", type=float, default=HALF_LIFE_DAYS, metavar="DAYS",
+                        help=f"Days for recency to halve (default: {HALF_LIFE_DAYS})")
+    parser.add_argument("--hot-limit", type=int, default=HOT_LIMIT, metavar="K",
+                        help=f"Hot facts listed per summary, 0 = all (default: {HOT_LIMIT})")
+    parser.add_argument("--warm-limit", type=int, default=WARM_LIMIT, metavar="K",
+                        help=f"Warm facts listed per summary, 0 = all (default: {WARM_LIMIT})")
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument("--max-bytes", type=int, metavar="N",
+                        help="Size budget per summary.md in bytes (default: unlimited)")
+    budget.add_argument("--max-tokens", type=int, metavar="N",
+                        help=f"Size budget per summary.md in approximate tokens "
+                             f"({BYTES_PER_TOKEN} bytes each)")
+    parser.add_argument("--archive", action="store_true",
+                        help="First move entities whose active facts are all cold into archives/")
+    parser.add_argument("--include-archived", action="store_true",
+                        help="Also synthesize entities under archives/")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and refresh changed entities and notes as they change")
+    parser.add_argument("--debounce", type=float, default=1.0, metavar="SECONDS",
+                        help="With --watch, wait for writes to settle this long (default: 1)")
+    parser.add_argument("--poll", action="store_true",
+                        help="With --watch, poll for changes instead of using inotify")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure(args.metrics, args.profile)
+
+    if args.jobs < 0:
+        parser.error("--jobs must be >= 0")
+    if args.debounce < 0:
+        parser.error("--debounce must be >= 0")
+    if args.half_life <= 0:
+        parser.error("--half-life must be > 0")
+    if args.hot_limit < 0 or args.warm_limit < 0:
+        parser.error("--hot-limit and --warm-limit must be >= 0")
+    if (args.max_bytes or 0) < 0 or (args.max_tokens or 0) < 0:
+        parser.error("--max-bytes/--max-tokens must be >= 0")
+
+    settings = {
+        **DECAY_SETTINGS,
+        "curve": args.curve,
+        "halfLifeDays": args.half_life,
+        "hotLimit": args.hot_limit,
+        "warmLimit": args.warm_limit,
+        "summaryBudget": (args.max_bytes if args.max_bytes is not None
+                          else (args.max_tokens or 0) * BYTES_PER_TOKEN),
+    }
+
+    skip_qmd = args.skip_qmd
+    base_path = get_base_path(args.base_path)
 
     if not base_path.exists():
         print(f"Error: Path not found: {base_path}")
         sys.exit(1)
 
     print("Running weekly synthesis...")
+    knowledge = knowledge_dir(base_path)
+
+    with metrics.phase("accessFold"):
+        events, touched = fold_access_log(knowledge)
+    if events:
+        print(f"  ✓ Folded {events} access events into {touched} entities")
+
+    archived = []
+    if args.archive:
+        from archive_entities import archive_cold
+
+        with metrics.phase("archive"):
+            archived = archive_cold(knowledge, settings)
+        if archived:
+            print(f"  ✓ Archived {len(archived)} cold entities")
+
+    manifest = load_manifest(base_path, settings)
+    dirs = manifest["dirs"]
+
+    # Find all entity directories (those with items.json) from the catalog
+    # plus any created by hand, or by walking the tree; sorted so that
+    # output is stable across runs and job counts
+    with metrics.phase("discover"):
+        catalog = None if args.full else load_catalog(knowledge)
+        if catalog is not None:
+            added, dirs = find_new_entities(knowledge, catalog, dirs, args.include_archived)
+            entity_paths = sorted(catalog_paths(knowledge, catalog, args.include_archived) + added)
+            if added:
+                print(f"  ✓ Found {len(added)} new entities")
+        else:
+            entity_paths = entity_dirs(base_path, args.include_archived)
+    metrics.count("entities", len(entity_paths))
+
+    with metrics.phase("compact"):
+        compacted = sum(1 for entity_path in entity_paths if compact_entity(entity_path))
+    if compacted:
+        print(f"  ✓ Compacted fact logs for {compacted} entities")
 
-    # Find all entity directories (those with items.json)
-    entity_paths = []
-    for items_file in base_path.rglob("items.json"):
-        entity_paths.append(items_file.parent)
+    records = {} if args.full else manifest["entities"]
+    keys = [entity_path.relative_to(base_path).as_posix() for entity_path in entity_paths]
 
+    # Sharded entities keep only active facts in items.json. One whose
+    # facts are unchanged since the last run (which sharded it) has
+    # nothing new to move, so it is not locked or loaded
+    with metrics.phase("shard"):
+        moved = sum(shard_entity(entity_path) for entity_path, key in zip(entity_paths, keys)
+                    if (entity_path / HISTORY_DIR).is_dir()
+                    and input_fingerprint(entity_path) != records.get(key, {}).get("fingerprint"))
+    if moved:
+        print(f"  ✓ Moved {moved} superseded facts to history shards")
+    # With --jobs, per-entity phases (load, render, ...) run in the workers
+    # and are not recorded; this phase still covers them
+    with metrics.phase("synthesize"):
+        results = synthesize_all(entity_paths, [records.get(key) for key in keys], args.jobs,
+                                 settings)
+
+    new_manifest = {}
     total_hot = total_warm = total_cold = 0
+    skipped = unchanged = 0
 
-    for entity_path in entity_paths:
-        hot, warm, cold = regenerate_summary(entity_path)
+    # Files QMD has not seen yet: carried over from earlier runs, plus
+    # whatever changed in this one
+    index_root = para_root(base_path)
+    pending = set(manifest["qmd"]["pending"])
+    index_started = datetime.now().timestamp()
+    for key in archived:
+        # Gone from their old paths; QMD has to drop them
+        pending.add((knowledge / key / "summary.md").relative_to(index_root).as_posix())
+
+    for entity_path, key, (record, status) in zip(entity_paths, keys, results):
+        new_manifest[key] = record
+        if record["hash"] != manifest["entities"].get(key, {}).get("hash"):
+            pending.add((entity_path / "items.json").relative_to(index_root).as_posix())
+        if status == "written":
+            pending.add((entity_path / "summary.md").relative_to(index_root).as_posix())
+        hot, warm, cold = record["hot"], record["warm"], record["cold"]
         total_hot += hot
         total_warm += warm
         total_cold += cold
-        print(f"  ✓ {entity_path.name}: {hot} hot, {warm} warm, {cold} cold")
+        if status == "skipped":
+            skipped += 1
+        elif status == "unchanged":
+            unchanged += 1
+        else:
+            print(f"  ✓ {entity_path.name}: {hot} hot, {warm} warm, {cold} cold")
 
+    with metrics.phase("catalog"):
+        tiers = {entity_path: (record["hot"], record["warm"], record["cold"])
+                 for entity_path, (record, _) in zip(entity_paths, results)}
+        if catalog is None:
+            record_synthesis(knowledge, tiers, walked={
+                entity_path.relative_to(knowledge).as_posix() for entity_path in entity_paths
+            }, include_archived=args.include_archived)
+        else:
+            # Catalogued entities whose directories were removed by hand,
+            # and entities whose facts changed (in case a journal line was
+            # lost or items.json was edited by hand)
+            found = set(entity_paths)
+            gone = [knowledge / key for key, record in catalog.items()
+                    if (args.include_archived or not record.get("archived"))
+                    and knowledge / key not in found]
+            changed = [entity_path
+                       for entity_path, key, (record, _) in zip(entity_paths, keys, results)
+                       if record["hash"] != manifest["entities"].get(key, {}).get("hash")]
+            record_synthesis(knowledge, tiers, refresh=gone + changed)
+            for entity_path in gone:
+                # Removed by hand; QMD has to drop them
+                for name in ("items.json", "summary.md"):
+                    pending.add((entity_path / name).relative_to(index_root).as_posix())
+
+    metrics.count("entitiesRewritten", len(entity_paths) - skipped - unchanged)
+    metrics.count("entitiesSkipped", skipped)
+    metrics.count("facts", total_hot + total_warm + total_cold)
     print(f"\n✓ Synthesis complete!")
     print(f"  Total: {total_hot} hot, {total_warm} warm, {total_cold} cold facts")
-    print(f"  Processed {len(entity_paths)} entities")
+    print(f"  Processed {len(entity_paths)} entities "
+          f"({len(entity_paths) - skipped - unchanged} rewritten, "
+          f"{unchanged} re-rendered unchanged, {skipped} skipped)")
 
-    # Update QMD index unless skipped
+    # Update QMD index unless skipped; the first run always indexes. Notes
+    # and MEMORY.md may have been edited by hand or by an agent since the
+    # last index; --full also looks for hand edits under knowledge/
+    last_indexed = manifest["qmd"]["lastIndexed"]
     if not skip_qmd:
-        update_qmd_index()
+        with metrics.phase("scan"):
+            found = (changed_index_files(base_path, last_indexed) if args.full
+                     else changed_notes(base_path, last_indexed))
+        for path in found:
+            pending.add(path.relative_to(index_root).as_posix())
+        changed = sorted(pending) if last_indexed is not None else None
+        with metrics.phase("qmd"):
+            indexed = update_qmd_index(changed)
+        if indexed:
+            pending = set()
+            last_indexed = index_started
     else:
         print("\n⚠ Skipped QMD update (--skip-qmd flag)")
 
+    save_manifest(base_path, new_manifest, {"lastIndexed": last_indexed, "pending": sorted(pending)},
+                  settings, dirs)
+
+    if args.watch:
+        watch(base_path, settings, args)
+
 
 if __name__ == "__main__":
-    main()
+    metrics.run_main("weekly_synthesis", main)